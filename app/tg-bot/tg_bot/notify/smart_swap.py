@@ -33,7 +33,8 @@ class SwapMessage:
     from_amount: float
     to_amount: float
     position_change_formatted: str
-    post_amount: float
+    # 临时事件 (仅根据日志构建) 不知道交易后的持仓, 为 None
+    post_amount: float | None
     tx_time: str
     signature: str
     wallet_alias: str | None = None
@@ -45,7 +46,9 @@ class SwapMessage:
             wallet_name = self.target_wallet[:5] + "..."
         else:
             wallet_name = self.wallet_alias
-        if self.tx_type_cn == "开仓":
+        if self.tx_type_cn == "买入":
+            return f"🟢 {wallet_name} 买入 {self.to_amount} 个 {self.token_symbol}，花费 {self.from_amount} 个 SOL"
+        elif self.tx_type_cn == "开仓":
             return f"🟢 {wallet_name} 建仓 {self.to_amount} 个 {self.token_symbol}，花费 {self.from_amount} 个 SOL"
         elif self.tx_type_cn == "加仓":
             return f"🟢 {wallet_name} 加仓 {self.to_amount} 个 {self.token_symbol}，花费 {self.from_amount} 个 SOL"
@@ -121,6 +124,12 @@ class SmartWalletSwapAlertNotify:
         }
         # 交易类型中文映射
         tx_type_cn = _data.get(tx_event.tx_type, str(tx_event.tx_type))
+        if tx_event.provisional:
+            # 临时事件没有交易前的余额, 无法区分开仓与加仓, 持仓只知道本次变化量
+            tx_type_cn = "买入" if tx_event.tx_direction == "buy" else "卖出"
+            position_change = to_amount if tx_event.tx_direction == "buy" else -from_amount
+            position_change_formatted = f"{position_change:+.4f}"
+            post_amount = None
 
         tx_time = datetime.fromtimestamp(tx_event.timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
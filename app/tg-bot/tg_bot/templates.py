@@ -113,8 +113,8 @@ NOTIFY_SWAP_TEMPLATE = env.from_string(
 🪙 代币地址: <code>{{ mint }}</code>
 💰 交易数量: {{ "%.4f"|format(from_amount) }} → {{ "%.4f"|format(to_amount) }}
 📊 持仓变化: {{ position_change_formatted }}
-💎 当前持仓: {{ "%.4f"|format(post_amount) }}
-⏰ 时间: {{ tx_time }}
+{% if post_amount is not none %}💎 当前持仓: {{ "%.4f"|format(post_amount) }}
+{% endif %}⏰ 时间: {{ tx_time }}
 🔗 交易详情: <a href="https://solscan.io/tx/{{ signature }}">Solscan</a>
 📊 K线盯盘: <a href="https://gmgn.ai/sol/token/{{ mint }}">GMGN</a> | <a href="https://dexscreener.com/solana/{{ mint }}">DexScreen</a>
 """
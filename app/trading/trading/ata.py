@@ -0,0 +1,78 @@
+"""ATA 存在性缓存
+
+买入前原先需要通过 RPC 确认输出代币的 ATA 是否存在 (`has_ata` / `get_token_accounts_by_owner`),
+再决定是否添加创建 ATA 的指令, 每次买入都多一次网络往返。
+
+现在构建交易时不再查询 RPC:
+- 缓存中确认存在的 ATA 不添加创建指令
+- 其余情况使用幂等的 CreateIdempotent 指令, ATA 已存在时该指令不会失败
+
+缓存只由我们自己已确认的交易维护:
+- 买入成功后记录 ATA 存在
+- 买入失败 (可能是 ATA 已被关闭) 或构建了关闭 ATA 的卖出时移除记录
+"""
+
+from collections import OrderedDict
+from functools import cache
+
+from solbot_common.models.swap_record import SwapRecord, TransactionStatus
+from solders.instruction import Instruction  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import create_idempotent_associated_token_account
+
+
+class AtaExistenceCache:
+    """已确认存在的 ATA, 以 (owner, mint) 为键的 LRU 集合
+
+    Args:
+        maxsize: 最多记录的 ATA 数
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._known: OrderedDict[tuple[Pubkey, Pubkey], None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def exists(self, owner: Pubkey, mint: Pubkey) -> bool:
+        key = (owner, mint)
+        if key not in self._known:
+            return False
+        self._known.move_to_end(key)
+        return True
+
+    def add(self, owner: Pubkey, mint: Pubkey) -> None:
+        self._known[(owner, mint)] = None
+        self._known.move_to_end((owner, mint))
+        if len(self._known) > self.maxsize:
+            self._known.popitem(last=False)
+
+    def discard(self, owner: Pubkey, mint: Pubkey) -> None:
+        self._known.pop((owner, mint), None)
+
+    def create_instruction(
+        self, owner: Pubkey, mint: Pubkey, token_program_id: Pubkey = TOKEN_PROGRAM_ID
+    ) -> Instruction | None:
+        """返回买入前需要的创建 ATA 指令, 已知存在时返回 None"""
+        if self.exists(owner, mint):
+            return None
+        return create_idempotent_associated_token_account(owner, owner, mint, token_program_id)
+
+    def observe(self, swap_record: SwapRecord) -> None:
+        """根据已确认的交易结果更新缓存"""
+        if swap_record.swap_mode != "ExactIn" or swap_record.status is None:
+            return
+        owner = Pubkey.from_string(swap_record.user_pubkey)
+        mint = Pubkey.from_string(swap_record.output_mint)
+        if swap_record.status == TransactionStatus.SUCCESS:
+            self.add(owner, mint)
+        elif swap_record.status == TransactionStatus.FAILED:
+            self.discard(owner, mint)
+
+
+@cache
+def get_ata_cache() -> AtaExistenceCache:
+    """进程内共用的 ATA 存在性缓存"""
+    return AtaExistenceCache()
@@ -12,9 +12,12 @@ from solbot_common.utils.utils import get_async_client
 from solbot_db.redis import RedisClient
 from solders.signature import Signature  # type: ignore
 
+from trading.ata import get_ata_cache
 from trading.copytrade import CopyTradeProcessor
 from trading.executor import TradingExecutor
+from trading.reserves import get_reserve_mirror
 from trading.settlement import SwapSettlementProcessor
+from trading.warmup import warm_derivation_cache
 
 
 class Trading:
@@ -36,6 +39,9 @@ class Trading:
             self.swap_event_consumers.append(consumer)
 
         self.copytrade_processor = CopyTradeProcessor()
+        # Raydium AMM v4 池子储备镜像, 构建交易时不再查询 vault 余额
+        self.reserve_mirror = get_reserve_mirror()
+        self.ata_cache = get_ata_cache()
 
         self.swap_result_producer = SwapResultProducer(self.redis)
         # 添加任务池和信号量
@@ -91,6 +97,8 @@ class Trading:
             return await self._record_failed_swap(swap_event)
 
         swap_record = await self.swap_settlement_processor.process(sig, swap_event)
+        # 已确认的交易结果决定下次买入是否需要创建 ATA
+        self.ata_cache.observe(swap_record)
 
         swap_result = SwapResult(
             swap_event=swap_event,
@@ -122,6 +130,11 @@ class Trading:
         task.add_done_callback(self.task_pool.discard)
 
     async def start(self):
+        try:
+            await warm_derivation_cache()
+        except Exception as e:
+            logger.warning(f"Failed to warm derivation cache: {e}")
+        await self.reserve_mirror.start()
         processor_task = asyncio.create_task(self.copytrade_processor.start())
         # 添加任务完成回调以处理可能的异常
         processor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
@@ -141,6 +154,7 @@ class Trading:
         if self.task_pool:
             logger.info("Waiting for remaining tasks to complete...")
             await asyncio.gather(*self.task_pool, return_exceptions=True)
+        await self.reserve_mirror.stop()
         logger.info("All consumers stopped")
 
 
@@ -0,0 +1,375 @@
+"""Raydium AMM v4 池子储备镜像
+
+`RaydiumV4TransactionBuilder` 原先每次买卖都通过 `get_amm_v4_reserves` 查询两个 vault 的
+余额 (重复查询了两次), 并使用浮点数 `uiAmount` 计算 `minimum_amount_out`。
+
+`AmmV4ReserveMirror` 在内存中保存最近交易过的池子的 vault 余额:
+- 首次交易某个池子时通过一次 getMultipleAccounts 查询两个 vault, 之后通过 WebSocket
+  accountSubscribe 订阅 vault 的变化
+- 余额为整数 (最小单位), 并记录所在的 slot, 只接受 slot 不早于当前值的更新
+- 订阅生效并重新同步后, 余额由推送维持; 未订阅 (或连接断开) 的 vault 由后台定期批量
+  刷新, 距上次确认超过 max_age 的余额视为过期, 交易时重新查询
+- 池子数超过 max_pools 时取消最久未交易池子的订阅
+"""
+
+import asyncio
+import struct
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cache
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Processed
+from solana.rpc.websocket_api import SolanaWsClientProtocol, SubscriptionError, connect
+from solbot_common.config import settings
+from solbot_common.constants import WSOL
+from solbot_common.log import logger
+from solbot_common.types.raydium import AmmV4PoolKeys
+from solbot_common.utils import get_async_client
+from solders.account_decoder import UiAccountEncoding  # type: ignore
+from solders.commitment_config import CommitmentLevel  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.config import RpcAccountInfoConfig  # type: ignore
+from solders.rpc.requests import AccountSubscribe  # type: ignore
+from solders.rpc.responses import AccountNotification, SubscriptionResult  # type: ignore
+from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+
+# SPL Token 账户中 amount (u64) 的偏移: mint (32) + owner (32)
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+# Raydium AMM v4 的交易手续费 (bps)
+AMM_V4_FEE_BPS = 25
+# getMultipleAccounts 单次最多查询的账户数
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+
+def token_account_amount(data: bytes) -> int:
+    return struct.unpack_from("<Q", data, TOKEN_ACCOUNT_AMOUNT_OFFSET)[0]
+
+
+def amm_v4_amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    """恒定乘积公式计算输出量, 全部使用整数 (最小单位)"""
+    amount_in_with_fee = amount_in * (10_000 - AMM_V4_FEE_BPS)
+    return amount_in_with_fee * reserve_out // (reserve_in * 10_000 + amount_in_with_fee)
+
+
+def apply_slippage(amount_out: int, slippage_bps: int) -> int:
+    return amount_out * (10_000 - slippage_bps) // 10_000
+
+
+@dataclass
+class VaultBalance:
+    amount: int
+    slot: int
+    # 最近一次确认余额的时间 (time.monotonic)
+    confirmed_at: float
+
+
+@dataclass(frozen=True)
+class AmmV4Reserves:
+    """池子储备, 数量均为最小单位"""
+
+    token_reserve: int
+    sol_reserve: int
+    token_decimals: int
+    # 两个 vault 中较早的 slot
+    slot: int
+
+    def buy_amount_out(self, lamports_in: int) -> int:
+        return amm_v4_amount_out(lamports_in, self.sol_reserve, self.token_reserve)
+
+    def sell_amount_out(self, token_in: int) -> int:
+        return amm_v4_amount_out(token_in, self.token_reserve, self.sol_reserve)
+
+
+class AmmV4ReserveMirror:
+    """在内存中维护最近交易过的 AMM v4 池子储备
+
+    Args:
+        rpc_client: 查询 vault 余额的 RPC 客户端
+        websocket_url: accountSubscribe 使用的 WebSocket 端点, 为 None 时只定期刷新
+        max_pools: 最多跟踪的池子数
+        max_age: 未订阅的余额距上次确认的最长时间 (秒), 超过后交易时重新查询
+        refresh_interval: 后台刷新未订阅 vault 的间隔 (秒)
+        commitment: 查询与订阅使用的 commitment
+    """
+
+    def __init__(
+        self,
+        rpc_client: AsyncClient,
+        websocket_url: str | None = None,
+        max_pools: int = 100,
+        max_age: float = 2.0,
+        refresh_interval: float = 1.0,
+        commitment: Commitment = Processed,
+    ):
+        self.rpc_client = rpc_client
+        self.websocket_url = websocket_url
+        self.max_pools = max_pools
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.commitment = commitment
+        self.config = RpcAccountInfoConfig(
+            encoding=UiAccountEncoding.Base64,
+            commitment=CommitmentLevel.from_string(commitment),
+        )
+        # 池子 -> pool keys, 按最近交易时间排序
+        self.pools: OrderedDict[Pubkey, AmmV4PoolKeys] = OrderedDict()
+        self.balances: dict[Pubkey, VaultBalance] = {}
+        # vault -> 订阅 ID
+        self.subscription_ids: dict[Pubkey, int] = {}
+        self.vault_of_subscription: dict[int, Pubkey] = {}
+        # 请求 ID -> 等待订阅响应的 vault
+        self.pending: dict[int, Pubkey] = {}
+        # 订阅生效后尚未重新查询的 vault, 订阅生效前的变化不会推送
+        self.unsynced: set[Pubkey] = set()
+        self.websocket: SolanaWsClientProtocol | None = None
+        self.hits = 0
+        self.misses = 0
+        self.is_running = False
+        self._tasks: list[asyncio.Task] = []
+
+    def vaults(self) -> set[Pubkey]:
+        return {
+            vault
+            for pool_keys in self.pools.values()
+            for vault in (pool_keys.base_vault, pool_keys.quote_vault)
+        }
+
+    def update(self, vault: Pubkey, amount: int, slot: int) -> None:
+        """记录 vault 余额, 早于当前 slot 的更新会被忽略"""
+        balance = self.balances.get(vault)
+        if balance is not None and slot < balance.slot:
+            return
+        self.balances[vault] = VaultBalance(amount, slot, time.monotonic())
+
+    def is_fresh(self, vault: Pubkey) -> bool:
+        balance = self.balances.get(vault)
+        if balance is None:
+            return False
+        if vault in self.subscription_ids and vault not in self.unsynced:
+            return True
+        return time.monotonic() - balance.confirmed_at <= self.max_age
+
+    def reserves_of(self, pool_keys: AmmV4PoolKeys) -> AmmV4Reserves | None:
+        """内存中的储备, 任一 vault 没有余额或已过期时返回 None"""
+        if not (self.is_fresh(pool_keys.base_vault) and self.is_fresh(pool_keys.quote_vault)):
+            return None
+        return self._reserves(pool_keys)
+
+    def _reserves(self, pool_keys: AmmV4PoolKeys) -> AmmV4Reserves | None:
+        base = self.balances.get(pool_keys.base_vault)
+        quote = self.balances.get(pool_keys.quote_vault)
+        if base is None or quote is None:
+            return None
+        if pool_keys.base_mint == WSOL:
+            token, sol, token_decimals = quote, base, pool_keys.quote_decimals
+        else:
+            token, sol, token_decimals = base, quote, pool_keys.base_decimals
+        return AmmV4Reserves(
+            token_reserve=token.amount,
+            sol_reserve=sol.amount,
+            token_decimals=token_decimals,
+            slot=min(base.slot, quote.slot),
+        )
+
+    async def get_reserves(self, pool_keys: AmmV4PoolKeys) -> AmmV4Reserves:
+        """获取池子储备, 内存中没有可用的余额时查询 RPC, 并开始跟踪该池子"""
+        reserves = self.reserves_of(pool_keys)
+        if reserves is not None:
+            self.hits += 1
+            self.track(pool_keys)
+            return reserves
+
+        self.misses += 1
+        await self.fetch([pool_keys.base_vault, pool_keys.quote_vault])
+        self.track(pool_keys)
+        reserves = self._reserves(pool_keys)
+        if reserves is None:
+            raise ValueError(f"Failed to fetch reserves of pool {pool_keys.amm_id}")
+        return reserves
+
+    async def fetch(self, vaults: Iterable[Pubkey]) -> None:
+        """批量查询 vault 余额"""
+        vaults = list(vaults)
+        for start in range(0, len(vaults), MAX_ACCOUNTS_PER_REQUEST):
+            chunk = vaults[start : start + MAX_ACCOUNTS_PER_REQUEST]
+            resp = await self.rpc_client.get_multiple_accounts(
+                chunk, commitment=self.commitment, encoding="base64"
+            )
+            slot = resp.context.slot
+            for vault, account in zip(chunk, resp.value, strict=True):
+                if account is None:
+                    logger.warning(f"Vault account not found: {vault}")
+                    continue
+                self.update(vault, token_account_amount(bytes(account.data)), slot)
+                self.unsynced.discard(vault)
+
+    def track(self, pool_keys: AmmV4PoolKeys) -> None:
+        """标记池子为最近交易, 新池子的 vault 会被订阅"""
+        if pool_keys.amm_id in self.pools:
+            self.pools.move_to_end(pool_keys.amm_id)
+            return
+        self.pools[pool_keys.amm_id] = pool_keys
+        evicted = []
+        while len(self.pools) > self.max_pools:
+            _, old = self.pools.popitem(last=False)
+            evicted.extend([old.base_vault, old.quote_vault])
+        # 多个池子可能共用 vault (例如 WSOL), 仍被跟踪的 vault 不取消订阅
+        tracked = self.vaults()
+        evicted = [vault for vault in evicted if vault not in tracked]
+        for vault in evicted:
+            self.balances.pop(vault, None)
+            self.unsynced.discard(vault)
+        if self.websocket is not None:
+            self._spawn(self._subscribe([pool_keys.base_vault, pool_keys.quote_vault]))
+            self._spawn(self._unsubscribe(evicted))
+        else:
+            for vault in evicted:
+                self.subscription_ids.pop(vault, None)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.append(task)
+        task.add_done_callback(self._tasks.remove)
+
+    async def _subscribe(self, vaults: Iterable[Pubkey]) -> None:
+        """连续发送 accountSubscribe 请求, 根据请求 ID 将订阅响应对应到 vault"""
+        websocket = self.websocket
+        if websocket is None:
+            return
+        pending = set(self.pending.values())
+        for vault in vaults:
+            if vault in self.subscription_ids or vault in pending:
+                continue
+            request_id = websocket.increment_counter_and_get_id()
+            self.pending[request_id] = vault
+            await websocket.send_data(AccountSubscribe(vault, self.config, request_id))
+
+    async def _unsubscribe(self, vaults: Iterable[Pubkey]) -> None:
+        for vault in vaults:
+            subscription_id = self.subscription_ids.pop(vault, None)
+            if subscription_id is None:
+                continue
+            self.vault_of_subscription.pop(subscription_id, None)
+            if self.websocket is not None:
+                await self.websocket.account_unsubscribe(subscription_id)
+
+    async def on_subscription_result(self, message: SubscriptionResult) -> None:
+        vault = self.pending.pop(message.id, None)
+        if vault is None:
+            return
+        if vault not in self.vaults():
+            if self.websocket is not None:
+                await self.websocket.account_unsubscribe(message.result)
+            return
+        self.subscription_ids[vault] = message.result
+        self.vault_of_subscription[message.result] = vault
+        self.unsynced.add(vault)
+
+    def on_account_notification(self, message: AccountNotification) -> None:
+        vault = self.vault_of_subscription.get(message.subscription)
+        if vault is None:
+            return
+        result = message.result
+        self.update(vault, token_account_amount(bytes(result.value.data)), result.context.slot)
+
+    def _reset_subscriptions(self) -> None:
+        self.subscription_ids.clear()
+        self.vault_of_subscription.clear()
+        self.pending.clear()
+        self.unsynced.clear()
+
+    async def _run_websocket(self) -> None:
+        assert self.websocket_url is not None
+        while self.is_running:
+            try:
+                async with connect(
+                    self.websocket_url, ping_timeout=30, ping_interval=20, close_timeout=20
+                ) as websocket:
+                    logger.info("Reserve mirror connected to Solana WebSocket RPC")
+                    self.websocket = websocket
+                    await self._subscribe(self.vaults())
+                    while self.is_running:
+                        try:
+                            messages = await websocket.recv()
+                        except SubscriptionError as e:
+                            logger.warning(f"Reserve mirror subscription failed: {e}")
+                            self.pending.pop(e.subscription.id, None)
+                            continue
+                        for message in messages:
+                            if isinstance(message, SubscriptionResult):
+                                await self.on_subscription_result(message)
+                            elif isinstance(message, AccountNotification):
+                                self.on_account_notification(message)
+            except asyncio.CancelledError:
+                break
+            except (ConnectionClosedError, ConnectionClosedOK) as e:
+                logger.warning(f"Reserve mirror WebSocket closed: {e}")
+            except Exception as e:
+                logger.exception(f"Reserve mirror WebSocket error: {e}")
+            finally:
+                self.websocket = None
+                self._reset_subscriptions()
+            if self.is_running:
+                await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self) -> None:
+        """查询尚未同步或即将过期的 vault"""
+        now = time.monotonic()
+        vaults = []
+        for vault in self.vaults():
+            if vault in self.unsynced:
+                vaults.append(vault)
+            elif vault not in self.subscription_ids:
+                balance = self.balances.get(vault)
+                if balance is None or now - balance.confirmed_at >= self.refresh_interval:
+                    vaults.append(vault)
+        if vaults:
+            await self.fetch(vaults)
+
+    async def _run_refresh(self) -> None:
+        while self.is_running:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Failed to refresh pool reserves: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def stats(self) -> dict:
+        return {
+            "pools": len(self.pools),
+            "subscribed": len(self.subscription_ids),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def start(self) -> None:
+        self.is_running = True
+        self._spawn(self._run_refresh())
+        if self.websocket_url is not None:
+            self._spawn(self._run_websocket())
+
+    async def stop(self) -> None:
+        self.is_running = False
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@cache
+def get_reserve_mirror() -> AmmV4ReserveMirror:
+    """进程内共用的储备镜像"""
+    config = settings.trading.reserve_mirror
+    websocket_url = settings.rpc.rpc_url.replace("https://", "wss://") if config.subscribe else None
+    return AmmV4ReserveMirror(
+        get_async_client(),
+        websocket_url,
+        max_pools=config.max_pools,
+        max_age=config.max_age,
+        refresh_interval=config.refresh_interval,
+    )
@@ -1,11 +1,76 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from typing import Any
 
 from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
+from typing_extensions import Self
 
 from trading.swap import SwapDirection, SwapInType
 
+# getMultipleAccounts 单次最多查询的账户数
+MAX_MULTIPLE_ACCOUNTS = 100
+
+
+class PrefetchPlan:
+    """构建交易前的预取计划
+
+    构建器先声明组装指令所需的全部独立输入, 再一次性并发读取:
+    - `account`: 需要读取的链上账户, 所有账户合并为一次 getMultipleAccounts
+    - `call`: 其他独立的异步读取, 例如 blockhash、租金、缓存
+
+    读取耗时为其中最慢的一项, 而不是逐个等待的总和。
+
+    Examples:
+        >>> plan = (
+        ...     PrefetchPlan()
+        ...     .account("bonding_curve", bonding_curve)
+        ...     .call("blockhash", get_latest_blockhash)
+        ... )
+        >>> prefetched = await plan.execute(rpc_client)
+        >>> prefetched["bonding_curve"]  # Account | None
+    """
+
+    def __init__(self) -> None:
+        self.accounts: dict[str, Pubkey] = {}
+        self.calls: dict[str, Callable[[], Awaitable[Any]]] = {}
+
+    def _check_name(self, name: str) -> None:
+        if name in self.accounts or name in self.calls:
+            raise ValueError(f"Duplicate prefetch name: {name}")
+
+    def account(self, name: str, pubkey: Pubkey) -> Self:
+        """读取账户, 结果为 `solders.account.Account`, 账户不存在时为 None"""
+        self._check_name(name)
+        if len(self.accounts) >= MAX_MULTIPLE_ACCOUNTS:
+            raise ValueError(f"Cannot prefetch more than {MAX_MULTIPLE_ACCOUNTS} accounts")
+        self.accounts[name] = pubkey
+        return self
+
+    def call(self, name: str, func: Callable[..., Awaitable[Any]], *args: Any) -> Self:
+        """执行 `func(*args)`, 结果为其返回值"""
+        self._check_name(name)
+        self.calls[name] = lambda: func(*args)
+        return self
+
+    async def execute(self, client: AsyncClient) -> dict[str, Any]:
+        """并发执行所有读取, 任意一项失败时抛出其异常"""
+        names = list(self.calls)
+        aws = [self.calls[name]() for name in names]
+        if self.accounts:
+            aws.append(
+                client.get_multiple_accounts(list(self.accounts.values()), encoding="base64")
+            )
+        results = await asyncio.gather(*aws)
+
+        prefetched = dict(zip(names, results[: len(names)], strict=True))
+        if self.accounts:
+            prefetched.update(zip(self.accounts, results[-1].value, strict=True))
+        return prefetched
+
 
 class TransactionBuilder(ABC):
     """交易构建器的抽象基类"""
@@ -13,6 +78,10 @@ class TransactionBuilder(ABC):
     def __init__(self, rpc_client: AsyncClient):
         self.rpc_client = rpc_client
 
+    async def prefetch(self, plan: PrefetchPlan) -> dict[str, Any]:
+        """执行预取计划"""
+        return await plan.execute(self.rpc_client)
+
     @abstractmethod
     async def build_swap_transaction(
         self,
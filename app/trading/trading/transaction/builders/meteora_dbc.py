@@ -2,7 +2,7 @@ import base64
 import os
 import struct
 
-from solbot_cache import AccountAmountCache, MintAccountCache, get_min_balance_rent
+from solbot_cache import MintAccountCache, get_latest_blockhash, get_min_balance_rent
 from solbot_common.constants import ( METEORA_DBC_PROGRAM,
                                      ACCOUNT_LAYOUT_LEN,
                                      POOL_AUTHORITY,
@@ -13,11 +13,10 @@ from solbot_common.constants import ( METEORA_DBC_PROGRAM,
 from solbot_common.layouts.meteora_dbc import (
     PoolState,
     PoolConfig,
-    fetch_pool_state,
     fetch_pool_config,
+    fetch_pool_state_by_base_mint,
     swap_base_to_quote, 
     swap_quote_to_base,
-    fetch_pool_from_rpc
 )
 from solbot_common.log import logger
 from solders.keypair import Keypair  # type: ignore
@@ -25,23 +24,42 @@ from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 from spl.token.instructions import (
     InitializeAccountParams,
-    create_associated_token_account,
     initialize_account,
     CloseAccountParams, 
-    close_account,
-    get_associated_token_address)
+    close_account)
+from solbot_common.utils.pda import get_associated_token_address
 from solders.instruction import AccountMeta, Instruction  # type: ignore
 from solders.system_program import CreateAccountWithSeedParams, create_account_with_seed  # type: ignore
 
+from trading.ata import get_ata_cache
+from trading.reserves import token_account_amount
 from trading.swap import SwapDirection, SwapInType
 from trading.tx import build_transaction
-from trading.utils import (has_ata, max_amount_with_slippage,
-                           min_amount_with_slippage)
+from trading.utils import max_amount_with_slippage, min_amount_with_slippage
 
-from .base import TransactionBuilder
+from .base import PrefetchPlan, TransactionBuilder
 
 
 class MeteoraDBCTransactionBuilder(TransactionBuilder):
+    def prefetch_plan(
+        self,
+        swap_direction: SwapDirection,
+        token_address: str,
+        token_in: Pubkey,
+        in_ata: Pubkey,
+    ) -> PrefetchPlan:
+        """池子状态、租金、blockhash (卖出时还有持仓 ATA 与 mint 信息) 并发读取"""
+        plan = (
+            PrefetchPlan()
+            .call("pool_state", fetch_pool_state_by_base_mint, self.rpc_client, token_address)
+            .call("rent", get_min_balance_rent)
+            .call("blockhash", get_latest_blockhash)
+        )
+        if swap_direction == SwapDirection.Sell:
+            plan.account("in_ata", in_ata)
+            plan.call("in_mint", MintAccountCache().get_mint_account, token_in)
+        return plan
+
     async def build_swap_transaction(
         self,
         keypair: Keypair,
@@ -72,9 +90,17 @@ class MeteoraDBCTransactionBuilder(TransactionBuilder):
 
         logger.info(f"Starting buy transaction for pool: {token_address}")
 
-        pool_str = await fetch_pool_from_rpc(self.rpc_client, token_address)
+        in_ata = get_associated_token_address(owner=owner, mint=token_in)
+        out_ata = get_associated_token_address(owner=owner, mint=token_out)
+
+        # 池子状态与租金、blockhash 等独立读取并发完成, 只有 config 依赖池子状态
         logger.info("Fetching pool state...")
-        pool_state: PoolState = await fetch_pool_state(self.rpc_client, pool_str)
+        prefetched = await self.prefetch(
+            self.prefetch_plan(swap_direction, token_address, token_in, in_ata)
+        )
+        pool_state: PoolState | None = prefetched["pool_state"]
+        if pool_state is None:
+            raise ValueError(f"pool not found for {token_address}")
         logger.info("Fetching pool config...")
         pool_config: PoolConfig = await fetch_pool_config(self.rpc_client, pool_state.config)
         quote_token_decimals = pool_config.token_decimal
@@ -99,7 +125,7 @@ class MeteoraDBCTransactionBuilder(TransactionBuilder):
             seed,
             TOKEN_PROGRAM_ID,
         )
-        quote_rent = await get_min_balance_rent()
+        quote_rent = prefetched["rent"]
 
         create_quote_token_account_ix = create_account_with_seed(
             CreateAccountWithSeedParams(
@@ -121,9 +147,6 @@ class MeteoraDBCTransactionBuilder(TransactionBuilder):
             )
         )
 
-        in_ata = get_associated_token_address(owner=owner, mint=token_in)
-        out_ata = get_associated_token_address(owner=owner, mint=token_out)
-
         create_instruction = None
         close_instruction = None
         if swap_direction == SwapDirection.Buy:
@@ -136,13 +159,8 @@ class MeteoraDBCTransactionBuilder(TransactionBuilder):
                 curve=curve
             )
             logger.info(f"Quote→Base estimate: {estimate}")
-            # 如果 ata 账户不存在，需要创建
-            if not await has_ata(
-                self.rpc_client,
-                owner,
-                token_out,
-            ):
-                create_instruction = create_associated_token_account(owner, owner, token_out)
+            # 除非已确认 ata 存在, 否则使用幂等指令创建, 不再查询 RPC
+            create_instruction = get_ata_cache().create_instruction(owner, token_out)
            
             amount_specified = int(estimate["outputAmount"])
             min_sol_cost = min_amount_with_slippage(amount_specified, slippage_bps)
@@ -165,8 +183,10 @@ class MeteoraDBCTransactionBuilder(TransactionBuilder):
                 AccountMeta(METEORA_DBC_PROGRAM, False, False),
             ]
         elif swap_direction == SwapDirection.Sell:
-            in_amount = await AccountAmountCache().get_amount(in_ata)
-            in_mint = await MintAccountCache().get_mint_account(token_in)
+            if prefetched["in_ata"] is None:
+                raise Exception("in_account not found")
+            in_amount = token_account_amount(bytes(prefetched["in_ata"].data))
+            in_mint = prefetched["in_mint"]
             if in_mint is None:
                 raise Exception("in_mint not found")
            
@@ -180,6 +200,7 @@ class MeteoraDBCTransactionBuilder(TransactionBuilder):
                 if amount_in_pct == 1:
                     # sell all, close ata
                     logger.info(f"Sell all, will be close ATA for mint {token_in}")
+                    get_ata_cache().discard(owner, token_in)
                     close_instruction = close_account(
                         CloseAccountParams(
                             program_id=program_id,
@@ -263,6 +284,7 @@ class MeteoraDBCTransactionBuilder(TransactionBuilder):
         return await build_transaction(
             keypair=keypair,
             instructions=instructions,
+            recent_blockhash=prefetched["blockhash"][0],
             priority_fee=priority_fee,
             use_jito=use_jito,
         )
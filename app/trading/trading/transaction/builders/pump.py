@@ -1,30 +1,52 @@
-from solbot_cache import AccountAmountCache, MintAccountCache
+from solbot_cache import MintAccountCache, get_latest_blockhash
 from solbot_common.constants import (ASSOCIATED_TOKEN_PROGRAM, PUMP_BUY_METHOD,
                                      PUMP_FUN_ACCOUNT, PUMP_FUN_PROGRAM,
                                      PUMP_GLOBAL_ACCOUNT, PUMP_SELL_METHOD,
                                      RENT_PROGRAM_ID, SOL_DECIMAL,
                                      SYSTEM_PROGRAM_ID, TOKEN_PROGRAM_ID, WSOL)
-from solbot_common.IDL.pumpfun import PumpFunInterface
+from solbot_common.IDL.pumpfun import get_instruction_coder
 from solbot_common.log import logger
-from solbot_common.utils.utils import (get_bonding_curve_account, get_bonding_curve_pda_creator_vault,
-                                       get_global_account, get_global_volume_accumulator_pda, get_user_volume_accumulator_pda)
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.layouts.global_account import GlobalAccount
+from solbot_common.utils.utils import (get_bonding_curve_pda, get_bonding_curve_pda_creator_vault,
+                                       get_global_volume_accumulator_pda, get_user_volume_accumulator_pda)
 from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
-from spl.token.instructions import (CloseAccountParams, close_account,
-                                    create_associated_token_account,
-                                    get_associated_token_address)
+from solbot_common.utils.pda import get_associated_token_address
+from spl.token.instructions import CloseAccountParams, close_account
+from trading.ata import get_ata_cache
 from trading.exceptions import BondingCurveNotFound
+from trading.reserves import token_account_amount
 from trading.swap import SwapDirection, SwapInType
 from trading.tx import build_transaction
-from trading.utils import (has_ata, max_amount_with_slippage,
-                           min_amount_with_slippage)
+from trading.utils import max_amount_with_slippage, min_amount_with_slippage
 
-from .base import TransactionBuilder
+from .base import PrefetchPlan, TransactionBuilder
 
 
 # Reference: https://github.com/wisarmy/raytx/blob/main/src/pump.rs
 class PumpTransactionBuilder(TransactionBuilder):
+    def prefetch_plan(
+        self,
+        swap_direction: SwapDirection,
+        bonding_curve: Pubkey,
+        token_in: Pubkey,
+        in_ata: Pubkey,
+    ) -> PrefetchPlan:
+        """bonding curve、global 账户 (卖出时还有持仓 ATA) 合并为一次 getMultipleAccounts,
+        与 blockhash、mint 信息并发读取"""
+        plan = (
+            PrefetchPlan()
+            .account("bonding_curve", bonding_curve)
+            .account("global", PUMP_GLOBAL_ACCOUNT)
+            .call("blockhash", get_latest_blockhash)
+        )
+        if swap_direction == SwapDirection.Sell:
+            plan.account("in_ata", in_ata)
+            plan.call("in_mint", MintAccountCache().get_mint_account, token_in)
+        return plan
+
     async def build_swap_transaction(
         self,
         keypair: Keypair,
@@ -56,35 +78,36 @@ class PumpTransactionBuilder(TransactionBuilder):
             raise ValueError("swap_direction must be buy or sell")
 
         pump_program = PUMP_FUN_PROGRAM
-        result = await get_bonding_curve_account(self.rpc_client, mint, pump_program)
-        if result is None:
+        bonding_curve, _ = get_bonding_curve_pda(mint, pump_program)
+        associated_bonding_curve = get_associated_token_address(bonding_curve, mint)
+        in_ata = get_associated_token_address(owner=owner, mint=token_in)
+        out_ata = get_associated_token_address(owner=owner, mint=token_out)
+
+        # 所有独立的读取并发完成后再组装指令
+        plan = self.prefetch_plan(swap_direction, bonding_curve, token_in, in_ata)
+        prefetched = await self.prefetch(plan)
+        if prefetched["bonding_curve"] is None:
             raise BondingCurveNotFound("bonding curve account not found")
-        bonding_curve, associated_bonding_curve, bonding_curve_account = result
+        bonding_curve_account = BondingCurveAccount(bytes(prefetched["bonding_curve"].data))
         bonding_curve_pda,bump = get_bonding_curve_pda_creator_vault(bonding_curve_account.creator, pump_program)
-        global_account = await get_global_account(self.rpc_client, pump_program)
-        if global_account is None:
+        if prefetched["global"] is None:
             raise ValueError("global account not found")
+        global_account = GlobalAccount(bytes(prefetched["global"].data))
 
         fee_recipient = global_account.fee_recipient
 
-        in_ata = get_associated_token_address(owner=owner, mint=token_in)
-        out_ata = get_associated_token_address(owner=owner, mint=token_out)
-
         create_instruction = None
         close_instruction = None
         if swap_direction == SwapDirection.Buy:
-            # 如果 ata 账户不存在，需要创建
-            if not await has_ata(
-                self.rpc_client,
-                owner,
-                token_out,
-            ):
-                create_instruction = create_associated_token_account(owner, owner, token_out)
+            # 除非已确认 ata 存在, 否则使用幂等指令创建, 不再查询 RPC
+            create_instruction = get_ata_cache().create_instruction(owner, token_out)
 
             amount_specified = int(ui_amount * SOL_DECIMAL)
         elif swap_direction == SwapDirection.Sell:
-            in_amount = await AccountAmountCache().get_amount(in_ata)
-            in_mint = await MintAccountCache().get_mint_account(token_in)
+            if prefetched["in_ata"] is None:
+                raise Exception("in_account not found")
+            in_amount = token_account_amount(bytes(prefetched["in_ata"].data))
+            in_mint = prefetched["in_mint"]
             if in_mint is None:
                 raise Exception("in_mint not found")
 
@@ -96,6 +119,7 @@ class PumpTransactionBuilder(TransactionBuilder):
                 if amount_in_pct == 1:
                     # sell all, close ata
                     logger.info(f"Sell all, will be close ATA for mint {token_in}")
+                    get_ata_cache().discard(owner, token_in)
                     close_instruction = close_account(
                         CloseAccountParams(
                             program_id=program_id,
@@ -174,12 +198,8 @@ class PumpTransactionBuilder(TransactionBuilder):
         )
 
         instructions = []
-        pumpfun = PumpFunInterface(keypair, self.rpc_client)
-        pump_method = pumpfun.program.methods[swap_direction]
-        build_swap_instruction = (
-            pump_method.args([token_amount, sol_amount_threshold])
-            .accounts(input_accounts)
-            .instruction()
+        build_swap_instruction = get_instruction_coder().encode(
+            swap_direction, (token_amount, sol_amount_threshold), input_accounts
         )
         logger.debug(f"Build swap input accounts: {input_accounts}")
 
@@ -201,6 +221,7 @@ class PumpTransactionBuilder(TransactionBuilder):
         return await build_transaction(
             keypair=keypair,
             instructions=instructions,
+            recent_blockhash=prefetched["blockhash"][0],
             priority_fee=priority_fee,
             use_jito=use_jito,
         )
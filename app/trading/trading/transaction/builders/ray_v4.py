@@ -1,17 +1,12 @@
+import asyncio
 import base64
 import os
 
 from loguru import logger
-from solana.rpc.commitment import Processed
-from solana.rpc.types import TokenAccountOpts
-from solbot_cache import get_min_balance_rent
+from solbot_cache import get_latest_blockhash, get_min_balance_rent
 from solbot_cache.rayidum import get_preferred_pool
 from solbot_common.constants import ACCOUNT_LAYOUT_LEN, SOL_DECIMAL, TOKEN_PROGRAM_ID, WSOL
-from solbot_common.utils.pool import (
-    AmmV4PoolKeys,
-    get_amm_v4_reserves,
-    make_amm_v4_swap_instruction,
-)
+from solbot_common.utils.pool import AmmV4PoolKeys, make_amm_v4_swap_instruction
 from solbot_common.utils.utils import get_associated_token_address, get_token_balance
 from solders.instruction import Instruction  # type: ignore[reportMissingModuleSource]
 from solders.keypair import Keypair  # type: ignore[reportMissingModuleSource]
@@ -25,14 +20,15 @@ from spl.token.instructions import (
     CloseAccountParams,  # type: ignore
     InitializeAccountParams,
     close_account,
-    create_associated_token_account,
     initialize_account,
 )
 
+from trading.ata import get_ata_cache
+from trading.reserves import apply_slippage, get_reserve_mirror
 from trading.swap import SwapDirection, SwapInType
 from trading.tx import build_transaction
 
-from .base import TransactionBuilder
+from .base import PrefetchPlan, TransactionBuilder
 
 
 class RaydiumV4TransactionBuilder(TransactionBuilder):
@@ -56,8 +52,15 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         """
         logger.info(f"构建购买交易: {token_address}, SOL输入: {sol_in}, 滑点: {slippage_bps}bps")
 
+        # 池子信息与租金并发读取
+        prefetched = await self.prefetch(
+            PrefetchPlan()
+            .call("pool_data", get_preferred_pool, token_address)
+            .call("rent", get_min_balance_rent)
+        )
+
         # 获取池子信息
-        pool_data = await get_preferred_pool(token_address)
+        pool_data = prefetched["pool_data"]
         if pool_data is None:
             raise ValueError(f"未找到代币 {token_address} 的交易池")
 
@@ -74,46 +77,27 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         # 计算交易金额
         amount_in = int(sol_in * SOL_DECIMAL)
 
-        # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
+        # 获取池子储备量 (优先使用内存中的储备镜像)
+        reserves = await get_reserve_mirror().get_reserves(pool_keys)
 
-        # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_sol_in = sol_in * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_quote_reserve = quote_reserve + effective_sol_in
-        new_base_reserve = constant_product / new_quote_reserve
-        amount_out = base_reserve - new_base_reserve
-
-        # 应用滑点
-        slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
-        minimum_amount_out = int(amount_out * slippage_adjustment * (10**token_decimal))
+        # 计算预期输出量并应用滑点, 全部使用整数 (最小单位)
+        amount_out = reserves.buy_amount_out(amount_in)
+        minimum_amount_out = apply_slippage(amount_out, slippage_bps)
 
         logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
 
-        # 检查代币账户是否存在
-        token_account = None
-        token_accounts = await self.rpc_client.get_token_accounts_by_owner(
-            payer_keypair.pubkey(), TokenAccountOpts(mint=token_mint), Processed
+        # 除非已确认 ATA 存在, 否则使用幂等指令创建, 不再查询 RPC
+        token_account = get_associated_token_address(payer_keypair.pubkey(), token_mint)
+        create_token_account_ix = get_ata_cache().create_instruction(
+            payer_keypair.pubkey(), token_mint
         )
 
-        create_token_account_ix = None
-        if token_accounts.value:
-            token_account = token_accounts.value[0].pubkey
-            logger.info(f"找到现有代币账户: {token_account}")
-        else:
-            token_account = get_associated_token_address(payer_keypair.pubkey(), token_mint)
-            create_token_account_ix = create_associated_token_account(
-                payer_keypair.pubkey(), payer_keypair.pubkey(), token_mint
-            )
-            logger.info(f"创建新的关联代币账户: {token_account}")
-
         # 创建临时WSOL账户
         seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
         wsol_token_account = Pubkey.create_with_seed(payer_keypair.pubkey(), seed, TOKEN_PROGRAM_ID)
 
         # 获取租金豁免所需的最小余额
-        balance_needed = await get_min_balance_rent()
+        balance_needed = prefetched["rent"]
 
         # 创建WSOL账户指令
         create_wsol_account_ix = create_account_with_seed(
@@ -205,8 +189,19 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             f"构建卖出交易: {token_address}, 输入: {ui_amount}{in_type.value}, 滑点: {slippage_bps}bps"
         )
 
+        # 池子信息、租金与代币余额并发读取
+        token_account = get_associated_token_address(
+            payer_keypair.pubkey(), Pubkey.from_string(token_address)
+        )
+        prefetched = await self.prefetch(
+            PrefetchPlan()
+            .call("pool_data", get_preferred_pool, token_address)
+            .call("rent", get_min_balance_rent)
+            .call("token_balance", get_token_balance, token_account, self.rpc_client)
+        )
+
         # 获取池子信息
-        pool_data = await get_preferred_pool(token_address)
+        pool_data = prefetched["pool_data"]
         if pool_data is None:
             raise ValueError(f"未找到代币 {token_address} 的交易池")
 
@@ -220,11 +215,8 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         # 确定代币铸币厂
         token_mint = pool_keys.base_mint if pool_keys.base_mint != WSOL else pool_keys.quote_mint
 
-        # 获取代币账户
-        token_account = get_associated_token_address(payer_keypair.pubkey(), token_mint)
-
         # 获取代币余额
-        token_balance = await get_token_balance(token_account, self.rpc_client)
+        token_balance = prefetched["token_balance"]
         if token_balance is None or token_balance == 0:
             raise ValueError(f"没有可用的代币余额: {token_mint}")
 
@@ -236,23 +228,15 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             sell_amount = ui_amount
             logger.info(f"卖出数量: {sell_amount}")
 
-        # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
-
-        # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_token_in = sell_amount * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_base_reserve = base_reserve + effective_token_in
-        new_quote_reserve = constant_product / new_base_reserve
-        amount_out = quote_reserve - new_quote_reserve
-
-        # 应用滑点
-        slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
-        minimum_amount_out = int(amount_out * slippage_adjustment * SOL_DECIMAL)
+        # 获取池子储备量 (优先使用内存中的储备镜像)
+        reserves = await get_reserve_mirror().get_reserves(pool_keys)
 
         # 计算输入金额
-        amount_in = int(sell_amount * (10**token_decimal))
+        amount_in = int(sell_amount * (10**reserves.token_decimals))
+
+        # 计算预期输出量并应用滑点, 全部使用整数 (最小单位)
+        amount_out = reserves.sell_amount_out(amount_in)
+        minimum_amount_out = apply_slippage(amount_out, slippage_bps)
 
         logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
 
@@ -261,7 +245,7 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         wsol_token_account = Pubkey.create_with_seed(payer_keypair.pubkey(), seed, TOKEN_PROGRAM_ID)
 
         # 获取租金豁免所需的最小余额
-        balance_needed = await get_min_balance_rent()
+        balance_needed = prefetched["rent"]
 
         # 创建WSOL账户指令
         create_wsol_account_ix = create_account_with_seed(
@@ -325,6 +309,7 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
                 )
             )
             instructions.append(close_token_account_ix)
+            get_ata_cache().discard(payer_keypair.pubkey(), token_mint)
 
         return instructions
 
@@ -358,7 +343,7 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             raise ValueError("swap_direction must be buy or sell")
 
         if swap_direction == SwapDirection.Buy:
-            instructions = await self.build_buy_instructions(
+            build_instructions = self.build_buy_instructions(
                 payer_keypair=keypair,
                 token_address=token_address,
                 sol_in=ui_amount,
@@ -368,7 +353,7 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             if in_type is None:
                 raise ValueError("in_type must be pct or qty")
 
-            instructions = await self.build_sell_instructions(
+            build_instructions = self.build_sell_instructions(
                 payer_keypair=keypair,
                 token_address=token_address,
                 ui_amount=ui_amount,
@@ -376,9 +361,15 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
                 in_type=in_type,
             )
 
+        # blockhash 与指令的读取并发进行
+        instructions, (recent_blockhash, _) = await asyncio.gather(
+            build_instructions, get_latest_blockhash()
+        )
+
         return await build_transaction(
             keypair=keypair,
             instructions=instructions,
             use_jito=use_jito,
             priority_fee=priority_fee,
+            recent_blockhash=recent_blockhash,
         )
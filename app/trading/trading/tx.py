@@ -7,6 +7,7 @@ from solbot_common.config import settings
 from solbot_common.constants import SOL_DECIMAL
 from solbot_common.log import logger
 from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
 from solders.keypair import Keypair  # type: ignore
 from solders.message import MessageV0  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
@@ -37,6 +38,7 @@ async def build_transaction(
     instructions: list,
     use_jito: bool | None = None,
     priority_fee: float | None = None,
+    recent_blockhash: Hash | None = None,
 ) -> VersionedTransaction:
     """Build transaction with instructions.
 
@@ -45,6 +47,7 @@ async def build_transaction(
         instructions (list): List of instructions to include in the transaction
         use_jito (bool): Whether to use Jito or not
         priority_fee (float): Priority fee
+        recent_blockhash (Hash): Prefetched blockhash, fetched from cache if not provided
 
     Returns:
         VersionedTransaction: The built transaction
@@ -81,7 +84,8 @@ async def build_transaction(
     instructions.insert(1, set_compute_unit_price(unit_price))
 
     # init tx
-    recent_blockhash, _ = await get_latest_blockhash()
+    if recent_blockhash is None:
+        recent_blockhash, _ = await get_latest_blockhash()
 
     message = MessageV0.try_compile(
         payer=keypair.pubkey(),
@@ -1,6 +1,6 @@
 from solana.rpc.async_api import AsyncClient
+from solbot_common.utils.pda import get_associated_token_address
 from solders.pubkey import Pubkey  # type: ignore
-from spl.token.instructions import get_associated_token_address
 
 
 async def has_ata(client: AsyncClient, wallet: Pubkey, mint: Pubkey) -> bool:
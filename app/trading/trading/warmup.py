@@ -0,0 +1,54 @@
+"""启动时预热地址推导缓存
+
+跟单时需要推导的地址大多可以提前确定:
+- 每个跟单钱包的 Pump 交易量累加器 PDA 与 WSOL ATA
+- 跟单钱包买入过的代币的 ATA (卖出时使用)
+
+启动时推导一次并写入 `derivation_cache`, 之后的交易只需查表。
+"""
+
+from solbot_common.constants import PUMP_FUN_PROGRAM, WSOL
+from solbot_common.log import logger
+from solbot_common.models.swap_record import SwapRecord, TransactionStatus
+from solbot_common.models.tg_bot.copytrade import CopyTrade
+from solbot_common.utils.pda import derivation_cache, get_associated_token_address
+from solbot_common.utils.utils import (
+    get_global_volume_accumulator_pda,
+    get_user_volume_accumulator_pda,
+)
+from solbot_db.session import NEW_ASYNC_SESSION, provide_session
+from solders.pubkey import Pubkey  # type: ignore
+from sqlmodel import select
+
+
+@provide_session
+async def warm_derivation_cache(limit: int = 10_000, *, session=NEW_ASYNC_SESSION) -> None:
+    """推导跟单钱包及其持仓代币的地址
+
+    Args:
+        limit: 最多读取的最近买入记录数
+    """
+    stmt = select(CopyTrade.owner).where(CopyTrade.active == True).distinct()
+    followers = (await session.execute(stmt)).scalars().all()
+
+    stmt = (
+        select(SwapRecord.user_pubkey, SwapRecord.output_mint)
+        .where(SwapRecord.swap_mode == "ExactIn")
+        .where(SwapRecord.status == TransactionStatus.SUCCESS)
+        .order_by(SwapRecord.id.desc())  # type: ignore
+        .limit(limit)
+    )
+    holdings = set((await session.execute(stmt)).all())
+
+    get_global_volume_accumulator_pda(PUMP_FUN_PROGRAM)
+    for follower in followers:
+        owner = Pubkey.from_string(follower)
+        get_user_volume_accumulator_pda(owner, PUMP_FUN_PROGRAM)
+        get_associated_token_address(owner, WSOL)
+    for owner, mint in holdings:
+        get_associated_token_address(Pubkey.from_string(owner), Pubkey.from_string(mint))
+
+    logger.info(
+        f"Warmed derivation cache for {len(followers)} followers and {len(holdings)} holdings: "
+        f"{derivation_cache.stats()}"
+    )
@@ -1,17 +1,25 @@
 from .decorator import (
     init,
     record_block_time,
+    record_parse_time,
+    record_produced,
     show_timeline,
     with_fetch_tx,
     with_parse_tx,
 )
+from .histogram import LatencyHistogram
+from .metrics import MetricsServer
 from .service import BenchmarkService, benchmark_service
 
 __all__ = [
     "BenchmarkService",
+    "LatencyHistogram",
+    "MetricsServer",
     "benchmark_service",
     "init",
     "record_block_time",
+    "record_parse_time",
+    "record_produced",
     "show_timeline",
     "with_fetch_tx",
     "with_parse_tx",
@@ -6,48 +6,46 @@ from solbot_common.log import logger
 from wallet_tracker.benchmark.service import benchmark_service
 
 
-async def _mark_start_fetch(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_start_fetch", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
-
-
-async def _mark_end_fetch(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_end_fetch", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
-
-
-async def _mark_start_parse(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_start_parse", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
+async def init(tx_hash: str):
+    benchmark_service.mark(tx_hash, "tx_detected")
 
 
-async def _mark_end_parse(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_end_parse", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
+async def record_block_time(tx_hash: str, block_time: int):
+    timeline = benchmark_service.mark(tx_hash, "block_time", block_time)
+    detected = timeline.get("tx_detected")
+    if detected is not None:
+        # blockTime 精度为秒, 发现时间可能略早于它
+        benchmark_service.observe("detect", max(detected - block_time, 0))
 
 
-async def init(tx_hash: str):
-    await benchmark_service.add(
-        {"tx_hash": tx_hash, "step": "tx_detected", "timestamp": time.time()}
-    )
+async def record_parse_time(tx_hash: str, start_time: float, end_time: float):
+    """记录在其他进程中完成的解析耗时"""
+    benchmark_service.mark(tx_hash, "tx_start_parse", start_time)
+    benchmark_service.mark(tx_hash, "tx_end_parse", end_time)
+    benchmark_service.observe("parse", end_time - start_time)
 
 
-async def record_block_time(tx_hash: str, block_time: int):
-    await benchmark_service.add({"tx_hash": tx_hash, "step": "block_time", "timestamp": block_time})
+async def record_produced(tx_hash: str):
+    """TxEvent 已发布, 记录发布耗时与总耗时并结束该交易的时间线"""
+    now = time.time()
+    timeline = benchmark_service.mark(tx_hash, "tx_produced", now)
+    parse_end = timeline.get("tx_end_parse")
+    if parse_end is not None:
+        benchmark_service.observe("produce", now - parse_end)
+    block_time = timeline.get("block_time")
+    if block_time is not None:
+        benchmark_service.observe("total", max(now - block_time, 0))
+    benchmark_service.finish(tx_hash)
 
 
 async def show_timeline(tx_hash: str):
-    timeline = await benchmark_service.get_timeline(tx_hash)
+    timeline = benchmark_service.get_timeline(tx_hash)
 
     def _calc_elapsed(start: str, end: str) -> float | None:
         start_time = timeline.get(start)
         end_time = timeline.get(end)
         if start_time is not None and end_time is not None:
-            return float(end_time) - float(start_time)
+            return end_time - start_time
         else:
             return None
 
@@ -63,7 +61,7 @@ async def show_timeline(tx_hash: str):
     # 总耗时
     total_elapsed = _calc_elapsed("block_time", "tx_end_parse")
 
-    logger.info(
+    logger.debug(
         f"\n Transaction: {tx_hash}"
         f"\n 发现交易耗时: {detect_elapsed}"
         f"\n 获取交易详情耗时: {fetch_tx_detail_elapsed}"
@@ -74,29 +72,25 @@ async def show_timeline(tx_hash: str):
 
 @asynccontextmanager
 async def with_fetch_tx(tx_hash: str):
-    data = await _mark_start_fetch(tx_hash)
-    start_time = data["timestamp"]
-    logger.info(f"Fetching transaction: {tx_hash}, start_time: {start_time}")
+    start_time = time.time()
+    benchmark_service.mark(tx_hash, "tx_start_fetch", start_time)
     try:
         yield
     finally:
-        data = await _mark_end_fetch(tx_hash)
-        end_time = data["timestamp"]
-        logger.info(
-            f"Fetching transaction: {tx_hash}, end_time: {end_time}, elapsed: {end_time - start_time}"
-        )
+        end_time = time.time()
+        benchmark_service.mark(tx_hash, "tx_end_fetch", end_time)
+        benchmark_service.observe("fetch", end_time - start_time)
+        logger.debug(f"Fetched transaction: {tx_hash}, elapsed: {end_time - start_time}")
 
 
 @asynccontextmanager
 async def with_parse_tx(tx_hash: str):
-    data = await _mark_start_parse(tx_hash)
-    start_time = data["timestamp"]
-    logger.info(f"Parsing transaction: {tx_hash}, start_time: {start_time}")
+    start_time = time.time()
+    benchmark_service.mark(tx_hash, "tx_start_parse", start_time)
     try:
         yield
     finally:
-        data = await _mark_end_parse(tx_hash)
-        end_time = data["timestamp"]
-        logger.info(
-            f"Parsing transaction: {tx_hash}, end_time: {end_time}, elapsed: {end_time - start_time}"
-        )
+        end_time = time.time()
+        benchmark_service.mark(tx_hash, "tx_end_parse", end_time)
+        benchmark_service.observe("parse", end_time - start_time)
+        logger.debug(f"Parsed transaction: {tx_hash}, elapsed: {end_time - start_time}")
@@ -0,0 +1,119 @@
+"""HDR 风格的延迟直方图
+
+以微秒为单位记录延迟, 桶按 2 的幂分段, 每段再线性划分为 `sub_buckets` 个子桶,
+相对误差不超过 1 / sub_buckets。桶的布局只由参数决定, 相同参数的直方图可以直接按桶
+相加合并 (例如多个周期或多个进程的数据)。
+"""
+
+import math
+from collections.abc import Iterable
+
+# 超过上限的值计入最后一个桶
+DEFAULT_MAX_VALUE_US = 3_600_000_000  # 1 小时
+
+
+class LatencyHistogram:
+    """记录延迟 (秒) 并计算分位数
+
+    Args:
+        sub_buckets: 每个 2 的幂区间内的子桶数, 必须为 2 的幂, 决定精度
+        max_value_us: 可精确记录的最大值 (微秒)
+    """
+
+    __slots__ = (
+        "count",
+        "counts",
+        "max_us",
+        "max_value_us",
+        "min_us",
+        "sub_bucket_bits",
+        "sub_buckets",
+        "total_us",
+    )
+
+    def __init__(self, sub_buckets: int = 128, max_value_us: int = DEFAULT_MAX_VALUE_US):
+        if sub_buckets <= 0 or sub_buckets & (sub_buckets - 1):
+            raise ValueError("sub_buckets must be a power of 2")
+        self.sub_buckets = sub_buckets
+        self.sub_bucket_bits = sub_buckets.bit_length() - 1
+        self.max_value_us = max_value_us
+        size = self._index(max_value_us) + 1
+        self.counts = [0] * size
+        self.count = 0
+        self.total_us = 0
+        self.min_us: int | None = None
+        self.max_us = 0
+
+    def _index(self, value_us: int) -> int:
+        """小于 sub_buckets 的值每个值一个桶, 之后每个 2 的幂区间 sub_buckets / 2 个桶"""
+        if value_us < self.sub_buckets:
+            return value_us
+        shift = value_us.bit_length() - self.sub_bucket_bits
+        half = self.sub_buckets >> 1
+        return self.sub_buckets + (shift - 1) * half + ((value_us >> shift) - half)
+
+    def _value_at(self, index: int) -> int:
+        """桶的上界 (微秒)"""
+        if index < self.sub_buckets:
+            return index
+        half = self.sub_buckets >> 1
+        shift = (index - self.sub_buckets) // half + 1
+        offset = (index - self.sub_buckets) % half + half
+        return ((offset + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value_us = max(int(seconds * 1_000_000), 0)
+        index = min(self._index(min(value_us, self.max_value_us)), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_us += value_us
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if (other.sub_buckets, other.max_value_us) != (self.sub_buckets, self.max_value_us):
+            raise ValueError("Cannot merge histograms with different layouts")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def reset(self) -> None:
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def percentile(self, percent: float) -> float:
+        """分位数 (秒), 没有数据时返回 0"""
+        if self.count == 0:
+            return 0.0
+        rank = max(math.ceil(self.count * percent / 100), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._value_at(index), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def percentiles(self, percents: Iterable[float]) -> dict[float, float]:
+        return {percent: self.percentile(percent) for percent in percents}
+
+    @property
+    def mean(self) -> float:
+        return self.total_us / self.count / 1_000_000 if self.count else 0.0
+
+    @property
+    def min(self) -> float:
+        return (self.min_us or 0) / 1_000_000
+
+    @property
+    def max(self) -> float:
+        return self.max_us / 1_000_000
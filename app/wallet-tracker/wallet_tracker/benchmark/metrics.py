@@ -0,0 +1,112 @@
+"""延迟统计的 HTTP 接口
+
+- `GET /metrics`: Prometheus 文本格式, 每个阶段一个 summary, 每个注册的队列一组
+  gauge (深度、容量等) 与 counter (丢弃数等)
+- `GET /metrics.json`: 与 `BenchmarkService.snapshot` 相同的 JSON
+- `GET /traces`: 采样保留的完整时间线
+"""
+
+import orjson as json
+from aiohttp import web
+from solbot_common.log import logger
+
+from .service import PERCENTILES, STAGES, BenchmarkService, benchmark_service
+
+METRIC_NAME = "wallet_tracker_latency_seconds"
+QUEUE_METRIC_PREFIX = "wallet_tracker_queue"
+# 队列统计中作为 gauge 输出的字段, 其余数值字段为累计计数
+QUEUE_GAUGES = ("depth", "capacity", "priority_depth", "workers")
+
+
+def render_queue_metrics(queues: dict[str, dict]) -> list[str]:
+    """队列统计: 数值字段按 QUEUE_GAUGES 输出为 gauge 或 counter, dict 字段按 reason 展开"""
+    samples: dict[str, list[str]] = {}
+    for queue, stats in queues.items():
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                name = f"{QUEUE_METRIC_PREFIX}_{key}_total"
+                for reason, count in value.items():
+                    samples.setdefault(name, []).append(
+                        f'{name}{{queue="{queue}",reason="{reason}"}} {count}'
+                    )
+            else:
+                name = f"{QUEUE_METRIC_PREFIX}_{key}"
+                if key not in QUEUE_GAUGES:
+                    name += "_total"
+                samples.setdefault(name, []).append(f'{name}{{queue="{queue}"}} {value}')
+
+    lines = []
+    for name, values in samples.items():
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(values)
+    return lines
+
+
+def render_prometheus(service: BenchmarkService) -> str:
+    snapshot = service.snapshot()
+    lines = [
+        f"# HELP {METRIC_NAME} Wallet tracker pipeline stage latency",
+        f"# TYPE {METRIC_NAME} summary",
+    ]
+    for stage in STAGES:
+        summary = snapshot["stages"][stage]
+        for percent in PERCENTILES:
+            quantile = percent / 100
+            value = summary[f"p{percent:g}"]
+            lines.append(f'{METRIC_NAME}{{stage="{stage}",quantile="{quantile:g}"}} {value}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {summary["mean"] * summary["count"]}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {summary["count"]}')
+    lines.append("# TYPE wallet_tracker_pending_traces gauge")
+    lines.append(f"wallet_tracker_pending_traces {snapshot['pending']}")
+    lines.append("# TYPE wallet_tracker_evicted_traces counter")
+    lines.append(f"wallet_tracker_evicted_traces {snapshot['evicted']}")
+    lines.append("# TYPE wallet_tracker_produced_events counter")
+    lines.append(f"wallet_tracker_produced_events {snapshot['produced']}")
+    lines.extend(render_queue_metrics(snapshot["queues"]))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9102,
+        service: BenchmarkService = benchmark_service,
+    ):
+        self.host = host
+        self.port = port
+        self.service = service
+        self.runner: web.AppRunner | None = None
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/metrics", self.metrics)
+        app.router.add_get("/metrics.json", self.metrics_json)
+        app.router.add_get("/traces", self.traces)
+        return app
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=render_prometheus(self.service), content_type="text/plain")
+
+    async def metrics_json(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=json.dumps(self.service.snapshot()), content_type="application/json"
+        )
+
+    async def traces(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=json.dumps(list(self.service.traces)), content_type="application/json"
+        )
+
+    async def start(self):
+        self.runner = web.AppRunner(self.build_app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Metrics server listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
@@ -1,68 +1,154 @@
-from asyncio.queues import Queue
+"""进程内的延迟统计
+
+原先每笔交易的每个步骤都写入一个 `benchmark:{tx_hash}` Redis hash, 由单个队列消费者
+串行写入 (每条都先 ping 一次), key 从不过期。现在所有步骤只在内存中记录:
+
+- 每笔交易的时间点暂存在有上限的 `pending` 中, 用于计算跨步骤的耗时, 交易发布后删除
+- 各阶段的耗时记录到 `LatencyHistogram`:
+  - detect: 出块 -> 发现交易
+  - fetch: 查询交易详情
+  - parse: 解析交易
+  - produce: 解析完成 -> 发布 TxEvent
+  - total: 出块 -> 发布 TxEvent
+  - reorder: TxEvent 在重排缓冲区中等待的时间 (启用 monitor.reorder_window 时)
+- 每隔 interval 秒将当前周期的直方图合并到累计直方图并输出分位数
+- 按 trace_sample_rate 采样保留少量完整的时间线, 用于排查
+- 各内存 / Redis 队列通过 `register_queue` 注册统计函数, 输出深度与丢弃数
+"""
+
+import asyncio
+import random
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
 
 from solbot_common.log import logger
-from solbot_db.redis import RedisClient
+
+from .histogram import LatencyHistogram
+
+STAGES = ("detect", "fetch", "parse", "produce", "total", "reorder")
+PERCENTILES = (50, 90, 99, 99.9)
 
 
 class BenchmarkService:
-    _instance: "BenchmarkService" = None  # type: ignore
+    """进程内共用 `benchmark_service`"""
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    def __init__(
+        self,
+        interval: float = 60,
+        trace_sample_rate: float = 0.0,
+        max_traces: int = 100,
+        max_pending: int = 10_000,
+    ):
+        self.interval = interval
+        self.trace_sample_rate = trace_sample_rate
+        self.max_pending = max_pending
+        # 当前周期与累计的直方图
+        self.current = {stage: LatencyHistogram() for stage in STAGES}
+        self.cumulative = {stage: LatencyHistogram() for stage in STAGES}
+        self.pending: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self.traces: deque[dict] = deque(maxlen=max_traces)
+        self.evicted = 0
+        # 已发布的 TxEvent 数
+        self.produced = 0
+        # 队列名 -> 返回 {"depth": ..., "dropped": {...}, ...} 的统计函数
+        self.queues: dict[str, Callable[[], dict]] = {}
+        self._stop = asyncio.Event()
 
-    def __init__(self):
-        self.q = Queue()
-        self.redis = None
+    def configure(self, interval: float, trace_sample_rate: float, max_traces: int) -> None:
+        self.interval = interval
+        self.trace_sample_rate = trace_sample_rate
+        self.traces = deque(self.traces, maxlen=max_traces)
 
-    async def connect_redis(self):
-        self.redis = await RedisClient.get_instance()
+    def register_queue(self, name: str, stats: Callable[[], dict]) -> None:
+        self.queues[name] = stats
 
-    async def add(self, item):
-        await self.q.put(item)
+    def observe(self, stage: str, seconds: float) -> None:
+        self.current[stage].record(seconds)
 
-    async def process(self):
-        while True:
-            try:
-                assert self.redis is not None, "Redis is not connected"
-                await self.redis.ping()
-            except AssertionError:
-                await self.connect_redis()
+    def mark(self, tx_hash: str, step: str, timestamp: float | None = None) -> dict[str, float]:
+        """记录交易某个步骤的时间点, 返回该交易已有的时间线"""
+        timeline = self.pending.get(tx_hash)
+        if timeline is None:
+            timeline = self.pending[tx_hash] = {}
+            if len(self.pending) > self.max_pending:
+                # 没有走到发布的交易 (解析失败、非 swap 等) 按先进先出淘汰
+                self.pending.popitem(last=False)
+                self.evicted += 1
+        timeline[step] = time.time() if timestamp is None else timestamp
+        return timeline
 
-            try:
-                item = await self.q.get()
-                if isinstance(item, dict) and self.redis is not None:
-                    tx_hash = item.get("tx_hash")
-                    step = item.get("step")
-                    timestamp = item.get("timestamp")
-                    if tx_hash and step and timestamp:
-                        await self.redis.hset(f"benchmark:{tx_hash}", step, str(timestamp))
-                self.q.task_done()
-            except Exception as e:
-                logger.error(f"Error processing item: {e}")
+    def get_timeline(self, tx_hash: str) -> dict[str, float]:
+        return dict(self.pending.get(tx_hash, {}))
+
+    def finish(self, tx_hash: str) -> None:
+        """交易的 TxEvent 已发布, 按采样率保留时间线"""
+        self.produced += 1
+        timeline = self.pending.pop(tx_hash, None)
+        if (
+            timeline is not None
+            and self.trace_sample_rate > 0
+            and random.random() < self.trace_sample_rate
+        ):
+            self.traces.append({"tx_hash": tx_hash, **timeline})
+
+    def rotate(self) -> dict[str, LatencyHistogram]:
+        """将当前周期合并到累计直方图, 返回当前周期的数据"""
+        current = self.current
+        self.current = {stage: LatencyHistogram() for stage in STAGES}
+        for stage, histogram in current.items():
+            self.cumulative[stage].merge(histogram)
+        return current
+
+    def snapshot(self) -> dict:
+        """累计的分位数 (秒), 包含尚未合并的当前周期"""
+        stages = {}
+        for stage in STAGES:
+            histogram = LatencyHistogram()
+            histogram.merge(self.cumulative[stage])
+            histogram.merge(self.current[stage])
+            stages[stage] = summarize(histogram)
+        return {
+            "stages": stages,
+            "pending": len(self.pending),
+            "evicted": self.evicted,
+            "produced": self.produced,
+            "queues": {name: stats() for name, stats in self.queues.items()},
+        }
+
+    def report(self) -> None:
+        for stage, histogram in self.rotate().items():
+            if histogram.count == 0:
+                continue
+            quantiles = ", ".join(
+                f"p{percent:g}={value * 1000:.1f}ms"
+                for percent, value in histogram.percentiles(PERCENTILES).items()
+            )
+            logger.info(f"Latency {stage}: count={histogram.count}, {quantiles}")
+        for name, stats in self.queues.items():
+            logger.info(f"Queue {name}: {stats()}")
 
     async def start(self):
-        await self.connect_redis()
-        await self.process()
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.report()
 
     async def stop(self):
-        await self.q.join()
-
-    async def get_timeline(self, tx_hash: str) -> dict:
-        """Get the timeline of a transaction's processing steps"""
-        if self.redis is None:
-            await self.connect_redis()
-        assert self.redis is not None, "Redis is not connected"
-        result = await self.redis.hgetall(f"benchmark:{tx_hash}")
-        return dict(result) if result else {}
-
-    async def clear_timeline(self, tx_hash: str):
-        """Clear the timeline data for a specific transaction"""
-        if self.redis is None:
-            await self.connect_redis()
-        assert self.redis is not None, "Redis is not connected"
-        await self.redis.delete(f"benchmark:{tx_hash}")
+        self._stop.set()
+
+
+def summarize(histogram: LatencyHistogram) -> dict:
+    return {
+        "count": histogram.count,
+        "mean": histogram.mean,
+        "min": histogram.min,
+        "max": histogram.max,
+        **{f"p{percent:g}": value for percent, value in histogram.percentiles(PERCENTILES).items()},
+    }
 
 
 benchmark_service = BenchmarkService()
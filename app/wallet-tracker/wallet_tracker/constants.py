@@ -9,3 +9,6 @@ FAILED_TX_DETAIL_CHANNEL = "tx_detail:failed"
 
 NEW_TX_EVENT_CHANNEL = "tx_event:new"
 FAILED_TX_EVENT_CHANNEL = "tx_event:failed"
+
+# 失败交易的重试计划 (sorted set, score 为下次重试时间)
+TX_RETRY_SCHEDULE = "tx_retry:schedule"
@@ -0,0 +1,224 @@
+"""交易签名去重
+
+同一个钱包被多个订阅提及, 或 WSS 与 Geyser 同时运行做冗余时, 同一笔交易会被多次写入
+队列、通过每个 `TxDetailRawFetcher` 重复查询并重复解析, 最终可能产生重复的 `TxEvent`
+(即重复跟单)。
+
+`SignatureDeduplicator` 在写入队列/发布事件前过滤在时间窗口内已出现过的签名:
+- 进程内 LRU: 按首次出现时间过期, 命中时无需访问 Redis
+- Redis 轮转布隆过滤器: 每个时间窗口一个 bitmap (`dedup:{namespace}:{epoch}`),
+  同时检查当前与上一个窗口, 多个 tracker 副本共享。
+  布隆过滤器存在误判, 默认 2^24 bit / 7 个哈希, 每个窗口 1 万个签名时误判率可以忽略,
+  100 万个签名时约 0.1%
+
+Redis 不可用时放行 (宁可重复, 不可漏单)。
+同理, 签名在检查时即被记录, 后续处理 (如发布 TxEvent) 失败时需要调用 `forget` 撤销记录,
+否则重新投递的同一笔交易会被当作重复跳过。
+"""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import aioredis
+from solbot_common.config import settings
+from solbot_common.log import logger
+
+# 进入交易处理流程的签名 (WSS 日志订阅与 Geyser 共用)
+SIGNATURE_NAMESPACE = "tx_signature"
+# 发布的 TxEvent
+TX_EVENT_NAMESPACE = "tx_event"
+
+# 对每个签名: 在当前窗口设置所有 bit, 并检查上一个窗口是否已包含该签名
+# ARGV: 哈希数, 过期时间, 各签名的 bit 位置 (每个签名 ARGV[1] 个)
+# 返回每个签名是否重复 (1 为重复)
+_CHECK_AND_SET_SCRIPT = """
+local k = tonumber(ARGV[1])
+local n = (#ARGV - 2) / k
+local result = {}
+for s = 0, n - 1 do
+    local is_new = 0
+    local in_previous = 1
+    for i = 1, k do
+        local pos = tonumber(ARGV[2 + s * k + i])
+        if redis.call('SETBIT', KEYS[1], pos, 1) == 0 then
+            is_new = 1
+        end
+        if in_previous == 1 and redis.call('GETBIT', KEYS[2], pos) == 0 then
+            in_previous = 0
+        end
+    end
+    if is_new == 1 and in_previous == 0 then
+        result[s + 1] = 0
+    else
+        result[s + 1] = 1
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return result
+"""
+
+# 清除签名在当前与上一个窗口中的 bit
+# ARGV: 各签名的 bit 位置
+_FORGET_SCRIPT = """
+for i = 1, #ARGV do
+    local pos = tonumber(ARGV[i])
+    redis.call('SETBIT', KEYS[1], pos, 0)
+    redis.call('SETBIT', KEYS[2], pos, 0)
+end
+return #ARGV
+"""
+
+
+@dataclass
+class DedupStats:
+    checked: int = 0
+    local_hits: int = 0
+    remote_hits: int = 0
+    errors: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.local_hits + self.remote_hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.checked if self.checked else 0.0
+
+
+class SignatureDeduplicator:
+    """时间窗口内的签名去重
+
+    Args:
+        redis: Redis 客户端, 为 None 时只使用进程内 LRU
+        namespace: 去重范围, 不同阶段使用不同的 namespace
+        window: 去重时间窗口 (秒), 小于等于 0 时不去重, 默认使用配置 `monitor.dedup_window`
+        local_size: 进程内 LRU 的容量
+        bloom_bits: 每个窗口布隆过滤器的 bit 数
+        bloom_hashes: 布隆过滤器的哈希数
+        report_interval: 输出命中率的间隔 (秒)
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis | None,
+        namespace: str,
+        window: float | None = None,
+        local_size: int = 100_000,
+        bloom_bits: int = 1 << 24,
+        bloom_hashes: int = 7,
+        report_interval: float = 60,
+    ):
+        self.redis = redis
+        self.namespace = namespace
+        self.window = settings.monitor.dedup_window if window is None else window
+        self.local_size = local_size
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self.report_interval = report_interval
+        self.stats = DedupStats()
+        # 签名 -> 首次出现时间, 按时间顺序排列
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self._last_report = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def _positions(self, signature: str) -> list[int]:
+        """双重哈希计算 bit 位置"""
+        digest = hashlib.blake2b(signature.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bloom_bits for i in range(self.bloom_hashes)]
+
+    def _check_local(self, signature: str, now: float) -> bool:
+        """检查并记录到进程内 LRU, 已存在时返回 True"""
+        seen = self._seen
+        while seen:
+            oldest, first_seen = next(iter(seen.items()))
+            if now - first_seen < self.window and len(seen) < self.local_size:
+                break
+            del seen[oldest]
+        if signature in seen:
+            return True
+        seen[signature] = now
+        return False
+
+    def _keys(self) -> tuple[str, str]:
+        """当前与上一个窗口的 bitmap key"""
+        epoch = int(time.time() // self.window)
+        return f"dedup:{self.namespace}:{epoch}", f"dedup:{self.namespace}:{epoch - 1}"
+
+    async def _check_remote(self, signatures: list[str]) -> list[bool]:
+        """检查并记录到 Redis 布隆过滤器, 返回每个签名是否重复"""
+        current, previous = self._keys()
+        args: list[int] = [self.bloom_hashes, math.ceil(self.window * 2)]
+        for signature in signatures:
+            args.extend(self._positions(signature))
+        assert self.redis is not None
+        result = await self.redis.eval(_CHECK_AND_SET_SCRIPT, 2, current, previous, *args)
+        return [bool(int(flag)) for flag in result]
+
+    async def filter_new(self, signatures: Sequence[str]) -> list[str]:
+        """返回窗口内首次出现的签名, 并记录这些签名"""
+        if not self.enabled:
+            return list(signatures)
+
+        now = time.monotonic()
+        self.stats.checked += len(signatures)
+        candidates = []
+        for signature in signatures:
+            if self._check_local(signature, now):
+                self.stats.local_hits += 1
+            else:
+                candidates.append(signature)
+
+        if candidates and self.redis is not None:
+            try:
+                duplicated = await self._check_remote(candidates)
+                candidates_and_flags = list(zip(candidates, duplicated, strict=True))
+            except Exception as e:
+                self.stats.errors += 1
+                logger.warning(f"Dedup filter {self.namespace} is unavailable: {e}")
+            else:
+                self.stats.remote_hits += sum(duplicated)
+                candidates = [signature for signature, dup in candidates_and_flags if not dup]
+
+        self._report(now)
+        return candidates
+
+    async def is_new(self, signature: str) -> bool:
+        """签名在窗口内首次出现时返回 True"""
+        return bool(await self.filter_new([signature]))
+
+    async def forget(self, signature: str) -> None:
+        """撤销签名的记录, 在签名通过检查但后续处理失败时调用, 使重新投递的交易可以通过
+
+        布隆过滤器的 bit 可能与其他签名共用, 清除后这些签名可能再次通过 (宁可重复, 不可漏单)
+        """
+        if not self.enabled:
+            return
+        self._seen.pop(signature, None)
+        if self.redis is None:
+            return
+        current, previous = self._keys()
+        try:
+            await self.redis.eval(_FORGET_SCRIPT, 2, current, previous, *self._positions(signature))
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Failed to forget {signature} in dedup filter {self.namespace}: {e}")
+
+    def _report(self, now: float) -> None:
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        stats = self.stats
+        logger.info(
+            f"Dedup {self.namespace}: checked={stats.checked} hit_rate={stats.hit_rate:.2%} "
+            f"local_hits={stats.local_hits} remote_hits={stats.remote_hits} "
+            f"errors={stats.errors}"
+        )
@@ -0,0 +1,267 @@
+"""Geyser 响应队列的背压与降级策略
+
+原先 response worker 处理不过来时, `await response_queue.put(response)` 会阻塞 gRPC
+读取协程, 服务端缓冲区写满后 Geyser 会直接断开 stream。`ResponseQueue.put` 从不阻塞:
+
+- 队列深度超过 ping_watermark 后直接丢弃 ping, 队列满时优先淘汰已排队的 ping
+- 涉及 priority_wallets (有跟单的钱包) 的交易单独排队, worker 优先处理
+- 队列仍然满时按 overflow 策略淘汰最早的普通交易 (全部是优先交易时淘汰最早的优先交易):
+  - "drop": 直接丢弃
+  - "spill": 交给 spill 回调 (写入 Redis 交易详情队列, 由 `TransactionWorker` 处理)
+
+保持连接比处理每一个 ping 更重要。
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Coroutine, Iterable
+from typing import Any
+
+from solbot_common.log import logger
+from solders.pubkey import Pubkey  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+OVERFLOW_POLICIES = ("drop", "spill")
+
+SpillCallback = Callable[[geyser_pb2.SubscribeUpdate], Awaitable[None]]
+
+
+class ResponseQueue:
+    """按优先级出队、满时降级而不是阻塞的响应队列
+
+    接口与 `asyncio.Queue` 保持一致 (put / get / task_done / join / qsize / empty)。
+
+    Args:
+        maxsize: 队列容量 (三个子队列合计)
+        overflow: 队列满时的策略, "drop" 或 "spill"
+        spill: overflow 为 "spill" 时接收被淘汰的消息
+        ping_watermark: 队列深度达到 maxsize 的该比例后丢弃新的 ping
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        overflow: str = "drop",
+        spill: SpillCallback | None = None,
+        ping_watermark: float = 0.5,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be greater than 0")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow}")
+        if overflow == "spill" and spill is None:
+            raise ValueError("spill callback is required when overflow is 'spill'")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.spill = spill
+        self.ping_watermark = ping_watermark
+        self.priority: deque[geyser_pb2.SubscribeUpdate] = deque()
+        self.normal: deque[geyser_pb2.SubscribeUpdate] = deque()
+        self.pings: deque[geyser_pb2.SubscribeUpdate] = deque()
+        self.priority_keys: set[bytes] = set()
+        # 正在 get() 中等待消息的协程
+        self.waiting: set[asyncio.Task] = set()
+        self.dropped = {"ping": 0, "normal": 0, "priority": 0}
+        self.spilled = 0
+        self._unfinished = 0
+        self._not_empty = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def set_priority_wallets(self, wallets: Iterable[str]) -> None:
+        self.priority_keys = {bytes(Pubkey.from_string(wallet)) for wallet in wallets}
+
+    def qsize(self) -> int:
+        return len(self.priority) + len(self.normal) + len(self.pings)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        return self.qsize() >= self.maxsize
+
+    def is_priority(self, response: geyser_pb2.SubscribeUpdate) -> bool:
+        if not self.priority_keys:
+            return False
+        account_keys = response.transaction.transaction.transaction.message.account_keys
+        return any(key in self.priority_keys for key in account_keys)
+
+    async def put(self, response: geyser_pb2.SubscribeUpdate) -> None:
+        """放入一条消息, 不会因为队列已满而等待"""
+        update_type = response.WhichOneof("update_oneof")
+        if update_type == "ping":
+            if self.qsize() >= self.maxsize * self.ping_watermark:
+                self.dropped["ping"] += 1
+                return
+            self._append(self.pings, response)
+            return
+
+        priority = update_type == "transaction" and self.is_priority(response)
+        if self.full():
+            if self.pings:
+                self.pings.popleft()
+                self.dropped["ping"] += 1
+                self._done()
+            elif self.normal:
+                await self._shed(self.normal.popleft(), "normal", queued=True)
+            elif priority:
+                await self._shed(self.priority.popleft(), "priority", queued=True)
+            else:
+                # 队列中全部是优先交易, 淘汰新来的普通交易
+                await self._shed(response, "normal", queued=False)
+                return
+        self._append(self.priority if priority else self.normal, response)
+
+    def put_nowait(self, response: geyser_pb2.SubscribeUpdate) -> None:
+        """不做降级处理的 put, 队列满时抛出 `asyncio.QueueFull`"""
+        if self.full():
+            raise asyncio.QueueFull
+        self._append(self.normal, response)
+
+    def _append(self, queue: deque, response: geyser_pb2.SubscribeUpdate) -> None:
+        queue.append(response)
+        self._unfinished += 1
+        self._finished.clear()
+        self._not_empty.set()
+
+    async def _shed(self, victim: geyser_pb2.SubscribeUpdate, kind: str, queued: bool) -> None:
+        """按 overflow 策略处理被淘汰的交易"""
+        if queued:
+            self._done()
+        if self.overflow == "spill":
+            assert self.spill is not None
+            try:
+                await self.spill(victim)
+                self.spilled += 1
+                return
+            except Exception as e:
+                logger.error(f"Failed to spill geyser response: {e}")
+        self.dropped[kind] += 1
+        if (self.dropped["normal"] + self.dropped["priority"]) % 1000 == 1:
+            logger.warning(
+                f"Geyser response queue is full ({self.maxsize}), dropped: {self.dropped}"
+            )
+
+    async def get(self) -> geyser_pb2.SubscribeUpdate:
+        """取出一条消息, 优先交易 > 普通交易 > ping"""
+        while True:
+            for queue in (self.priority, self.normal, self.pings):
+                if queue:
+                    return queue.popleft()
+            self._not_empty.clear()
+            task = asyncio.current_task()
+            if task is not None:
+                self.waiting.add(task)
+            try:
+                await self._not_empty.wait()
+            finally:
+                self.waiting.discard(task)  # type: ignore
+
+    def get_nowait(self) -> geyser_pb2.SubscribeUpdate:
+        for queue in (self.priority, self.normal, self.pings):
+            if queue:
+                return queue.popleft()
+        raise asyncio.QueueEmpty
+
+    def _done(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._finished.set()
+
+    def task_done(self) -> None:
+        self._done()
+
+    async def join(self) -> None:
+        await self._finished.wait()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.qsize(),
+            "capacity": self.maxsize,
+            "priority_depth": len(self.priority),
+            "dropped": dict(self.dropped),
+            "spilled": self.spilled,
+        }
+
+
+class WorkerScaler:
+    """根据队列深度增减 worker 数量
+
+    每隔 interval 秒检查一次: 深度达到容量的 scale_up_ratio 时增加一个 worker,
+    队列为空时结束一个空闲的 worker, 数量保持在 [min_workers, max_workers] 之间。
+
+    Args:
+        queue: 被消费的队列
+        worker: 创建 worker 协程的函数
+        min_workers: 最少 worker 数
+        max_workers: 最多 worker 数
+        interval: 检查间隔 (秒)
+        scale_up_ratio: 触发扩容的队列深度比例
+    """
+
+    def __init__(
+        self,
+        queue: ResponseQueue,
+        worker: Callable[[], Coroutine[Any, Any, None]],
+        min_workers: int = 2,
+        max_workers: int = 8,
+        interval: float = 1.0,
+        scale_up_ratio: float = 0.25,
+    ):
+        if not 1 <= min_workers <= max_workers:
+            raise ValueError("Require 1 <= min_workers <= max_workers")
+        self.queue = queue
+        self.worker = worker
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.interval = interval
+        self.scale_up_ratio = scale_up_ratio
+        self.workers: list[asyncio.Task] = []
+        self._task: asyncio.Task | None = None
+
+    def add_worker(self) -> None:
+        self.workers.append(asyncio.create_task(self.worker()))
+
+    def scale(self) -> None:
+        """检查一次队列深度并调整 worker 数"""
+        self.workers = [worker for worker in self.workers if not worker.done()]
+        depth = self.queue.qsize()
+        if len(self.workers) < self.min_workers:
+            for _ in range(self.min_workers - len(self.workers)):
+                self.add_worker()
+        elif depth >= self.queue.maxsize * self.scale_up_ratio:
+            if len(self.workers) < self.max_workers:
+                self.add_worker()
+                logger.info(f"Scaled response workers up to {len(self.workers)}, depth: {depth}")
+        elif depth == 0 and len(self.workers) > self.min_workers:
+            # 只取消正在等待消息的 worker, 不会中断处理中的消息
+            for worker in self.workers:
+                if worker in self.queue.waiting:
+                    worker.cancel()
+                    self.workers.remove(worker)
+                    logger.info(f"Scaled response workers down to {len(self.workers)}")
+                    break
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.scale()
+            except Exception as e:
+                logger.exception(f"Worker scaler error: {e}")
+
+    def start(self) -> None:
+        for _ in range(self.min_workers):
+            self.add_worker()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        tasks = list(self.workers)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers.clear()
@@ -0,0 +1,189 @@
+"""Geyser 消息编解码
+
+- `transaction_to_rpc_dict`: 直接从 protobuf 字段构建 getTransaction(json) 结构,
+  不再经过 `proto_to_dict` 对每个 bytes 字段做 `should_convert_to_base58` 判断
+- `update_from_dict` / `load_update_dumps`: 将 `proto_to_dict` 导出的数据还原为
+  `SubscribeUpdate`, 用于基准测试与回放
+"""
+
+import base64
+import json
+import re
+from collections.abc import Iterator
+from pathlib import Path
+
+import base58
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.json_format import ParseDict
+from solders.hash import Hash  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2, solana_storage_pb2
+
+_BASE58_ALPHABET = re.compile(r"^[1-9A-HJ-NP-Za-km-z]+$")
+
+
+def _encode_instruction(
+    instruction: solana_storage_pb2.CompiledInstruction | solana_storage_pb2.InnerInstruction,
+) -> dict:
+    return {
+        "programIdIndex": instruction.program_id_index,
+        "accounts": list(instruction.accounts),
+        "data": base58.b58encode(instruction.data).decode("utf-8"),
+    }
+
+
+def _encode_token_balance(balance: solana_storage_pb2.TokenBalance) -> dict:
+    ui_token_amount = balance.ui_token_amount
+    return {
+        "accountIndex": balance.account_index,
+        "mint": balance.mint,
+        "owner": balance.owner,
+        "programId": balance.program_id,
+        "uiTokenAmount": {
+            "uiAmount": ui_token_amount.ui_amount,
+            "decimals": ui_token_amount.decimals,
+            "amount": ui_token_amount.amount,
+            "uiAmountString": ui_token_amount.ui_amount_string,
+        },
+    }
+
+
+def transaction_to_rpc_dict(
+    transaction: geyser_pb2.SubscribeUpdateTransaction, block_time: int
+) -> dict:
+    """将 Geyser 交易转换为与 RPC getTransaction(encoding="json") 相同的结构
+
+    Args:
+        transaction: Geyser 推送的交易
+        block_time: 区块时间, Geyser 推送交易时区块尚未确认, 需要由调用方提供
+    """
+    info = transaction.transaction
+    message = info.transaction.message
+    meta = info.meta
+
+    inner_instructions = []
+    for inner in meta.inner_instructions:
+        instructions = []
+        for instruction in inner.instructions:
+            item = _encode_instruction(instruction)
+            if instruction.HasField("stack_height"):
+                item["stackHeight"] = instruction.stack_height
+            instructions.append(item)
+        inner_instructions.append({"index": inner.index, "instructions": instructions})
+
+    return {
+        "slot": transaction.slot,
+        # RPC 返回中没有该字段, 保留区块内序号供 TxEvent 排序
+        "transactionIndex": info.index,
+        "blockTime": block_time,
+        "version": 0 if message.versioned else "legacy",
+        "transaction": {
+            "signatures": [str(Signature.from_bytes(sig)) for sig in info.transaction.signatures],
+            "message": {
+                "header": {
+                    "numRequiredSignatures": message.header.num_required_signatures,
+                    "numReadonlySignedAccounts": message.header.num_readonly_signed_accounts,
+                    "numReadonlyUnsignedAccounts": message.header.num_readonly_unsigned_accounts,
+                },
+                "accountKeys": [str(Pubkey.from_bytes(key)) for key in message.account_keys],
+                "recentBlockhash": str(Hash.from_bytes(message.recent_blockhash)),
+                "instructions": [_encode_instruction(ix) for ix in message.instructions],
+                "addressTableLookups": [
+                    {
+                        "accountKey": str(Pubkey.from_bytes(lookup.account_key)),
+                        "writableIndexes": list(lookup.writable_indexes),
+                        "readonlyIndexes": list(lookup.readonly_indexes),
+                    }
+                    for lookup in message.address_table_lookups
+                ],
+            },
+        },
+        "meta": {
+            "err": (
+                base58.b58encode(meta.err.err).decode("utf-8") if meta.HasField("err") else None
+            ),
+            "fee": meta.fee,
+            "preBalances": list(meta.pre_balances),
+            "postBalances": list(meta.post_balances),
+            "innerInstructions": inner_instructions,
+            "logMessages": list(meta.log_messages),
+            "preTokenBalances": [_encode_token_balance(b) for b in meta.pre_token_balances],
+            "postTokenBalances": [_encode_token_balance(b) for b in meta.post_token_balances],
+            "loadedAddresses": {
+                "writable": [str(Pubkey.from_bytes(k)) for k in meta.loaded_writable_addresses],
+                "readonly": [str(Pubkey.from_bytes(k)) for k in meta.loaded_readonly_addresses],
+            },
+            "computeUnitsConsumed": (
+                meta.compute_units_consumed if meta.HasField("compute_units_consumed") else None
+            ),
+        },
+    }
+
+
+def _decode_rendered_bytes(value: str) -> bytes:
+    """`Base58Printer` 的逆操作
+
+    bytes 字段会被渲染为 base58 或 utf-8 字符串, 这里优先按 base58 还原。
+    """
+    if _BASE58_ALPHABET.match(value):
+        return base58.b58decode(value)
+    return value.encode("utf-8")
+
+
+def _bytes_fields_to_base64(data: dict, descriptor: Descriptor) -> dict:
+    result = {}
+    for key, value in data.items():
+        field = descriptor.fields_by_camelcase_name.get(key) or descriptor.fields_by_name.get(key)
+        if field is None:
+            result[key] = value
+        elif field.message_type is not None:
+            if isinstance(value, list):
+                result[key] = [_bytes_fields_to_base64(v, field.message_type) for v in value]
+            else:
+                result[key] = _bytes_fields_to_base64(value, field.message_type)
+        elif field.type == FieldDescriptor.TYPE_BYTES:
+            if isinstance(value, list):
+                result[key] = [
+                    base64.b64encode(_decode_rendered_bytes(v)).decode("utf-8") for v in value
+                ]
+            else:
+                result[key] = base64.b64encode(_decode_rendered_bytes(value)).decode("utf-8")
+        else:
+            result[key] = value
+    return result
+
+
+def update_from_dict(data: dict) -> geyser_pb2.SubscribeUpdate:
+    """将 `proto_to_dict` 的输出还原为 `SubscribeUpdate`"""
+    message = geyser_pb2.SubscribeUpdate()
+    ParseDict(
+        _bytes_fields_to_base64(data, message.DESCRIPTOR),
+        message,
+        ignore_unknown_fields=True,
+    )
+    return message
+
+
+def load_update_dumps(path: str | Path) -> Iterator[dict]:
+    """读取 `proto_to_dict` 导出的调试数据, 例如 tests/ 下的 `数据.json`
+
+    这些文件是直接打印出来的 Python dict, 可能包含 `True`、`//` 注释以及多个连续对象,
+    无法解析的内容会被跳过。
+    """
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    text = "\n".join(line for line in lines if not line.lstrip().startswith("//"))
+    text = re.sub(r"\bTrue\b", "true", re.sub(r"\bFalse\b", "false", text))
+
+    decoder = json.JSONDecoder()
+    index = 0
+    while True:
+        while index < len(text) and text[index].isspace():
+            index += 1
+        if index >= len(text):
+            return
+        try:
+            obj, index = decoder.raw_decode(text, index)
+        except json.JSONDecodeError:
+            return
+        yield obj
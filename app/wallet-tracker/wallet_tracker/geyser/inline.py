@@ -0,0 +1,198 @@
+"""Geyser 进程内解析 (monitor.mode = "geyser-inline")
+
+geyser 模式下每笔交易都要序列化写入 `tx_detail:new`, 再由 `TransactionWorker`
+取出解析, 最后序列化写入 `tx_event:new`。inline 模式在 response worker 之后
+直接通过有界内存队列完成解析与发布:
+
+    response worker -> parse_queue -> GeyserTXParser -> event_queue -> TxEventProducer
+
+Redis 交易详情队列只在以下情况下使用:
+- parse_queue 已满: 交易写入 `NEW_TX_DETAIL_CHANNEL`, 由 `TransactionWorker` 兜底解析
+- 解析失败或 TxEvent 发布失败: 交易写入 `FAILED_TX_DETAIL_CHANNEL`, 由 `FailedTxReprocessor` 重试
+"""
+
+import asyncio
+from collections.abc import Sequence
+
+import aioredis
+import orjson as json
+from solbot_common.log import logger
+from solbot_common.types import TxEvent
+from solders.pubkey import Pubkey  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+from wallet_tracker import benchmark
+from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL, NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.dedup import TX_EVENT_NAMESPACE, SignatureDeduplicator
+from wallet_tracker.exceptions import (
+    NotSwapTransaction,
+    UnknownTransactionType,
+    ZeroChangeAmountError,
+)
+from wallet_tracker.geyser.codec import transaction_to_rpc_dict
+from wallet_tracker.geyser.tx_subscriber import TransactionDetailSubscriber
+from wallet_tracker.ingress import wrap_failed
+from wallet_tracker.parser import GeyserTXParser
+from wallet_tracker.reorder import create_tx_event_producer, produce_tx_event
+
+
+class InlineTransactionSubscriber(TransactionDetailSubscriber):
+    """在进程内解析 Geyser 交易并发布 TxEvent
+
+    Args:
+        parse_queue_size: 待解析队列容量, 超出部分写入 Redis 交易详情队列
+        event_queue_size: 待发布队列容量, 队列满时解析协程等待
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: str,
+        redis_client: aioredis.Redis,
+        wallets: Sequence[Pubkey],
+        parse_queue_size: int = 1000,
+        event_queue_size: int = 1000,
+    ):
+        super().__init__(endpoint, api_key, redis_client, wallets)
+        self.tx_event_producer = create_tx_event_producer(redis_client)
+        # 与 TransactionWorker 共用 namespace, 溢出到 Redis 的交易不会重复发布
+        self.event_dedup = SignatureDeduplicator(redis_client, TX_EVENT_NAMESPACE)
+        self.parse_queue: asyncio.Queue[tuple[geyser_pb2.SubscribeUpdateTransaction, int]] = (
+            asyncio.Queue(maxsize=parse_queue_size)
+        )
+        # 与 TxEvent 一起保存交易与区块时间, 发布失败时写入失败队列
+        self.event_queue: asyncio.Queue[
+            tuple[TxEvent, geyser_pb2.SubscribeUpdateTransaction, int]
+        ] = asyncio.Queue(maxsize=event_queue_size)
+        self.inline_tasks: list[asyncio.Task] = []
+
+    async def _process_transaction(
+        self, transaction: geyser_pb2.SubscribeUpdateTransaction
+    ) -> None:
+        """将交易放入待解析队列, 队列已满时写入 Redis"""
+        block_time = self.block_time(transaction.slot)
+        try:
+            self.parse_queue.put_nowait((transaction, block_time))
+        except asyncio.QueueFull:
+            logger.warning("Parse queue is full, spilling transaction to Redis")
+            await self._spill(NEW_TX_DETAIL_CHANNEL, transaction, block_time)
+
+    async def _spill(
+        self,
+        channel: str,
+        transaction: geyser_pb2.SubscribeUpdateTransaction,
+        block_time: int,
+    ) -> None:
+        """以 RPC getTransaction 的结构写入 Redis 队列, 写入失败队列时带上失败时间"""
+        try:
+            data = transaction_to_rpc_dict(transaction, block_time=block_time)
+            payload = json.dumps(data)
+            if channel == FAILED_TX_DETAIL_CHANNEL:
+                payload = wrap_failed(payload.decode("utf-8"))
+            await self.pusher.push(channel, payload)
+        except Exception as e:
+            logger.exception(f"Error spilling transaction to {channel}: {e}")
+
+    async def _parse_transaction(
+        self, transaction: geyser_pb2.SubscribeUpdateTransaction, block_time: int
+    ) -> None:
+        tx_parser = GeyserTXParser(transaction, block_time=block_time)
+        tx_hash = tx_parser.get_tx_hash()
+        try:
+            await benchmark.record_block_time(tx_hash, block_time)
+            async with benchmark.with_parse_tx(tx_hash):
+                tx_event = tx_parser.parse()
+
+            if tx_event is None:
+                logger.error(f"Parse tx failed, details: {tx_hash}")
+                await self._spill(FAILED_TX_DETAIL_CHANNEL, transaction, block_time)
+                return
+            await self.event_queue.put((tx_event, transaction, block_time))
+        except NotSwapTransaction:
+            logger.info(f"Tx is not swap transaction, details: {tx_hash}")
+        except UnknownTransactionType:
+            logger.info(f"Tx type is not valid, details: {tx_hash}")
+        except ZeroChangeAmountError:
+            logger.info(f"Tx amount is zero, details: {tx_hash}")
+        except Exception as e:
+            logger.error(f"Failed to process transaction: {e}, details: {tx_hash}")
+            logger.exception(e)
+            await self._spill(FAILED_TX_DETAIL_CHANNEL, transaction, block_time)
+
+    async def _parse_worker(self) -> None:
+        """从待解析队列中取出交易并解析"""
+        while True:
+            try:
+                transaction, block_time = await self.parse_queue.get()
+                try:
+                    await self._parse_transaction(transaction, block_time)
+                finally:
+                    self.parse_queue.task_done()
+            except asyncio.CancelledError:
+                logger.info("Parse worker cancelled")
+                break
+            except Exception as e:
+                logger.exception(f"Parse worker error: {e}")
+
+    async def _produce(
+        self,
+        tx_event: TxEvent,
+        transaction: geyser_pb2.SubscribeUpdateTransaction,
+        block_time: int,
+    ) -> bool:
+        """发布 TxEvent, 失败时撤销去重记录并将交易写入失败队列"""
+
+        async def on_failure(tx_event: TxEvent, error: Exception) -> None:
+            logger.error(f"Failed to produce tx event {tx_event.signature}: {error}")
+            await self.event_dedup.forget(tx_event.signature)
+            await self._spill(FAILED_TX_DETAIL_CHANNEL, transaction, block_time)
+
+        return await produce_tx_event(self.tx_event_producer, tx_event, on_failure)
+
+    async def _event_worker(self) -> None:
+        """从待发布队列中取出 TxEvent 并发布"""
+        while True:
+            try:
+                tx_event, transaction, block_time = await self.event_queue.get()
+                try:
+                    if not await self.event_dedup.is_new(tx_event.signature):
+                        logger.info(f"Skipping duplicate tx event: {tx_event.signature}")
+                    elif await self._produce(tx_event, transaction, block_time):
+                        await benchmark.record_produced(tx_event.signature)
+                        logger.success(f"New tx event: {tx_event.signature}")
+                finally:
+                    self.event_queue.task_done()
+            except asyncio.CancelledError:
+                logger.info("Event worker cancelled")
+                break
+            except Exception as e:
+                logger.exception(f"Event worker error: {e}")
+
+    async def _start_workers(self):
+        await super()._start_workers()
+        self.inline_tasks = [
+            asyncio.create_task(self._parse_worker()),
+            asyncio.create_task(self._event_worker()),
+        ]
+
+    async def stop(self) -> None:
+        if not self.is_running:
+            return
+
+        # 先停止 response worker, 再等待内存队列中的交易处理完
+        await self._stop_workers()
+        try:
+            await asyncio.wait_for(self.parse_queue.join(), timeout=5)
+            await asyncio.wait_for(self.event_queue.join(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.event_queue.qsize()} unpublished events")
+        for task in self.inline_tasks:
+            task.cancel()
+        await asyncio.gather(*self.inline_tasks, return_exceptions=True)
+        self.inline_tasks.clear()
+
+        # 未解析的交易交给 TransactionWorker
+        while not self.parse_queue.empty():
+            transaction, block_time = self.parse_queue.get_nowait()
+            await self._spill(NEW_TX_DETAIL_CHANNEL, transaction, block_time)
+        await super().stop()
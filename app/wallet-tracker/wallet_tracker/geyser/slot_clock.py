@@ -0,0 +1,81 @@
+"""slot -> 区块时间
+
+Geyser 推送交易时区块尚未确认, 原先直接使用收到交易时的本地时间作为 blockTime,
+benchmark 的 detect / total 耗时和下游按 TxEvent.timestamp 判断的时效都以此为起点,
+实际上测不到链上到本地的延迟。
+
+订阅 `blocks_meta` 后, 每个区块结束时会收到该 slot 的 block_time。`SlotClock` 用定长
+环形缓冲区保存最近的 slot -> block_time:
+- slot 已有 block_meta 时返回真实的区块时间
+- 交易通常先于所在区块的 block_meta 到达, 此时按最近一个已知区块和 slot 间隔推算
+- 尚未收到任何 block_meta 时返回 None, 由调用方回退到本地时间
+"""
+
+from yellowstone_grpc.grpc import geyser_pb2
+
+# Solana 的目标出块间隔 (秒)
+SLOT_DURATION = 0.4
+
+
+class SlotClock:
+    """最近区块的 slot -> block_time
+
+    Args:
+        capacity: 环形缓冲区保存的 slot 数
+        slot_duration: 推算区块时间使用的 slot 间隔 (秒)
+    """
+
+    def __init__(self, capacity: int = 4096, slot_duration: float = SLOT_DURATION):
+        if capacity < 1:
+            raise ValueError("capacity must be greater than 0")
+        self.capacity = capacity
+        self.slot_duration = slot_duration
+        self._slots = [-1] * capacity
+        self._times = [0] * capacity
+        self.size = 0
+        self.latest_slot: int | None = None
+        self.latest_time = 0
+        self.exact = 0
+        self.estimated = 0
+        self.missing = 0
+
+    def update(self, slot: int, block_time: int) -> None:
+        index = slot % self.capacity
+        if self._slots[index] == -1:
+            self.size += 1
+        self._slots[index] = slot
+        self._times[index] = block_time
+        if self.latest_slot is None or slot >= self.latest_slot:
+            self.latest_slot = slot
+            self.latest_time = block_time
+
+    def observe(self, response: geyser_pb2.SubscribeUpdate) -> bool:
+        """记录 block_meta 消息, 其他消息返回 False"""
+        if response.WhichOneof("update_oneof") != "block_meta":
+            return False
+        block_meta = response.block_meta
+        # 部分区块没有 block_time
+        if block_meta.HasField("block_time"):
+            self.update(block_meta.slot, block_meta.block_time.timestamp)
+        return True
+
+    def block_time(self, slot: int) -> int | None:
+        """slot 的区块时间 (unix 秒), 没有任何已知区块时返回 None"""
+        index = slot % self.capacity
+        if self._slots[index] == slot:
+            self.exact += 1
+            return self._times[index]
+        if self.latest_slot is None:
+            self.missing += 1
+            return None
+        self.estimated += 1
+        return round(self.latest_time + (slot - self.latest_slot) * self.slot_duration)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.size,
+            "capacity": self.capacity,
+            "exact": self.exact,
+            "estimated": self.estimated,
+            "missing": self.missing,
+        }
@@ -0,0 +1,209 @@
+"""Geyser 多路订阅管理
+
+Geyser 的每个 SubscribeRequest 都会完全替换该 stream 上的订阅状态, 原先所有钱包共用
+一个 stream, 每次增删钱包都要重新发送全部钱包。大量钱包同时启用/暂停时 (例如
+`MonitorService.active_all`), 会触发大量的全量重新订阅。
+
+`SubscriptionManager` 将钱包按哈希分配到 N 个 stream (共用一个 gRPC channel):
+- 每个 stream 的钱包数有上限, 超出时顺延到下一个未满的 stream
+- 增删钱包只标记对应 stream, 在防抖窗口结束后每个 stream 只发送一次订阅请求
+- 单个 stream 断开只会重连该 stream
+- 传入 slot_clock 时, 第一个 stream 额外订阅 `blocks_meta`, 区块时间直接写入 slot_clock,
+  不经过响应队列 (不会因队列满被丢弃)
+"""
+
+import asyncio
+import zlib
+from dataclasses import dataclass, field
+
+from grpc.aio import AioRpcError
+from solbot_common.log import logger
+from yellowstone_grpc.client import GeyserClient
+from yellowstone_grpc.grpc import geyser_pb2
+
+from wallet_tracker.geyser.backpressure import ResponseQueue
+from wallet_tracker.geyser.slot_clock import SlotClock
+from wallet_tracker.replay import StreamRecorder
+
+# 交易过滤器名称, response.filters 中会带上该名称
+TRANSACTION_FILTER_NAME = "key"
+BLOCKS_META_FILTER_NAME = "blocks_meta"
+
+
+@dataclass
+class SubscriptionStream:
+    index: int
+    wallets: set[str] = field(default_factory=set)
+    request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
+    task: asyncio.Task | None = None
+    # 钱包有变化, 尚未发送订阅请求
+    dirty: bool = False
+    # 是否订阅 blocks_meta
+    block_meta: bool = False
+
+    def build_request(self) -> geyser_pb2.SubscribeRequest:
+        request = geyser_pb2.SubscribeRequest()
+        if self.wallets:
+            tx_filter = request.transactions[TRANSACTION_FILTER_NAME]
+            tx_filter.account_include.extend(sorted(self.wallets))
+            tx_filter.failed = False
+        else:
+            request.ping.id = 1
+        if self.block_meta:
+            request.blocks_meta[BLOCKS_META_FILTER_NAME].SetInParent()
+        return request
+
+
+class SubscriptionManager:
+    """将钱包分配到多个 Geyser stream 并合并订阅更新
+
+    Args:
+        response_queue: 所有 stream 收到的消息都放入该队列
+        streams: stream 数量
+        max_wallets_per_stream: 单个 stream 最多订阅的钱包数
+        debounce: 合并订阅更新的时间窗口 (秒)
+        retry_delay: stream 断开后的重连间隔 (秒)
+        recorder: 录制收到的消息, 用于离线回放
+        slot_clock: 记录区块时间, 为 None 时不订阅 blocks_meta
+    """
+
+    def __init__(
+        self,
+        response_queue: asyncio.Queue[geyser_pb2.SubscribeUpdate] | ResponseQueue,
+        streams: int = 1,
+        max_wallets_per_stream: int = 1000,
+        debounce: float = 0.1,
+        retry_delay: float = 5,
+        recorder: StreamRecorder | None = None,
+        slot_clock: SlotClock | None = None,
+    ):
+        if streams < 1:
+            raise ValueError("streams must be greater than 0")
+        self.response_queue = response_queue
+        self.streams = [SubscriptionStream(i) for i in range(streams)]
+        self.slot_clock = slot_clock
+        self.streams[0].block_meta = slot_clock is not None
+        self.max_wallets_per_stream = max_wallets_per_stream
+        self.debounce = debounce
+        self.retry_delay = retry_delay
+        self.recorder = recorder
+        self.assignments: dict[str, int] = {}
+        self.client: GeyserClient | None = None
+        self.is_running = False
+        self._flush_task: asyncio.Task | None = None
+
+    @property
+    def wallets(self) -> set[str]:
+        return set(self.assignments)
+
+    def shard_of(self, wallet: str) -> int:
+        """钱包所在的首选 stream, 使用 crc32 保证不同进程间结果一致"""
+        return zlib.crc32(wallet.encode()) % len(self.streams)
+
+    def add(self, wallet: str) -> bool:
+        """订阅钱包, 所有 stream 都已满时返回 False"""
+        if wallet in self.assignments:
+            return True
+
+        start = self.shard_of(wallet)
+        for offset in range(len(self.streams)):
+            stream = self.streams[(start + offset) % len(self.streams)]
+            if len(stream.wallets) < self.max_wallets_per_stream:
+                stream.wallets.add(wallet)
+                self.assignments[wallet] = stream.index
+                self._mark_dirty(stream)
+                return True
+
+        logger.error(
+            f"Cannot subscribe wallet {wallet}: all {len(self.streams)} streams are full "
+            f"({self.max_wallets_per_stream} wallets per stream)"
+        )
+        return False
+
+    def remove(self, wallet: str) -> bool:
+        """取消订阅钱包, 钱包未订阅时返回 False"""
+        index = self.assignments.pop(wallet, None)
+        if index is None:
+            return False
+        stream = self.streams[index]
+        stream.wallets.discard(wallet)
+        self._mark_dirty(stream)
+        return True
+
+    def _mark_dirty(self, stream: SubscriptionStream) -> None:
+        stream.dirty = True
+        if self.is_running and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.debounce)
+        self._flush_task = None
+        self.flush()
+
+    def flush(self) -> None:
+        """为有变化的 stream 发送订阅请求
+
+        未连接的 stream 保持 dirty, 重连时会使用最新的钱包列表订阅。
+        """
+        for stream in self.streams:
+            if not stream.dirty or stream.request_queue is None:
+                continue
+            logger.info(f"Updating geyser stream {stream.index}: {len(stream.wallets)} wallets")
+            stream.request_queue.put_nowait(stream.build_request())
+            stream.dirty = False
+
+    async def _run_stream(self, stream: SubscriptionStream) -> None:
+        """维持单个 stream, 断开后使用最新的钱包列表重新订阅"""
+        while self.is_running:
+            try:
+                assert self.client is not None
+                stream.dirty = False
+                stream.request_queue, responses = await self.client.subscribe_with_request(
+                    stream.build_request()
+                )
+                logger.info(
+                    f"Geyser stream {stream.index} subscribed: {len(stream.wallets)} wallets"
+                )
+                # 建立连接期间钱包有变化
+                if stream.dirty:
+                    self.flush()
+                async for response in responses:
+                    if not self.is_running:
+                        break
+                    if self.recorder is not None:
+                        self.recorder.record_update(response)
+                    if self.slot_clock is not None and self.slot_clock.observe(response):
+                        continue
+                    await self.response_queue.put(response)
+            except asyncio.CancelledError:
+                break
+            except AioRpcError as e:
+                logger.error(f"Geyser stream {stream.index} rpc error: {e.details()}")
+            except Exception as e:
+                logger.error(f"Geyser stream {stream.index} error: {e}")
+                logger.exception(e)
+
+            stream.request_queue = None
+            if self.is_running:
+                logger.info(f"Reconnecting geyser stream {stream.index} in {self.retry_delay}s")
+                await asyncio.sleep(self.retry_delay)
+
+    async def start(self, client: GeyserClient) -> None:
+        """在 client 上为每个分片建立 stream"""
+        self.client = client
+        self.is_running = True
+        for stream in self.streams:
+            stream.task = asyncio.create_task(self._run_stream(stream))
+
+    async def stop(self) -> None:
+        self.is_running = False
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        tasks = [stream.task for stream in self.streams if stream.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for stream in self.streams:
+            stream.task = None
+            stream.request_queue = None
@@ -1,30 +1,32 @@
 import asyncio
 import signal
 import time
-from collections.abc import AsyncGenerator, Sequence
+from collections.abc import Sequence
 
 import aioredis
 import base58
 import orjson as json
 from google.protobuf.json_format import (
-    Parse,
     _Printer,  # type: ignore
 )
 from google.protobuf.message import Message
-from grpc.aio import AioRpcError
 from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
 from yellowstone_grpc.client import GeyserClient
 from yellowstone_grpc.grpc import geyser_pb2
-from yellowstone_grpc.types import (
-    SubscribeRequest,
-    SubscribeRequestFilterTransactions,
-    SubscribeRequestPing,
-)
 
+from wallet_tracker.benchmark import benchmark_service
 from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.dedup import SIGNATURE_NAMESPACE, SignatureDeduplicator
+from wallet_tracker.geyser.backpressure import ResponseQueue, WorkerScaler
+from wallet_tracker.geyser.codec import transaction_to_rpc_dict
+from wallet_tracker.geyser.slot_clock import SlotClock
+from wallet_tracker.geyser.subscription import SubscriptionManager
+from wallet_tracker.ingress import BatchPusher
+from wallet_tracker.replay import StreamRecorder
 
 
 def should_convert_to_base58(value) -> bool:
@@ -79,19 +81,75 @@ class TransactionDetailSubscriber:
         self.api_key = api_key
         self.geyser_client = None
         self.wallets = wallets
-        self.subscribed_wallets = {str(wallet) for wallet in wallets}
         self.redis = redis_client
+        self.pusher = BatchPusher(redis_client)
+        # 与 WSS 日志订阅共用 namespace, 两者同时运行时只处理一次
+        self.dedup = SignatureDeduplicator(redis_client, SIGNATURE_NAMESPACE)
         self.is_running = False
         self.retry_count = 0
         self.max_retries = 3
         self.retry_delay = 5  # seconds
 
-        self.request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
-        self.responses: AsyncGenerator[geyser_pb2.SubscribeUpdate, None] | None = None
-        # 响应处理相关
-        self.response_queue = asyncio.Queue(maxsize=1000)
-        self.worker_nums = 2
-        self.workers: list[asyncio.Task] = []
+        # 响应处理相关: 队列满时降级而不是阻塞 gRPC 读取, worker 数随队列深度伸缩
+        geyser = settings.rpc.geyser
+        self.response_queue = ResponseQueue(
+            maxsize=geyser.response_queue_size,
+            overflow=geyser.overflow,
+            spill=self._spill_response,
+            ping_watermark=geyser.ping_watermark,
+        )
+        self.scaler = WorkerScaler(
+            self.response_queue,
+            self._process_response_worker,
+            min_workers=geyser.min_workers,
+            max_workers=geyser.max_workers,
+            interval=geyser.scale_interval,
+            scale_up_ratio=geyser.scale_up_ratio,
+        )
+        benchmark_service.register_queue("geyser_response", self.queue_stats)
+        self.recorder = (
+            StreamRecorder(settings.monitor.record_path) if settings.monitor.record_path else None
+        )
+        # 订阅 blocks_meta, 用真实的区块时间代替收到交易时的本地时间
+        self.slot_clock = SlotClock(geyser.slot_clock_size) if geyser.block_meta else None
+        if self.slot_clock is not None:
+            benchmark_service.register_queue("geyser_slot_clock", self.slot_clock.stats)
+        # 钱包按哈希分配到多个 stream
+        self.subscriptions = SubscriptionManager(
+            self.response_queue,
+            streams=settings.rpc.geyser.streams,
+            max_wallets_per_stream=settings.rpc.geyser.max_wallets_per_stream,
+            debounce=settings.rpc.geyser.subscribe_debounce,
+            retry_delay=self.retry_delay,
+            recorder=self.recorder,
+            slot_clock=self.slot_clock,
+        )
+        for wallet in wallets:
+            self.subscriptions.add(str(wallet))
+
+    @property
+    def subscribed_wallets(self) -> set[str]:
+        return self.subscriptions.wallets
+
+    @property
+    def workers(self) -> list[asyncio.Task]:
+        return self.scaler.workers
+
+    def set_priority_wallets(self, wallets: Sequence[str]) -> None:
+        """设置优先处理的钱包 (有跟单的钱包), 队列满时最后被淘汰"""
+        self.response_queue.set_priority_wallets(wallets)
+        logger.info(f"Prioritizing {len(wallets)} wallets in geyser response queue")
+
+    def block_time(self, slot: int) -> int:
+        """slot 的区块时间, 未订阅 blocks_meta 或尚未收到区块时间时使用本地时间"""
+        if self.slot_clock is not None:
+            block_time = self.slot_clock.block_time(slot)
+            if block_time is not None:
+                return block_time
+        return int(time.time())
+
+    def queue_stats(self) -> dict:
+        return {**self.response_queue.stats(), "workers": len(self.scaler.workers)}
 
     async def _connect(self) -> None:
         """Connect to Geyser service with retry mechanism."""
@@ -113,70 +171,37 @@ class TransactionDetailSubscriber:
                 )
                 await asyncio.sleep(self.retry_delay)
 
-    async def _reconnect_and_subscribe(self) -> None:
-        logger.info("Attempting to reconnect...")
-        await asyncio.sleep(self.retry_delay)
-        await self._connect()
-
-        if self.geyser_client is None:
-            raise RuntimeError("Geyser client is not connected")
-
-        # Create subscription request
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-
-        # Subscribe to updates
-        logger.info("Subscribing to account updates...")
-        (
-            self.request_queue,
-            self.responses,
-        ) = await self.geyser_client.subscribe_with_request(pb_request)
-
-    def __build_subscribe_request(self) -> SubscribeRequest:
-        logger.info(f"Subscribing to accounts: {self.subscribed_wallets}")
-
-        params = {}
-
-        if len(self.subscribed_wallets) != 0:
-            params["transactions"] = {
-                "key": SubscribeRequestFilterTransactions(
-                    account_include=list(self.subscribed_wallets),
-                    failed=False,
-                )
-            }
-        else:
-            params["ping"] = SubscribeRequestPing(id=1)
-
-        subscribe_request = SubscribeRequest(**params)
-        return subscribe_request
-
-    async def _process_transaction(self, transaction: dict) -> None:
+    async def _process_transaction(
+        self, transaction: geyser_pb2.SubscribeUpdateTransaction
+    ) -> None:
         """Process and store transaction in Redis."""
         if self.redis is None:
             raise Exception("Redis is not connected")
 
         try:
-            signature = transaction["transaction"]["signature"]
             # 构建成 rpc 返回的结构，方便统一解析交易数据
-            data = {
-                **transaction["transaction"],
-            }
-            data["slot"] = int(transaction["slot"])
-            data["version"] = 0
-            # 只有被确认之后才会有 blockTime, 所以这里设置为当前时间
-            data["blockTime"] = int(time.time())
+            data = transaction_to_rpc_dict(
+                transaction, block_time=self.block_time(transaction.slot)
+            )
+            signature = data["transaction"]["signatures"][0]
 
             tx_info_json = json.dumps(data)
             # Store in Redis using LIST structure
-            # 将交易信息添加到列表左端（最新的交易在最前面）
-            await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, tx_info_json)
-            # 保持列表长度在合理范围内（比如最多保留1000条交易记录）
-            # await self.redis.ltrim(NEW_TX_DETAIL_CHANNEL, 0, 999)
+            # 将交易信息添加到列表左端（最新的交易在最前面）, 批量写入
+            # 列表长度由 queue_limits 限制, 超出时丢弃最早的交易
+            await self.pusher.push(NEW_TX_DETAIL_CHANNEL, tx_info_json)
             logger.info(f"Added transaction '{signature}' to queue")
         except Exception as e:
             logger.exception(f"Error processing transaction: {e}")
 
+    async def _spill_response(self, response: geyser_pb2.SubscribeUpdate) -> None:
+        """响应队列已满时被淘汰的交易直接交给 `_process_transaction`
+
+        跳过签名去重 (少一次 Redis 往返), 重复的交易由 TxEvent 去重兜底。
+        """
+        if response.WhichOneof("update_oneof") == "transaction" and response.filters:
+            await self._process_transaction(response.transaction)
+
     async def _process_response_worker(self):
         """Process responses from the queue."""
         logger.info(f"Starting response worker {id(asyncio.current_task())}")
@@ -184,12 +209,23 @@ class TransactionDetailSubscriber:
             try:
                 response = await self.response_queue.get()
                 try:
-                    response_dict = proto_to_dict(response)
-                    if "ping" in response_dict:
-                        logger.debug(f"Got ping response: {response_dict}")
-                    if "filters" in response_dict and "transaction" in response_dict:
-                        logger.debug(f"Got transaction response: \n {response_dict}")
-                        await self._process_transaction(response_dict["transaction"])
+                    # 直接读取 protobuf 字段, 避免将整个消息转换为 dict
+                    update_type = response.WhichOneof("update_oneof")
+                    if update_type == "ping":
+                        logger.debug("Got ping response")
+                    elif update_type == "block_meta":
+                        # 直接订阅时由 SubscriptionManager 处理, 这里只会收到回放的消息
+                        if self.slot_clock is not None:
+                            self.slot_clock.observe(response)
+                    elif update_type == "transaction" and response.filters:
+                        logger.debug(f"Got transaction response, slot: {response.transaction.slot}")
+                        signature = str(
+                            Signature.from_bytes(response.transaction.transaction.signature)
+                        )
+                        if await self.dedup.is_new(signature):
+                            await self._process_transaction(response.transaction)
+                        else:
+                            logger.debug(f"Skipping duplicate transaction: {signature}")
                 except Exception as e:
                     logger.error(f"Error processing response: {e}")
                     logger.exception(e)
@@ -203,10 +239,10 @@ class TransactionDetailSubscriber:
 
     async def _start_workers(self):
         """Start response processing workers."""
-        logger.info(f"Starting {self.worker_nums} response workers")
-        self.workers = [
-            asyncio.create_task(self._process_response_worker()) for _ in range(self.worker_nums)
-        ]
+        logger.info(
+            f"Starting {self.scaler.min_workers} response workers (up to {self.scaler.max_workers})"
+        )
+        self.scaler.start()
 
     async def _stop_workers(self):
         """Stop response processing workers."""
@@ -216,11 +252,7 @@ class TransactionDetailSubscriber:
             await self.response_queue.join()
 
         # 取消所有工作协程
-        for worker in self.workers:
-            worker.cancel()
-        if self.workers:
-            await asyncio.gather(*self.workers, return_exceptions=True)
-        self.workers.clear()
+        await self.scaler.stop()
 
     async def start(self) -> None:
         """Start monitoring wallet transactions."""
@@ -238,37 +270,9 @@ class TransactionDetailSubscriber:
             if self.geyser_client is None:
                 raise Exception("Geyser client is not connected")
 
-            # Create subscription request
-            subscribe_request = SubscribeRequest(ping=SubscribeRequestPing(id=1))
-            pb_request = Parse(subscribe_request.model_dump_json(), geyser_pb2.SubscribeRequest())
-
-            # Subscribe to updates
+            # 为每个分片建立 stream 并订阅
             logger.info("Subscribing to account updates...")
-            (
-                self.request_queue,
-                self.responses,
-            ) = await self.geyser_client.subscribe_with_request(pb_request)
-
-            async def _f():
-                """Process responses from the queue."""
-                logger.info(f"Starting response worker {id(asyncio.current_task())}")
-
-                while self.is_running:
-                    try:
-                        async for response in self.responses:
-                            if not self.is_running:
-                                break
-                            await self.response_queue.put(response)
-                    except AioRpcError as e:
-                        logger.error(f"Rpc Error: {e._details}")
-                        await self._reconnect_and_subscribe()
-                    except Exception as e:
-                        logger.exception(e)
-                        await self._reconnect_and_subscribe()
-
-            monitor_task = asyncio.create_task(_f())
-            # 添加任务完成回调以处理可能的异常
-            monitor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
+            await self.subscriptions.start(self.geyser_client)
         except asyncio.CancelledError:
             logger.info("Monitor cancelled, shutting down...")
         except Exception as e:
@@ -283,9 +287,20 @@ class TransactionDetailSubscriber:
         logger.info("Stopping wallet monitor...")
         self.is_running = False
 
+        # 关闭所有 stream
+        await self.subscriptions.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+
         # 等待所有工作协程完成
         await self._stop_workers()
 
+        # 写入缓冲区中剩余的交易
+        try:
+            await self.pusher.close()
+        except Exception as e:
+            logger.error(f"Error flushing transactions to Redis: {e}")
+
         # 关闭 geyser client
         if self.geyser_client:
             try:
@@ -307,54 +322,25 @@ class TransactionDetailSubscriber:
     async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """订阅钱包的交易信息。
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+        每次发送新的订阅请求都会完全替换该 stream 之前的订阅状态, 因此只更新钱包所在的
+        stream, 并且防抖窗口内的多次变更只发送一次请求。
 
         Args:
             wallet (Pubkey): 要订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
-
-        if str(wallet) in self.subscribed_wallets:
+        if str(wallet) in self.subscriptions.assignments:
             logger.warning(f"Wallet {wallet} already subscribed")
             return
-
-        # 添加到订阅集合
-        self.subscribed_wallets.add(str(wallet))
-
-        # 发送订阅请求，包含所有已订阅的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
+        self.subscriptions.add(str(wallet))
 
     async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """取消订阅钱包的交易信息。
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
-
         Args:
             wallet (Pubkey): 要取消订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
-
-        if str(wallet) not in self.subscribed_wallets:
+        if not self.subscriptions.remove(str(wallet)):
             logger.warning(f"Wallet {wallet} not subscribed")
-            return
-
-        # 从订阅集合中移除钱包
-        self.subscribed_wallets.remove(str(wallet))
-
-        # 发送新的订阅请求，只包含剩余的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
 
 
 if __name__ == "__main__":
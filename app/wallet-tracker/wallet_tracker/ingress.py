@@ -0,0 +1,357 @@
+"""Redis 队列批量读写
+
+交易签名 (`NEW_TX_SIGNATURE_CHANNEL`) 与交易详情 (`NEW_TX_DETAIL_CHANNEL`) 原先每条消息
+各需一次 LPUSH / BRPOP, 高负载下 Redis 往返次数成为瓶颈。
+
+- `BatchPusher`: 写入先进入本地缓冲区, 达到数量上限或超过等待时间后通过 pipeline 一次写入
+- `BatchPopper`: 一次往返最多取出 count 条消息。Redis >= 7.0 使用 BLMPOP,
+  旧版本先 BRPOP 阻塞等待第一条, 再用 Lua 脚本原子地取出剩余部分
+
+两者保持与 LPUSH + BRPOP 相同的先进先出顺序。
+
+队列有容量上限 (`queue_limits`): 写入时在同一 pipeline 中 LTRIM, 超出部分从最早的一端
+丢弃 (过时的交易已没有跟单价值), 避免下游处理不过来时耗尽共用 Redis 的内存。失败队列
+(`FAILED_TX_DETAIL_CHANNEL` / `FAILED_TX_SIGNATURE_CHANNEL`) 的消息带有失败时间, 由
+`QueueCompactor` 定期删除超过保留时间的消息。
+"""
+
+import asyncio
+import time
+
+import aioredis
+import orjson as json
+from aioredis.exceptions import RedisError, ResponseError
+from solbot_common.log import logger
+
+# 从列表右端 (最早写入的一端) 取出至多 ARGV[1] 条消息, 按写入顺序返回
+_POP_BATCH_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], -tonumber(ARGV[1]), -1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], 0, -#items - 1)
+end
+local result = {}
+for i = #items, 1, -1 do
+    result[#result + 1] = items[i]
+end
+return result
+"""
+
+
+# 从列表右端 (最早写入的一端) 删除失败时间早于 ARGV[1] 的消息, 每次最多检查 ARGV[2] 条
+# 没有失败时间的消息是旧格式, 早于所有带时间的消息, 同样删除
+_EXPIRE_FAILED_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], -tonumber(ARGV[2]), -1)
+local expired = 0
+for i = #items, 1, -1 do
+    local failed_at = tonumber(string.match(items[i], '^{"failed_at":([%d%.]+)'))
+    if failed_at ~= nil and failed_at >= tonumber(ARGV[1]) then
+        break
+    end
+    expired = expired + 1
+end
+if expired > 0 then
+    redis.call('LTRIM', KEYS[1], 0, -expired - 1)
+end
+return expired
+"""
+
+
+def wrap_failed(data: str) -> str:
+    """为写入失败队列的消息加上失败时间"""
+    return json.dumps({"failed_at": round(time.time(), 3), "data": data}).decode("utf-8")
+
+
+def unwrap_failed(entry: str) -> tuple[float | None, str]:
+    """解析失败队列中的消息, 返回 (失败时间, 原始消息), 旧格式的消息没有失败时间"""
+    if entry.startswith('{"failed_at":'):
+        try:
+            data = json.loads(entry)
+            return data["failed_at"], data["data"]
+        except (json.JSONDecodeError, KeyError):
+            pass
+    return None, entry
+
+
+class QueueLimits:
+    """Redis 队列的容量上限与丢弃计数, 进程内共用 `queue_limits`"""
+
+    def __init__(self):
+        # 队列名 -> 容量上限, 不在其中的队列不限制
+        self.limits: dict[str, int] = {}
+        self.dropped: dict[str, dict[str, int]] = {}
+        # 最近一次写入或整理时观察到的队列长度
+        self.depths: dict[str, int] = {}
+
+    def configure(self, limits: dict[str, int]) -> None:
+        """设置容量上限, 0 表示不限制"""
+        self.limits = {key: limit for key, limit in limits.items() if limit > 0}
+
+    def record_dropped(self, key: str, reason: str, count: int) -> None:
+        if count <= 0:
+            return
+        dropped = self.dropped.setdefault(key, {})
+        total = dropped.get(reason, 0)
+        dropped[reason] = total + count
+        # 每丢弃约 1000 条输出一次日志
+        if total // 1000 != (total + count) // 1000 or total == 0:
+            logger.warning(f"Dropped {count} messages from {key} ({reason}), total: {dropped}")
+
+    def stats(self, key: str) -> dict:
+        return {
+            "depth": self.depths.get(key, 0),
+            "capacity": self.limits.get(key, 0),
+            "dropped": dict(self.dropped.get(key, {})),
+        }
+
+
+queue_limits = QueueLimits()
+
+
+class BatchPusher:
+    """批量 LPUSH
+
+    写入 Redis 失败时消息放回缓冲区, 并按指数退避 (retry_delay 起, 最长 max_retry_delay)
+    安排重试, 不依赖之后的 push 触发。故障期间缓冲区最多保留 max_buffer 条消息, 超出时
+    丢弃最早的消息, 计入 `limits` 的丢弃数。
+
+    Args:
+        redis: Redis 客户端
+        max_batch_size: 缓冲区达到该数量时立即写入
+        max_delay: 第一条消息进入缓冲区后最多等待的秒数
+        limits: 队列容量上限, 超出时丢弃最早的消息
+        max_buffer: 本地缓冲区最多保留的消息数
+        retry_delay: 写入失败后首次重试的等待秒数
+        max_retry_delay: 重试等待的上限 (秒)
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        max_batch_size: int = 100,
+        max_delay: float = 0.002,
+        limits: QueueLimits = queue_limits,
+        max_buffer: int = 10_000,
+        retry_delay: float = 0.05,
+        max_retry_delay: float = 5,
+    ):
+        self.redis = redis
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.limits = limits
+        self.max_buffer = max_buffer
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.buffers: dict[str, list[str | bytes]] = {}
+        self.size = 0
+        self._flush_task: asyncio.Task | None = None
+        # 连续写入失败后的下一次重试等待秒数, 0 表示 Redis 正常
+        self._backoff = 0.0
+
+    async def push(self, key: str, value: str | bytes) -> None:
+        """写入一条消息, 可能不会立即发送到 Redis"""
+        self.buffers.setdefault(key, []).append(value)
+        self.size += 1
+        self._enforce_buffer_limit()
+        # 重试等待期间由已安排的重试写入
+        if self.size >= self.max_batch_size and not self._backoff:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later(self.max_delay))
+
+    def _enforce_buffer_limit(self) -> None:
+        """缓冲区超过 max_buffer 时从最长的队列丢弃最早的消息"""
+        while self.size > self.max_buffer:
+            key = max(self.buffers, key=lambda k: len(self.buffers[k]))
+            values = self.buffers[key]
+            count = min(self.size - self.max_buffer, len(values))
+            del values[:count]
+            self.size -= count
+            self.limits.record_dropped(key, "buffer", count)
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush batch to Redis: {e}")
+
+    def _schedule_retry(self) -> None:
+        self._backoff = min(max(self._backoff * 2, self.retry_delay), self.max_retry_delay)
+        if self._flush_task is None or self._flush_task is asyncio.current_task():
+            self._flush_task = asyncio.create_task(self._flush_later(self._backoff))
+
+    async def flush(self) -> None:
+        """将缓冲区中的消息通过 pipeline 写入 Redis
+
+        有容量上限的队列在 LPUSH 之后 LTRIM, 根据 LPUSH 返回的长度记录丢弃数。
+        写入失败时消息会放回缓冲区, 并按退避时间安排重试。
+        """
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self.size == 0:
+            return
+
+        buffers, self.buffers, self.size = self.buffers, {}, 0
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                trimmed: list[tuple[str, int]] = []
+                for key, values in buffers.items():
+                    pipe.lpush(key, *values)
+                    limit = self.limits.limits.get(key)
+                    trimmed.append((key, limit or 0))
+                    if limit:
+                        pipe.ltrim(key, 0, limit - 1)
+                results = iter(await pipe.execute())
+        except RedisError:
+            for key, values in buffers.items():
+                self.buffers[key] = values + self.buffers.get(key, [])
+                self.size += len(values)
+            self._enforce_buffer_limit()
+            self._schedule_retry()
+            raise
+        self._backoff = 0.0
+
+        for key, limit in trimmed:
+            length = next(results)
+            if limit:
+                next(results)
+                self.limits.record_dropped(key, "overflow", length - limit)
+                length = min(length, limit)
+            self.limits.depths[key] = length
+
+    async def close(self) -> None:
+        """写入剩余的消息"""
+        await self.flush()
+
+
+class BatchPopper:
+    """批量 BRPOP
+
+    Args:
+        redis: Redis 客户端
+        key: 队列名
+        count: 单次最多取出的消息数
+        timeout: 队列为空时最多阻塞的秒数
+    """
+
+    def __init__(self, redis: aioredis.Redis, key: str, count: int = 100, timeout: float = 1):
+        self.redis = redis
+        self.key = key
+        self.count = count
+        self.timeout = timeout
+        # None 表示尚未探测服务端是否支持 BLMPOP
+        self.blmpop_supported: bool | None = None
+
+    async def pop_nowait(self) -> list[str]:
+        """不阻塞地从队列右端取出至多 count 条消息, 队列为空时返回空列表"""
+        return list(await self.redis.eval(_POP_BATCH_SCRIPT, 1, self.key, self.count))
+
+    async def pop(self) -> list[str]:
+        """阻塞地从队列右端取出至多 count 条消息
+
+        Returns:
+            按写入顺序排列的消息, 超时返回空列表
+        """
+        if self.blmpop_supported is not False:
+            try:
+                result = await self.redis.execute_command(
+                    "BLMPOP", self.timeout, 1, self.key, "RIGHT", "COUNT", self.count
+                )
+                self.blmpop_supported = True
+                if result is None:
+                    return []
+                return list(result[1])
+            except ResponseError as e:
+                if self.blmpop_supported or "unknown command" not in str(e).lower():
+                    raise
+                logger.info("BLMPOP is not supported by Redis server, falling back to Lua script")
+                self.blmpop_supported = False
+
+        first = await self.redis.brpop(self.key, timeout=self.timeout)
+        if first is None:
+            return []
+        items = [first[1]]
+        if self.count > 1:
+            items.extend(await self.redis.eval(_POP_BATCH_SCRIPT, 1, self.key, self.count - 1))
+        return items
+
+
+class QueueCompactor:
+    """定期整理 Redis 队列
+
+    - 所有有容量上限的队列: LTRIM 到上限 (其他进程可能不经过 `BatchPusher` 写入)
+    - 失败队列: 删除失败时间超过 ttl 的消息
+
+    Args:
+        redis: Redis 客户端
+        failed_keys: 失败队列名
+        ttl: 失败队列中消息的保留时间 (秒), 0 表示不过期
+        interval: 整理间隔 (秒)
+        scan_size: 单次从失败队列最早的一端检查的消息数
+        limits: 队列容量上限
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        failed_keys: list[str],
+        ttl: float = 86400,
+        interval: float = 60,
+        scan_size: int = 1000,
+        limits: QueueLimits = queue_limits,
+    ):
+        self.redis = redis
+        self.failed_keys = failed_keys
+        self.ttl = ttl
+        self.interval = interval
+        self.scan_size = scan_size
+        self.limits = limits
+        self._stop = asyncio.Event()
+
+    async def expire(self, key: str) -> int:
+        """删除失败队列中过期的消息, 返回删除数"""
+        deadline = time.time() - self.ttl
+        total = 0
+        while True:
+            expired = await self.redis.eval(_EXPIRE_FAILED_SCRIPT, 1, key, deadline, self.scan_size)
+            total += expired
+            if expired < self.scan_size:
+                break
+        self.limits.record_dropped(key, "expired", total)
+        return total
+
+    async def trim(self, key: str, limit: int) -> int:
+        """将队列截断到容量上限, 返回丢弃数"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.llen(key)
+            pipe.ltrim(key, 0, limit - 1)
+            length, _ = await pipe.execute()
+        self.limits.record_dropped(key, "overflow", length - limit)
+        self.limits.depths[key] = min(length, limit)
+        return max(length - limit, 0)
+
+    async def compact(self) -> None:
+        if self.ttl > 0:
+            for key in self.failed_keys:
+                await self.expire(key)
+        for key, limit in self.limits.limits.items():
+            await self.trim(key, limit)
+
+    async def start(self):
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                await self.compact()
+            except RedisError as e:
+                logger.error(f"Failed to compact Redis queues: {e}")
+            except Exception as e:
+                logger.exception(f"Queue compactor error: {e}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        self._stop.set()
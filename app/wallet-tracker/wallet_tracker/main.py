@@ -9,9 +9,20 @@ from solbot_common.utils import get_async_client
 from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
 
-from wallet_tracker.benchmark import BenchmarkService
+from wallet_tracker.benchmark import MetricsServer, benchmark_service
+from wallet_tracker.constants import (
+    FAILED_TX_DETAIL_CHANNEL,
+    FAILED_TX_SIGNATURE_CHANNEL,
+    NEW_TX_DETAIL_CHANNEL,
+    NEW_TX_SIGNATURE_CHANNEL,
+)
+from wallet_tracker.ingress import QueueCompactor, queue_limits
+from wallet_tracker.reorder import close_tx_event_producer
+from wallet_tracker.reprocessor import FailedTxReprocessor
 from wallet_tracker.tx_monitor import TxMonitor
 from wallet_tracker.tx_worker import TransactionWorker
+from wallet_tracker.wss.hedged_fetcher import HedgedFetcher
+from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
 
 
 class WalletTracker:
@@ -20,8 +31,62 @@ class WalletTracker:
         self.client = get_async_client()
         self.wallets = init_wallets
         self.transaction_monitor = TxMonitor(self.wallets, mode=settings.monitor.mode)
-        self.transaction_worker = TransactionWorker(self.redis)
-        self.benchmark_service = BenchmarkService()
+        self.transaction_worker = TransactionWorker(
+            self.redis, parse_processes=settings.monitor.parse_processes
+        )
+        metrics = settings.monitor.metrics
+        self.benchmark_service = benchmark_service
+        self.benchmark_service.configure(
+            interval=metrics.interval,
+            trace_sample_rate=metrics.trace_sample_rate,
+            max_traces=metrics.max_traces,
+        )
+        self.metrics_server = (
+            MetricsServer(metrics.host, metrics.port, self.benchmark_service)
+            if metrics.port
+            else None
+        )
+        # Redis 队列的容量上限与失败队列的过期整理
+        queues = settings.monitor.queues
+        queue_limits.configure(
+            {
+                NEW_TX_SIGNATURE_CHANNEL: queues.tx_signature,
+                NEW_TX_DETAIL_CHANNEL: queues.tx_detail,
+                FAILED_TX_SIGNATURE_CHANNEL: queues.failed,
+                FAILED_TX_DETAIL_CHANNEL: queues.failed,
+            }
+        )
+        failed_keys = [FAILED_TX_SIGNATURE_CHANNEL, FAILED_TX_DETAIL_CHANNEL]
+        self.queue_compactor = QueueCompactor(
+            self.redis,
+            failed_keys,
+            ttl=queues.failed_ttl,
+            interval=queues.compact_interval,
+        )
+        for key in [NEW_TX_SIGNATURE_CHANNEL, NEW_TX_DETAIL_CHANNEL, *failed_keys]:
+            self.benchmark_service.register_queue(key, lambda key=key: queue_limits.stats(key))
+
+        # 重试失败的交易
+        retry = settings.monitor.retry
+        self.reprocessor = None
+        if retry.enable:
+            fetcher = HedgedFetcher(
+                [
+                    (f"Raw-{i}", TxDetailRawFetcher(endpoint).fetch)
+                    for i, endpoint in enumerate(settings.rpc.endpoints)
+                ]
+            )
+            self.reprocessor = FailedTxReprocessor(
+                self.redis,
+                fetcher.fetch,
+                max_age=retry.max_age,
+                max_attempts=retry.max_attempts,
+                base_delay=retry.base_delay,
+                max_delay=retry.max_delay,
+                batch_size=retry.batch_size,
+                interval=retry.interval,
+            )
+            self.benchmark_service.register_queue("tx_retry", self.reprocessor.stats)
 
     # @provide_session
     # async def sync_wallet(self, *, session: AsyncSession = NEW_ASYNC_SESSION):
@@ -54,18 +119,31 @@ class WalletTracker:
 
     async def start(self):
         # await self.sync_wallet()
-        # 使用 asyncio.gather 并发执行监控任务
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
 
-        await asyncio.gather(
+        # 使用 asyncio.gather 并发执行监控任务
+        tasks = [
             self.benchmark_service.start(),
+            self.queue_compactor.start(),
             self.transaction_monitor.start(),
             self.transaction_worker.start(),
-        )
+        ]
+        if self.reprocessor is not None:
+            tasks.append(self.reprocessor.start())
+        await asyncio.gather(*tasks)
 
     async def stop(self):
         await self.transaction_monitor.stop()
         await self.transaction_worker.stop()
+        if self.reprocessor is not None:
+            await self.reprocessor.stop()
+        # 发布重排缓冲区中剩余的事件
+        await close_tx_event_producer()
         await self.benchmark_service.stop()
+        await self.queue_compactor.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,295 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+from solbot_common.constants import SWAP_PROGRAMS, TOKEN_PROGRAM_ID, WSOL
+from solbot_common.types import SolAmountChange, TokenAmountChange, TxEvent, TxType
+
+from wallet_tracker.exceptions import (
+    NotSwapTransaction,
+    UnknownTransactionType,
+    ZeroChangeAmountError,
+)
+
+from .events import SwapEvent, iter_invoked_programs, iter_program_data, registry
+from .protocol import TransactionParserInterface
+
+SWAP_PROGRAM_IDS = frozenset(SWAP_PROGRAMS)
+TOKEN_PROGRAM_ID_STR = str(TOKEN_PROGRAM_ID)
+WSOL_STR = str(WSOL)
+
+# (owner, mint, program_id, amount, decimals)
+TokenBalance = tuple[str, str, str, str, int]
+
+
+class IndexedTXParser(ABC, TransactionParserInterface):
+    """交易解析基类
+
+    一次遍历 pre/post token balances 建立 `(owner, mint) -> [pre, post, decimals]` 索引,
+    并同时确定交易涉及的 mint。解析结果只缓存在实例上 (`__slots__`), 不使用
+    `functools.cache`, 解析器释放后不会残留在进程中。
+
+    子类需要实现交易来源相关的字段读取 (抽象方法未实现时无法实例化):
+    - `get_block_time` / `get_tx_hash`
+    - `get_slot` / `get_tx_index`: 可选, 默认为 None
+    - `_get_signer`: 交易签名者
+    - `_iter_token_balances`: pre 或 post token balances
+    - `_get_sol_balances`: 签名者交易前后的 SOL 余额
+    - `_iter_log_messages`: 交易日志
+    - `_iter_inner_instruction_data`: 已注册程序的内部指令数据 (emit_cpi 事件)
+
+    能解码出交易事件时 (见 `events.registry`), swap 程序与 mint 取自事件; 事件覆盖了
+    全部代币变化且报价代币为 SOL 时, SOL 数量取自事件, 不包含手续费、小费与租金。
+    """
+
+    __slots__ = ("_events", "_index", "_mint", "_token_amount_change", "_who")
+
+    def __init__(self) -> None:
+        self._who: str | None = None
+        self._index: dict[tuple[str, str], list] | None = None
+        self._mint: str | None = None
+        self._token_amount_change: TokenAmountChange | None = None
+        self._events: list[SwapEvent] | None = None
+
+    @abstractmethod
+    def _get_signer(self) -> str:
+        pass
+
+    def get_slot(self) -> int | None:
+        return None
+
+    def get_tx_index(self) -> int | None:
+        return None
+
+    @abstractmethod
+    def _iter_token_balances(self, post: bool) -> Iterable[TokenBalance]:
+        pass
+
+    @abstractmethod
+    def _get_sol_balances(self) -> tuple[int, int]:
+        pass
+
+    @abstractmethod
+    def _iter_log_messages(self) -> Iterable[str]:
+        pass
+
+    @abstractmethod
+    def _iter_inner_instruction_data(self) -> Iterable[tuple[str, bytes]]:
+        """遍历内部指令的 (program id, data), 只需返回 `registry` 中的程序"""
+
+    def get_swap_events(self) -> list[SwapEvent]:
+        """交易中的 swap 事件, 优先使用内部指令 (emit_cpi), 没有时再读取日志 (emit!)"""
+        if self._events is None:
+            events = list(registry.decode_all(self._iter_inner_instruction_data()))
+            if not events:
+                events = list(registry.decode_all(iter_program_data(self._iter_log_messages())))
+            self._events = events
+        return self._events
+
+    def get_who(self) -> str:
+        if self._who is None:
+            self._who = self._get_signer()
+        return self._who
+
+    def _build_index(self) -> dict[tuple[str, str], list]:
+        """建立 token balance 索引
+
+        同一 (owner, mint) 出现多次时只取第一条, decimals 优先取 post 中的值,
+        与逐项扫描的结果一致。
+        """
+        if self._index is not None:
+            return self._index
+
+        who = self.get_who()
+        index: dict[tuple[str, str], list] = {}
+        pre_mint = None
+        post_mint = None
+
+        for owner, mint, program_id, amount, decimals in self._iter_token_balances(post=False):
+            key = (owner, mint)
+            if key not in index:
+                index[key] = [int(amount), None, decimals]
+            if (
+                pre_mint is None
+                and owner == who
+                and program_id == TOKEN_PROGRAM_ID_STR
+                and mint != WSOL_STR
+            ):
+                pre_mint = mint
+
+        for owner, mint, program_id, amount, decimals in self._iter_token_balances(post=True):
+            key = (owner, mint)
+            entry = index.get(key)
+            if entry is None:
+                index[key] = [None, int(amount), decimals]
+            elif entry[1] is None:
+                entry[1] = int(amount)
+                entry[2] = decimals
+            if (
+                post_mint is None
+                and owner == who
+                and program_id == TOKEN_PROGRAM_ID_STR
+                and mint != WSOL_STR
+            ):
+                post_mint = mint
+
+        self._index = index
+        self._mint = post_mint if post_mint is not None else pre_mint
+        # 多跳交易中签名者可能持有中间代币, 事件中带有 mint 时以事件为准
+        for event in self.get_swap_events():
+            if event.mint is not None and event.user == who and (who, event.mint) in index:
+                self._mint = event.mint
+                break
+        return index
+
+    def get_mint(self) -> str:
+        self._build_index()
+        if self._mint is None:
+            raise ValueError("mint not found")
+        return self._mint
+
+    def get_token_amount_change(self) -> TokenAmountChange:
+        if self._token_amount_change is not None:
+            return self._token_amount_change
+
+        index = self._build_index()
+        entry = index.get((self.get_who(), self.get_mint()))
+        pre_token_amount = 0
+        post_token_amount = 0
+        decimals = 6
+        if entry is not None:
+            pre_token_amount = entry[0] or 0
+            post_token_amount = entry[1] or 0
+            decimals = entry[2]
+
+        self._token_amount_change = {
+            "change_amount": post_token_amount - pre_token_amount,
+            "decimals": decimals,
+            "pre_balance": pre_token_amount,
+            "post_balance": post_token_amount,
+        }
+        return self._token_amount_change
+
+    def get_sol_amount_change(self) -> SolAmountChange:
+        pre_sol_balance, post_sol_balance = self._get_sol_balances()
+        return {
+            "change_amount": post_sol_balance - pre_sol_balance,
+            "decimals": 9,
+            "pre_balance": pre_sol_balance,
+            "post_balance": post_sol_balance,
+        }
+
+    def get_tx_type(self) -> TxType:
+        token_amount_change = self.get_token_amount_change()
+        change_ui_amount = token_amount_change["change_amount"] / (
+            10 ** token_amount_change["decimals"]
+        )
+        pre_balance = token_amount_change["pre_balance"] / (10 ** token_amount_change["decimals"])
+        post_balance = token_amount_change["post_balance"] / (10 ** token_amount_change["decimals"])
+        if change_ui_amount > 0:
+            # 加仓或开仓
+            if pre_balance == 0 and post_balance > 0:
+                return TxType.OPEN_POSITION
+            elif post_balance > pre_balance:
+                return TxType.ADD_POSITION
+            else:
+                raise UnknownTransactionType()
+        elif change_ui_amount < 0:
+            if pre_balance > 0 and post_balance < 0.001:
+                return TxType.CLOSE_POSITION
+            elif post_balance < pre_balance:
+                return TxType.REDUCE_POSITION
+            else:
+                raise UnknownTransactionType()
+        else:
+            raise ZeroChangeAmountError(pre_balance, post_balance)
+
+    def get_swap_program_id(self) -> str | None:
+        # PumpSwap 的事件可以解码, 但下游还不支持该程序, 仍然只返回 SWAP_PROGRAMS 中的程序
+        for event in self.get_swap_events():
+            if event.program_id in SWAP_PROGRAM_IDS:
+                return event.program_id
+        for program_id in iter_invoked_programs(self._iter_log_messages()):
+            if program_id in SWAP_PROGRAM_IDS:
+                return program_id
+        return None
+
+    def _get_event_sol_amount(self, mint: str, direction: str, token_change: int) -> int | None:
+        """汇总签名者在该方向上的事件, 返回成交的 SOL 数量
+
+        只统计交易者与 mint 能对上的事件; 多跳交易中有多个事件时累加。以下情况返回 None:
+        - 事件的代币数量与余额变化不一致, 例如路由拆单到尚未注册的程序, 或同一交易中
+          还有其他转账
+        - 报价代币不确定是 SOL 的事件 (PumpSwap, Meteora DBC)
+        """
+        who = self.get_who()
+        events = [
+            event
+            for event in self.get_swap_events()
+            if event.direction == direction
+            and event.user in (None, who)
+            and event.mint in (None, mint)
+        ]
+        if not events or sum(event.token_amount for event in events) != token_change:
+            return None
+        sol_amounts = [event.sol_amount for event in events]
+        if None in sol_amounts:
+            return None
+        return sum(sol_amounts)  # type: ignore
+
+    def parse(self) -> TxEvent | None:
+        try:
+            index = self._build_index()
+        except KeyError:
+            raise NotSwapTransaction()
+
+        # 不是 swap 交易
+        has_pre = any(entry[0] is not None for entry in index.values())
+        has_post = any(entry[1] is not None for entry in index.values())
+        if not has_pre or not has_post:
+            raise NotSwapTransaction()
+
+        try:
+            mint = self.get_mint()
+        except ValueError:
+            raise NotSwapTransaction()
+
+        token_amount_change = self.get_token_amount_change()
+        sol_amount_change = self.get_sol_amount_change()
+        tx_type = self.get_tx_type()
+        tx_direction = "buy" if tx_type in (TxType.OPEN_POSITION, TxType.ADD_POSITION) else "sell"
+
+        token_amount = abs(token_amount_change["change_amount"])
+        sol_amount = abs(sol_amount_change["change_amount"])
+        # SOL 余额差包含手续费、小费与租金, 以事件中的成交数量为准
+        event_sol_amount = self._get_event_sol_amount(mint, tx_direction, token_amount)
+        if event_sol_amount is not None:
+            sol_amount = event_sol_amount
+
+        if tx_direction == "buy":
+            from_amount = sol_amount
+            from_decimals = 9
+            to_amount = token_amount
+            to_decimals = token_amount_change["decimals"]
+        else:
+            from_amount = token_amount
+            from_decimals = token_amount_change["decimals"]
+            to_amount = sol_amount
+            to_decimals = 9
+
+        return TxEvent(
+            signature=self.get_tx_hash(),
+            who=self.get_who(),
+            from_amount=from_amount,
+            from_decimals=from_decimals,
+            to_amount=to_amount,
+            to_decimals=to_decimals,
+            mint=mint,
+            tx_type=tx_type,
+            tx_direction=tx_direction,
+            timestamp=self.get_block_time(),
+            pre_token_amount=token_amount_change["pre_balance"],
+            post_token_amount=token_amount_change["post_balance"],
+            program_id=self.get_swap_program_id(),
+            slot=self.get_slot(),
+            tx_index=self.get_tx_index(),
+        )
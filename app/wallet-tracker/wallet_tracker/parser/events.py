@@ -0,0 +1,289 @@
+"""Anchor 交易事件解码
+
+根据 `solbot_common/IDL` 中的 IDL (pumpfun, pumpamm) 以及 Meteora DBC 的事件布局,
+在导入时为每个交易事件预编译 `struct.Struct`, 并按 program id -> discriminator 建立
+两级字典, 解码时只需两次字典查找。
+
+事件数据有两种来源:
+- 日志中的 `Program data: <base64>` (`emit!`)
+- 程序调用自身的内部指令 (`emit_cpi!`), 数据以 `EVENT_IX_TAG` 开头
+
+事件中的数量是精确的成交数量, 不受手续费、租金或多跳路由中其他转账的影响。
+"""
+
+import base64
+import hashlib
+import json
+import pathlib
+import struct
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Literal
+
+import solbot_common
+from solbot_common.constants import METEORA_DBC_PROGRAM
+from solders.pubkey import Pubkey  # type: ignore
+
+PROGRAM_DATA_PREFIX = "Program data: "
+IDL_DIR = pathlib.Path(solbot_common.__file__).parent / "IDL"
+# emit_cpi! 写入内部指令的数据前缀, 即 anchor 中的 EVENT_IX_TAG (0x1d9acb512ea545e4) 小端序
+EVENT_IX_TAG = bytes.fromhex("e445a52e51cb9a1d")
+
+# IDL 类型 -> struct 格式, 只需要解码事件开头的定长字段
+_STRUCT_FORMATS = {
+    "u8": "B",
+    "bool": "?",
+    "u16": "H",
+    "u32": "I",
+    "u64": "Q",
+    "i64": "q",
+    "u128": "16s",
+    "publicKey": "32s",
+    "pubkey": "32s",
+}
+
+
+@dataclass(slots=True)
+class SwapEvent:
+    """归一化的交易事件
+
+    token_amount 为交易代币 (base) 的数量; sol_amount 只有在报价代币确定为 SOL 时才有值。
+    部分事件不包含交易者或 mint, 对应字段为 None。
+    """
+
+    program_id: str
+    name: str
+    direction: Literal["buy", "sell"]
+    token_amount: int
+    sol_amount: int | None
+    mint: str | None
+    user: str | None
+    timestamp: int
+
+
+@dataclass(slots=True)
+class EventDecoder:
+    program_id: str
+    name: str
+    discriminator: bytes
+    layout: struct.Struct
+    fields: tuple[str, ...]
+    convert: Callable[[str, str, dict], SwapEvent]
+
+    def decode(self, data: bytes) -> SwapEvent | None:
+        """data 不包含 discriminator"""
+        if len(data) < self.layout.size:
+            return None
+        values = dict(zip(self.fields, self.layout.unpack_from(data), strict=True))
+        return self.convert(self.program_id, self.name, values)
+
+
+def event_discriminator(name: str) -> bytes:
+    """Anchor 事件的 8 字节 discriminator"""
+    return hashlib.sha256(f"event:{name}".encode()).digest()[:8]
+
+
+def compile_layout(fields: Iterable[tuple[str, str]]) -> tuple[struct.Struct, tuple[str, ...]]:
+    """将 (字段名, IDL 类型) 编译为 struct, 遇到变长或未知类型时停止"""
+    formats = []
+    names = []
+    for name, type_ in fields:
+        fmt = _STRUCT_FORMATS.get(type_) if isinstance(type_, str) else None
+        if fmt is None:
+            break
+        formats.append(fmt)
+        names.append(name)
+    return struct.Struct("<" + "".join(formats)), tuple(names)
+
+
+def iter_program_data(logs: Iterable[str]) -> Iterator[tuple[str, bytes]]:
+    """遍历日志中的 `Program data:`, 返回输出该数据的程序与解码后的数据
+
+    通过 `invoke` / `success` / `failed` 日志维护调用栈, 数据属于栈顶的程序。
+    """
+    stack: list[str] = []
+    for log in logs:
+        if log.startswith(PROGRAM_DATA_PREFIX):
+            if stack:
+                try:
+                    yield stack[-1], base64.b64decode(log[len(PROGRAM_DATA_PREFIX) :])
+                except ValueError:
+                    continue
+        elif log.startswith("Program "):
+            parts = log.split(" ")
+            if len(parts) == 4 and parts[2] == "invoke":
+                stack.append(parts[1])
+            elif len(parts) >= 3 and parts[2] in ("success", "failed:") and stack:
+                stack.pop()
+
+
+def iter_invoked_programs(logs: Iterable[str]) -> Iterator[str]:
+    """按调用顺序遍历日志中的 `Program <id> invoke [n]`"""
+    for log in logs:
+        if log.startswith("Program ") and " invoke [" in log:
+            yield log.split(" ", 2)[1]
+
+
+def _pubkey(value: bytes) -> str:
+    return str(Pubkey.from_bytes(value))
+
+
+def _pump_trade(program_id: str, name: str, values: dict) -> SwapEvent:
+    return SwapEvent(
+        program_id=program_id,
+        name=name,
+        direction="buy" if values["isBuy"] else "sell",
+        token_amount=values["tokenAmount"],
+        sol_amount=values["solAmount"],
+        mint=_pubkey(values["mint"]),
+        user=_pubkey(values["user"]),
+        timestamp=values["timestamp"],
+    )
+
+
+def _pump_amm_buy(program_id: str, name: str, values: dict) -> SwapEvent:
+    # 报价代币不一定是 WSOL, 事件中也没有 mint
+    return SwapEvent(
+        program_id=program_id,
+        name=name,
+        direction="buy",
+        token_amount=values["base_amount_out"],
+        sol_amount=None,
+        mint=None,
+        user=_pubkey(values["user"]),
+        timestamp=values["timestamp"],
+    )
+
+
+def _pump_amm_sell(program_id: str, name: str, values: dict) -> SwapEvent:
+    return SwapEvent(
+        program_id=program_id,
+        name=name,
+        direction="sell",
+        token_amount=values["base_amount_in"],
+        sol_amount=None,
+        mint=None,
+        user=_pubkey(values["user"]),
+        timestamp=values["timestamp"],
+    )
+
+
+def _meteora_dbc_swap(program_id: str, name: str, values: dict) -> SwapEvent:
+    # trade_direction: 0 为 base -> quote (卖出), 1 为 quote -> base (买入)
+    is_buy = values["trade_direction"] == 1
+    return SwapEvent(
+        program_id=program_id,
+        name=name,
+        direction="buy" if is_buy else "sell",
+        token_amount=values["output_amount"] if is_buy else values["actual_input_amount"],
+        sol_amount=None,
+        mint=None,
+        user=None,
+        timestamp=values["current_timestamp"],
+    )
+
+
+# Meteora DBC 没有附带 IDL, 按链上 EvtSwap 布局声明
+METEORA_DBC_EVT_SWAP_FIELDS = [
+    ("pool", "pubkey"),
+    ("config", "pubkey"),
+    ("trade_direction", "u8"),
+    ("has_referral", "bool"),
+    ("params_amount_in", "u64"),
+    ("params_minimum_amount_out", "u64"),
+    ("actual_input_amount", "u64"),
+    ("output_amount", "u64"),
+    ("next_sqrt_price", "u128"),
+    ("trading_fee", "u64"),
+    ("protocol_fee", "u64"),
+    ("referral_fee", "u64"),
+    ("amount_in", "u64"),
+    ("current_timestamp", "u64"),
+]
+
+
+def _load_idl(name: str) -> dict:
+    with open(IDL_DIR / f"{name}.json") as f:
+        return json.load(f)
+
+
+def _idl_event_decoders(
+    idl: dict, converters: dict[str, Callable[[str, str, dict], SwapEvent]]
+) -> list[EventDecoder]:
+    """兼容新旧两种 Anchor IDL 格式
+
+    - 旧格式: 字段定义在 events[].fields, program id 在 metadata.address
+    - 新格式: 字段定义在同名的 types[], discriminator 与 program id 由 IDL 给出
+    """
+    program_id = idl.get("address") or idl["metadata"]["address"]
+    types = {t["name"]: t for t in idl.get("types", [])}
+    decoders = []
+    for event in idl.get("events", []):
+        name = event["name"]
+        if name not in converters:
+            continue
+        fields = event.get("fields") or types[name]["type"]["fields"]
+        layout, names = compile_layout((f["name"], f["type"]) for f in fields)
+        discriminator = bytes(event.get("discriminator") or event_discriminator(name))
+        decoders.append(
+            EventDecoder(program_id, name, discriminator, layout, names, converters[name])
+        )
+    return decoders
+
+
+class EventRegistry:
+    """program id -> discriminator -> 解码器"""
+
+    def __init__(self, decoders: Iterable[EventDecoder] = ()):
+        self.decoders: dict[str, dict[bytes, EventDecoder]] = {}
+        for decoder in decoders:
+            self.register(decoder)
+
+    def register(self, decoder: EventDecoder) -> None:
+        self.decoders.setdefault(decoder.program_id, {})[decoder.discriminator] = decoder
+
+    def __contains__(self, program_id: str) -> bool:
+        return program_id in self.decoders
+
+    def decode(self, program_id: str, data: bytes) -> SwapEvent | None:
+        """解码事件数据 (日志或 emit_cpi 内部指令), 无法识别时返回 None"""
+        decoders = self.decoders.get(program_id)
+        if decoders is None:
+            return None
+        if data[:8] == EVENT_IX_TAG:
+            data = data[8:]
+        decoder = decoders.get(data[:8])
+        if decoder is None:
+            return None
+        return decoder.decode(data[8:])
+
+    def decode_all(self, items: Iterable[tuple[str, bytes]]) -> Iterator[SwapEvent]:
+        for program_id, data in items:
+            event = self.decode(program_id, data)
+            if event is not None:
+                yield event
+
+
+def build_default_registry() -> EventRegistry:
+    decoders = [
+        *_idl_event_decoders(_load_idl("pumpfun"), {"TradeEvent": _pump_trade}),
+        *_idl_event_decoders(
+            _load_idl("pumpamm"), {"BuyEvent": _pump_amm_buy, "SellEvent": _pump_amm_sell}
+        ),
+    ]
+    layout, names = compile_layout(METEORA_DBC_EVT_SWAP_FIELDS)
+    decoders.append(
+        EventDecoder(
+            str(METEORA_DBC_PROGRAM),
+            "EvtSwap",
+            event_discriminator("EvtSwap"),
+            layout,
+            names,
+            _meteora_dbc_swap,
+        )
+    )
+    return EventRegistry(decoders)
+
+
+# 每个进程只加载一次 IDL
+registry = build_default_registry()
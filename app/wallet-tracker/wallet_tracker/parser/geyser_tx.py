@@ -0,0 +1,91 @@
+import time
+from collections.abc import Iterable
+
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+from .base import IndexedTXParser, TokenBalance
+from .events import registry
+
+
+class GeyserTXParser(IndexedTXParser):
+    """直接从 Geyser protobuf 消息解析交易
+
+    与 `RawTXParser` 的解析规则一致, 但不需要先将 `SubscribeUpdateTransaction`
+    转换为 dict, 只有签名和签名者需要做 base58 编码。
+    """
+
+    __slots__ = ("block_time", "info", "meta", "transaction")
+
+    def __init__(
+        self,
+        transaction: geyser_pb2.SubscribeUpdateTransaction,
+        block_time: int | None = None,
+    ) -> None:
+        super().__init__()
+        self.transaction = transaction
+        self.info = transaction.transaction
+        self.meta = self.info.meta
+        # 只有被确认之后才会有 blockTime, 所以默认使用当前时间
+        self.block_time = int(time.time()) if block_time is None else block_time
+
+    def get_block_time(self) -> int:
+        return self.block_time
+
+    def get_slot(self) -> int:
+        return self.transaction.slot
+
+    def get_tx_index(self) -> int:
+        return self.info.index
+
+    def get_tx_hash(self) -> str:
+        signatures = self.info.transaction.signatures
+        if len(signatures) > 1:
+            raise ValueError("multiple txs in one transaction")
+        return str(Signature.from_bytes(signatures[0]))
+
+    def _get_signer(self) -> str:
+        return str(Pubkey.from_bytes(self.info.transaction.message.account_keys[0]))
+
+    def _iter_token_balances(self, post: bool) -> Iterable[TokenBalance]:
+        balances = self.meta.post_token_balances if post else self.meta.pre_token_balances
+        for balance in balances:
+            ui_token_amount = balance.ui_token_amount
+            yield (
+                balance.owner,
+                balance.mint,
+                balance.program_id,
+                ui_token_amount.amount,
+                ui_token_amount.decimals,
+            )
+
+    def _get_sol_balances(self) -> tuple[int, int]:
+        try:
+            return self.meta.pre_balances[0], self.meta.post_balances[0]
+        except IndexError:
+            raise ValueError("owner index out of range")
+
+    def _iter_log_messages(self) -> Iterable[str]:
+        return self.meta.log_messages
+
+    def _iter_inner_instruction_data(self) -> Iterable[tuple[str, bytes]]:
+        if not self.meta.inner_instructions:
+            return
+        message = self.info.transaction.message
+        # 静态账户之后依次为地址查找表中的可写、只读账户
+        account_keys = [
+            *message.account_keys,
+            *self.meta.loaded_writable_addresses,
+            *self.meta.loaded_readonly_addresses,
+        ]
+        program_ids: dict[int, str] = {}
+        for inner in self.meta.inner_instructions:
+            for instruction in inner.instructions:
+                index = instruction.program_id_index
+                program_id = program_ids.get(index)
+                if program_id is None:
+                    program_id = str(Pubkey.from_bytes(account_keys[index]))
+                    program_ids[index] = program_id
+                if program_id in registry:
+                    yield program_id, instruction.data
@@ -0,0 +1,74 @@
+"""从交易日志中解析交易事件
+
+Pump.fun 的 buy/sell 会通过 `emit!` 在日志中输出 `Program data: <base64>` 形式的
+TradeEvent, 其中已包含 mint、SOL/代币数量、交易者与方向。WSS `logsSubscribe` 推送的
+`LogsNotification` 自带这些日志, 识别出已知程序的事件时可以直接构建 `TxEvent`,
+省去一次 getTransaction 往返。
+
+日志中没有交易前后的代币余额, 因此得到的 `TxEvent` 是临时的 (`provisional=True`):
+- 只处理买入: 卖出比例依赖交易前的代币余额, 仍需查询交易详情
+- tx_type 填为开仓, pre_token_amount 为 0, 均不可信; 消费方需检查 `provisional`,
+  例如通知中不区分开仓与加仓。该事件不会再被完整解析修正
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.types import TxEvent, TxType
+
+from .events import SwapEvent, iter_program_data, registry
+
+PUMP_FUN_PROGRAM_ID = str(PUMP_FUN_PROGRAM)
+PUMP_TOKEN_DECIMALS = 6
+
+
+def iter_pump_trade_events(logs: Iterable[str]) -> Iterator[SwapEvent]:
+    for event in registry.decode_all(iter_program_data(logs)):
+        if event.program_id == PUMP_FUN_PROGRAM_ID:
+            yield event
+
+
+def parse_logs(
+    signature: str,
+    logs: Sequence[str],
+    wallets: Iterable[str],
+    slot: int | None = None,
+) -> TxEvent | None:
+    """从日志中构建临时的 `TxEvent`
+
+    Args:
+        signature: 交易签名
+        logs: 交易日志
+        wallets: 监听的钱包, 事件的交易者不在其中时不处理
+        slot: 日志通知的 slot
+
+    Returns:
+        无法仅凭日志确定交易时返回 None, 需要查询交易详情
+    """
+    events = list(iter_pump_trade_events(logs))
+    # 多笔交易 (例如同一交易中多次买卖) 需要完整的余额变化
+    if len(events) != 1:
+        return None
+    event = events[0]
+    if event.direction != "buy" or event.user not in wallets:
+        return None
+    if not event.sol_amount or not event.token_amount:
+        return None
+
+    return TxEvent(
+        signature=signature,
+        who=event.user,  # type: ignore
+        from_amount=event.sol_amount,
+        from_decimals=9,
+        to_amount=event.token_amount,
+        to_decimals=PUMP_TOKEN_DECIMALS,
+        mint=event.mint,  # type: ignore
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=event.timestamp,
+        pre_token_amount=0,
+        post_token_amount=event.token_amount,
+        program_id=PUMP_FUN_PROGRAM_ID,
+        provisional=True,
+        slot=slot,
+    )
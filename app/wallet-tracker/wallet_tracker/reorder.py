@@ -0,0 +1,262 @@
+"""按链上顺序发布同一钱包的 TxEvent
+
+多个解析 worker (或进程池) 并发处理时, 同一钱包的 TxEvent 可能乱序写入 `tx_event:new`,
+跟单方可能先处理卖出再处理对应的买入。
+
+`ReorderBuffer` 在发布前将每个钱包的事件按 `(slot, tx_index)` 排序, 每个事件最多等待
+window 秒:
+- 钱包有事件等待超时后, 按顺序发布该钱包中排在它之前 (含它自身) 的所有事件
+- 比该钱包已发布的事件更早、但到达太晚的事件直接发布 (无法再纠正), 计入 late
+- 缓冲的事件总数超过 max_pending 时, 立即发布最早到达的钱包的全部事件, 计入 forced
+- 没有 slot 的事件不参与排序, 直接发布
+
+事件在 `push` 返回后才发布, 调用方无法捕获发布时的异常: 发布失败时按指数退避重试,
+仍然失败时调用事件入队时传入的 on_failure (撤销去重记录、写入失败队列等), 计入 failed。
+调用方统一通过 `produce_tx_event` 发布, 未启用重排时同步失败也走同一个 on_failure。
+
+只能纠正同一进程内的乱序, 多个 tracker 副本之间的顺序不受影响。
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+import aioredis
+from solbot_common.config import settings
+from solbot_common.cp.tx_event import TxEventProducer
+from solbot_common.log import logger
+from solbot_common.types import TxEvent
+
+from wallet_tracker.benchmark import benchmark_service
+
+# 发布失败时的回调, 参数为事件与最后一次的异常
+OnFailure = Callable[[TxEvent, Exception], Awaitable[None]]
+# (slot, tx_index, 到达序号, 到达时间, 事件, 发布失败时的回调)
+_Entry = tuple[int, int, int, float, TxEvent, OnFailure | None]
+
+
+class ReorderBuffer:
+    """按钱包重排 TxEvent
+
+    Args:
+        emit: 发布事件的协程函数
+        window: 事件最多等待的时间 (秒)
+        max_pending: 缓冲的事件总数上限
+        max_wallets: 记录最近发布位置的钱包数上限
+        max_retries: 发布失败后的重试次数
+        retry_delay: 首次重试的等待 (秒), 之后每次翻倍
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[TxEvent], Awaitable[None]],
+        window: float = 0.2,
+        max_pending: int = 1000,
+        max_wallets: int = 10_000,
+        max_retries: int = 3,
+        retry_delay: float = 0.05,
+    ):
+        self.emit = emit
+        self.window = window
+        self.max_pending = max_pending
+        self.max_wallets = max_wallets
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.pending: dict[str, list[_Entry]] = {}
+        self.size = 0
+        # 钱包 -> 最近发布的 (slot, tx_index)
+        self.emitted: OrderedDict[str, tuple[int, int]] = OrderedDict()
+        self.reordered = 0
+        self.late = 0
+        self.forced = 0
+        self.failed = 0
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        # 取出的事件在持有锁时按顺序发布, 避免并发的 _release 交错发布
+        self._emit_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def push(self, tx_event: TxEvent, on_failure: OnFailure | None = None) -> None:
+        """缓冲事件, 重试后仍发布失败时调用 on_failure"""
+        if tx_event.slot is None:
+            await self._emit(tx_event, time.monotonic(), on_failure)
+            return
+        key = (tx_event.slot, -1 if tx_event.tx_index is None else tx_event.tx_index)
+        last = self.emitted.get(tx_event.who)
+        if last is not None and key < last:
+            self.late += 1
+            logger.warning(
+                f"Tx event arrived after a later one was published: {tx_event.signature}"
+            )
+            await self._emit(tx_event, time.monotonic(), on_failure)
+            return
+
+        heap = self.pending.setdefault(tx_event.who, [])
+        if heap and key < max(entry[:2] for entry in heap):
+            self.reordered += 1
+        heapq.heappush(heap, (*key, next(self._seq), time.monotonic(), tx_event, on_failure))
+        self.size += 1
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self.size > self.max_pending:
+            self.forced += 1
+            oldest = min(self.pending, key=lambda who: min(e[3] for e in self.pending[who]))
+            await self._release(oldest, None)
+        self._wakeup.set()
+
+    async def _emit(self, tx_event: TxEvent, arrived: float, on_failure: OnFailure | None) -> None:
+        benchmark_service.observe("reorder", time.monotonic() - arrived)
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.emit(tx_event)
+                return
+            except Exception as e:
+                error = e
+                logger.warning(f"Failed to publish tx event {tx_event.signature}: {e}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+
+        self.failed += 1
+        if on_failure is None:
+            logger.error(f"Dropping tx event {tx_event.signature}: {error}")
+            return
+        try:
+            await on_failure(tx_event, error)
+        except Exception as e:
+            logger.exception(f"Failed to handle unpublished tx event {tx_event.signature}: {e}")
+
+    async def _release(self, who: str, deadline: float | None) -> None:
+        """发布钱包中到达时间早于 deadline 的事件及排在它们之前的事件, None 表示全部发布"""
+        heap = self.pending.get(who)
+        if not heap:
+            return
+        if deadline is None:
+            until = max(entry[:2] for entry in heap)
+        else:
+            expired = [entry[:2] for entry in heap if entry[3] <= deadline]
+            if not expired:
+                return
+            until = max(expired)
+
+        released = []
+        while heap and heap[0][:2] <= until:
+            released.append(heapq.heappop(heap))
+        if not heap:
+            del self.pending[who]
+        self.size -= len(released)
+        self.emitted[who] = until
+        self.emitted.move_to_end(who)
+        while len(self.emitted) > self.max_wallets:
+            self.emitted.popitem(last=False)
+        async with self._emit_lock:
+            for *_, arrived, tx_event, on_failure in released:
+                await self._emit(tx_event, arrived, on_failure)
+
+    async def flush_due(self) -> float | None:
+        """发布等待超时的事件, 返回下一个事件超时前的秒数, 没有缓冲的事件时返回 None"""
+        now = time.monotonic()
+        for who in list(self.pending):
+            await self._release(who, now - self.window)
+        if not self.pending:
+            return None
+        oldest = min(entry[3] for heap in self.pending.values() for entry in heap)
+        return max(oldest + self.window - now, 0)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                timeout = await self.flush_due()
+                self._wakeup.clear()
+                if timeout is None:
+                    await self._wakeup.wait()
+                else:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.exception(f"Reorder buffer error: {e}")
+
+    async def close(self) -> None:
+        """按顺序发布所有缓冲的事件"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for who in list(self.pending):
+            await self._release(who, None)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.size,
+            "capacity": self.max_pending,
+            "reordered": self.reordered,
+            "late": self.late,
+            "forced": self.forced,
+            "failed": self.failed,
+        }
+
+
+class ReorderingProducer:
+    """与 `TxEventProducer` 接口相同, 发布前经过 `ReorderBuffer`"""
+
+    def __init__(self, producer: TxEventProducer, window: float, max_pending: int = 1000):
+        self.producer = producer
+        self.buffer = ReorderBuffer(producer.produce, window=window, max_pending=max_pending)
+
+    async def produce(self, tx_event: TxEvent, on_failure: OnFailure | None = None) -> None:
+        await self.buffer.push(tx_event, on_failure)
+
+    async def close(self) -> None:
+        await self.buffer.close()
+
+
+_shared_producer: ReorderingProducer | None = None
+
+
+def create_tx_event_producer(redis: aioredis.Redis) -> TxEventProducer | ReorderingProducer:
+    """monitor.reorder_window 大于 0 时返回进程内共用的 `ReorderingProducer`
+
+    所有发布 TxEvent 的组件 (TransactionWorker、Geyser inline、日志快速路径、失败重试)
+    共用同一个缓冲区, 才能对它们之间的乱序进行重排。
+    """
+    global _shared_producer
+    window = settings.monitor.reorder_window
+    if window <= 0:
+        return TxEventProducer(redis)
+    if _shared_producer is None:
+        _shared_producer = ReorderingProducer(
+            TxEventProducer(redis), window, settings.monitor.reorder_max_pending
+        )
+        benchmark_service.register_queue("tx_event_reorder", _shared_producer.buffer.stats)
+    return _shared_producer
+
+
+async def close_tx_event_producer() -> None:
+    """发布共用缓冲区中剩余的事件"""
+    if _shared_producer is not None:
+        await _shared_producer.close()
+
+
+async def produce_tx_event(
+    producer: TxEventProducer | ReorderingProducer, tx_event: TxEvent, on_failure: OnFailure
+) -> bool:
+    """发布 TxEvent, 发布失败 (包括经过重排缓冲区后的延迟发布) 时调用 on_failure
+
+    Returns:
+        事件已发布或已进入重排缓冲区时返回 True, 同步发布失败时返回 False
+    """
+    if isinstance(producer, ReorderingProducer):
+        await producer.produce(tx_event, on_failure)
+        return True
+    try:
+        await producer.produce(tx_event)
+    except Exception as e:
+        await on_failure(tx_event, e)
+        return False
+    return True
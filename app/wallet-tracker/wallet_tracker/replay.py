@@ -0,0 +1,196 @@
+"""录制与回放 wallet-tracker 的输入流
+
+录制文件格式:
+- 文件头: `MAGIC` + 1 字节版本号
+- 之后每条记录: `<BdI` (类型, 接收时间戳, 数据长度) + 数据
+  - `GEYSER_UPDATE`: `SubscribeUpdate.SerializeToString()`
+  - `WSS_LOGS`: `LogsNotification.to_json()`
+
+回放时按记录的时间间隔 (除以 speed) 将消息送回 Geyser 订阅者的 response_queue 或
+`AccountLogMonitor.process_log`, 之后的流程 (Redis 队列、`TransactionWorker`、
+TxEvent 发布) 与线上一致, 用于离线压测解析与处理流程。`seed_recording` 可以将 tests/
+下的 Geyser 调试数据 (`数据.json`、`meteroadbc.json` 等) 转换为录制文件。
+"""
+
+import asyncio
+import struct
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+from typing import BinaryIO
+
+from solbot_common.log import logger
+from solders.rpc.responses import LogsNotification  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+from wallet_tracker.geyser.codec import load_update_dumps, update_from_dict
+
+MAGIC = b"WTRC"
+VERSION = 1
+_RECORD_HEADER = struct.Struct("<BdI")
+
+
+class RecordKind(IntEnum):
+    GEYSER_UPDATE = 1
+    WSS_LOGS = 2
+
+
+@dataclass(slots=True)
+class Record:
+    kind: RecordKind
+    timestamp: float
+    payload: bytes
+
+    def decode(self) -> geyser_pb2.SubscribeUpdate | LogsNotification:
+        if self.kind == RecordKind.GEYSER_UPDATE:
+            return geyser_pb2.SubscribeUpdate.FromString(self.payload)
+        return LogsNotification.from_json(self.payload.decode("utf-8"))
+
+
+class StreamRecorder:
+    """将收到的消息追加写入录制文件
+
+    写入是同步的缓冲写, 每隔 flush_interval 秒刷新一次, 不会阻塞事件循环太久。
+
+    Args:
+        path: 录制文件路径, 已存在时覆盖
+        flush_interval: 刷新到磁盘的间隔 (秒)
+    """
+
+    def __init__(self, path: str | Path, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.file: BinaryIO | None = open(self.path, "wb")  # noqa: SIM115
+        self.file.write(MAGIC + bytes([VERSION]))
+        self.records = 0
+        self._last_flush = time.monotonic()
+
+    def record(self, kind: RecordKind, payload: bytes, timestamp: float | None = None) -> None:
+        if self.file is None:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        self.file.write(_RECORD_HEADER.pack(kind, timestamp, len(payload)))
+        self.file.write(payload)
+        self.records += 1
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self.file.flush()
+            self._last_flush = now
+
+    def record_update(self, update: geyser_pb2.SubscribeUpdate) -> None:
+        self.record(RecordKind.GEYSER_UPDATE, update.SerializeToString())
+
+    def record_logs(self, message: LogsNotification) -> None:
+        self.record(RecordKind.WSS_LOGS, message.to_json().encode("utf-8"))
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            logger.info(f"Recorded {self.records} messages to {self.path}")
+
+
+def iter_records(path: str | Path) -> Iterator[Record]:
+    with open(path, "rb") as f:
+        header = f.read(len(MAGIC) + 1)
+        if header[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a wallet-tracker recording")
+        if header[len(MAGIC)] != VERSION:
+            raise ValueError(f"Unsupported recording version: {header[len(MAGIC)]}")
+        while True:
+            head = f.read(_RECORD_HEADER.size)
+            if len(head) < _RECORD_HEADER.size:
+                return
+            kind, timestamp, length = _RECORD_HEADER.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                # 录制进程被中断时最后一条记录可能不完整
+                logger.warning(f"Truncated record at the end of {path}")
+                return
+            yield Record(RecordKind(kind), timestamp, payload)
+
+
+def seed_recording(
+    dump_paths: Iterable[str | Path],
+    path: str | Path,
+    interval: float = 0.05,
+    repeat: int = 1,
+) -> int:
+    """将 `proto_to_dict` 导出的调试数据转换为录制文件, 每条消息间隔 interval 秒
+
+    Returns:
+        写入的消息数
+    """
+    updates = [update_from_dict(data) for dump in dump_paths for data in load_update_dumps(dump)]
+    recorder = StreamRecorder(path)
+    timestamp = time.time()
+    try:
+        for _ in range(repeat):
+            for update in updates:
+                recorder.record(RecordKind.GEYSER_UPDATE, update.SerializeToString(), timestamp)
+                timestamp += interval
+    finally:
+        recorder.close()
+    return recorder.records
+
+
+@dataclass
+class ReplayStats:
+    records: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class StreamReplayer:
+    """按录制时的节奏回放消息
+
+    Args:
+        path: 录制文件路径
+        speed: 回放倍速, 1 为原速, 0 表示不等待 (最大速度)
+    """
+
+    def __init__(self, path: str | Path, speed: float = 1.0):
+        if speed < 0:
+            raise ValueError("speed must not be negative")
+        self.path = Path(path)
+        self.speed = speed
+
+    async def replay(
+        self,
+        on_update: Callable[[geyser_pb2.SubscribeUpdate], Awaitable[None]] | None = None,
+        on_logs: Callable[[LogsNotification], Awaitable[None]] | None = None,
+    ) -> ReplayStats:
+        """逐条回放, 没有对应回调的消息类型会被跳过"""
+        stats = ReplayStats()
+        start = time.monotonic()
+        first_timestamp: float | None = None
+        for record in iter_records(self.path):
+            if first_timestamp is None:
+                first_timestamp = record.timestamp
+            if self.speed > 0:
+                delay = (record.timestamp - first_timestamp) / self.speed
+                delay -= time.monotonic() - start
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif stats.records % 100 == 0:
+                # 最大速度时定期让出事件循环, 使下游的 worker 有机会运行
+                await asyncio.sleep(0)
+
+            callback = on_update if record.kind == RecordKind.GEYSER_UPDATE else on_logs
+            if callback is None:
+                continue
+            try:
+                await callback(record.decode())  # type: ignore
+                stats.records += 1
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Error replaying record: {e}")
+        stats.elapsed = time.monotonic() - start
+        return stats
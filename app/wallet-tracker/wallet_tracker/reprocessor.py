@@ -0,0 +1,252 @@
+"""失败交易重试
+
+`FAILED_TX_SIGNATURE_CHANNEL` (查询交易详情失败) 与 `FAILED_TX_DETAIL_CHANNEL` (解析失败)
+中的消息原先不会再被读取, RPC 节点暂时查不到交易就会永久丢失一次跟单。
+
+`FailedTxReprocessor` 周期性地:
+1. 从两个失败队列批量取出消息, 按失败时间写入重试计划 `TX_RETRY_SCHEDULE`
+   (sorted set, score 为下次重试时间)
+2. 用 Lua 脚本原子地取出已到期的条目 (多个 tracker 副本不会重复处理), 按类型重试:
+   - fetch: 并发查询交易详情 (`TxDetailRawFetcher` 会合并为批量请求), 查到后写入
+     `NEW_TX_DETAIL_CHANNEL` 交给 `TransactionWorker`
+   - parse: 重新解析交易详情, 成功后直接发布 TxEvent
+3. 仍然失败时按指数退避重新写入计划, 超过跟单时效 (max_age) 或重试次数后丢弃
+
+每种结果都有计数, 通过 benchmark 的 /metrics 输出。
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Literal
+
+import aioredis
+import orjson as json
+from aioredis.exceptions import RedisError
+from solbot_common.log import logger
+from solbot_common.types import TxEvent
+from solders.signature import Signature  # type: ignore
+
+from wallet_tracker import benchmark
+from wallet_tracker.constants import (
+    FAILED_TX_DETAIL_CHANNEL,
+    FAILED_TX_SIGNATURE_CHANNEL,
+    NEW_TX_DETAIL_CHANNEL,
+    TX_RETRY_SCHEDULE,
+)
+from wallet_tracker.dedup import TX_EVENT_NAMESPACE, SignatureDeduplicator
+from wallet_tracker.ingress import BatchPopper, BatchPusher, unwrap_failed
+from wallet_tracker.reorder import create_tx_event_producer, produce_tx_event
+from wallet_tracker.tx_worker import parse_tx_detail
+
+# 取出 score <= ARGV[1] 的至多 ARGV[2] 个条目并从计划中删除
+_CLAIM_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+RetryKind = Literal["fetch", "parse"]
+Fetch = Callable[[Signature], Awaitable[dict | None]]
+
+
+class FailedTxReprocessor:
+    """按指数退避重试失败的交易
+
+    Args:
+        redis: Redis 客户端
+        fetch: 查询交易详情的函数, 交易尚不可查时返回 None
+        max_age: 跟单时效 (秒), 出块 (或首次失败) 超过该时间的交易不再重试
+        max_attempts: 最多重试次数
+        base_delay: 首次重试的等待 (秒), 之后每次翻倍
+        max_delay: 单次等待的上限 (秒)
+        batch_size: 单次从失败队列 / 重试计划中取出的最大条目数
+        interval: 检查重试计划的间隔 (秒)
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        fetch: Fetch,
+        max_age: float = 60,
+        max_attempts: int = 5,
+        base_delay: float = 1,
+        max_delay: float = 16,
+        batch_size: int = 50,
+        interval: float = 0.5,
+    ):
+        self.redis = redis
+        self.fetch = fetch
+        self.max_age = max_age
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.interval = interval
+        self.poppers = [
+            BatchPopper(redis, FAILED_TX_SIGNATURE_CHANNEL, count=batch_size),
+            BatchPopper(redis, FAILED_TX_DETAIL_CHANNEL, count=batch_size),
+        ]
+        self.pusher = BatchPusher(redis)
+        self.tx_event_producer = create_tx_event_producer(redis)
+        self.event_dedup = SignatureDeduplicator(redis, TX_EVENT_NAMESPACE)
+        self.retried = {"fetch": 0, "parse": 0}
+        self.recovered = {"fetch": 0, "parse": 0}
+        # 丢弃原因 -> 数量
+        self.dropped: dict[str, int] = {}
+        self.depth = 0
+        self._stop = asyncio.Event()
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.base_delay * 2**attempts, self.max_delay)
+
+    def _drop(self, reason: str, item: dict) -> None:
+        self.dropped[reason] = self.dropped.get(reason, 0) + 1
+        logger.info(f"Dropping failed tx ({reason}) after {item['attempts']} retries")
+
+    def _entry(self, item: dict) -> str:
+        return json.dumps(item).decode("utf-8")
+
+    async def schedule(self, items: list[dict]) -> None:
+        """按退避时间写入重试计划, 超过时效或重试次数的条目直接丢弃"""
+        now = time.time()
+        mapping: dict[str, float] = {}
+        for item in items:
+            if item["attempts"] >= self.max_attempts:
+                self._drop("exhausted", item)
+                continue
+            retry_at = now + self.backoff(item["attempts"])
+            if retry_at - item["since"] > self.max_age:
+                self._drop("stale", item)
+                continue
+            mapping[self._entry(item)] = retry_at
+        if mapping:
+            await self.redis.zadd(TX_RETRY_SCHEDULE, mapping)
+
+    async def intake(self) -> int:
+        """将失败队列中的消息转入重试计划, 返回转入数"""
+        items = []
+        for popper in self.poppers:
+            for entry in await popper.pop_nowait():
+                failed_at, data = unwrap_failed(entry)
+                # 交易详情为 JSON, 其余为签名
+                kind: RetryKind = "parse" if data.startswith("{") else "fetch"
+                since = failed_at or time.time()
+                items.append({"kind": kind, "data": data, "since": since, "attempts": 0})
+        await self.schedule(items)
+        return len(items)
+
+    async def claim_due(self) -> list[dict]:
+        """原子地取出到期的条目"""
+        entries = await self.redis.eval(
+            _CLAIM_DUE_SCRIPT, 1, TX_RETRY_SCHEDULE, time.time(), self.batch_size
+        )
+        return [json.loads(entry) for entry in entries]
+
+    async def retry_fetch(self, item: dict) -> bool:
+        try:
+            tx_detail = await self.fetch(Signature.from_string(item["data"]))
+        except Exception as e:
+            logger.debug(f"Retry fetch failed: {e}")
+            return False
+        if tx_detail is None:
+            return False
+        block_time = tx_detail.get("blockTime")
+        if block_time is not None and time.time() - block_time > self.max_age:
+            self._drop("stale", item)
+            return True
+        await self.pusher.push(NEW_TX_DETAIL_CHANNEL, json.dumps(tx_detail).decode("utf-8"))
+        self.recovered["fetch"] += 1
+        return True
+
+    async def retry_parse(self, item: dict) -> bool:
+        result = parse_tx_detail(item["data"])
+        if result.block_time is not None:
+            item["since"] = min(item["since"], result.block_time)
+        if result.status == "failed":
+            return False
+        if result.status != "ok" or result.tx_event is None:
+            # 交易本身不需要跟单 (非 swap 等), 重试没有意义
+            self._drop(result.status, item)
+            return True
+        if time.time() - item["since"] > self.max_age:
+            self._drop("stale", item)
+            return True
+        signature = result.tx_event.signature
+        if await self.event_dedup.is_new(signature):
+
+            async def on_failure(tx_event: TxEvent, error: Exception) -> None:
+                # 发布失败时撤销去重记录并重新写入重试计划
+                logger.warning(f"Failed to produce recovered tx event {signature}: {error}")
+                await self.event_dedup.forget(signature)
+                item["attempts"] += 1
+                await self.schedule([item])
+
+            if not await produce_tx_event(self.tx_event_producer, result.tx_event, on_failure):
+                return True
+            await benchmark.record_produced(signature)
+            logger.success(f"Recovered tx event: {signature}")
+        self.recovered["parse"] += 1
+        return True
+
+    async def retry(self, item: dict) -> bool:
+        """重试一个条目, 返回是否已处理完毕 (成功或丢弃)"""
+        self.retried[item["kind"]] += 1
+        if time.time() - item["since"] > self.max_age:
+            self._drop("stale", item)
+            return True
+        try:
+            if item["kind"] == "fetch":
+                return await self.retry_fetch(item)
+            return await self.retry_parse(item)
+        except Exception as e:
+            logger.error(f"Error retrying failed tx: {e}")
+            return False
+
+    async def process_due(self) -> int:
+        """重试到期的条目, 返回处理数"""
+        items = await self.claim_due()
+        if not items:
+            return 0
+        done = await asyncio.gather(*(self.retry(item) for item in items))
+        failed = [item for item, ok in zip(items, done, strict=True) if not ok]
+        for item in failed:
+            item["attempts"] += 1
+        await self.schedule(failed)
+        await self.pusher.flush()
+        return len(items)
+
+    async def run_once(self) -> None:
+        await self.intake()
+        while await self.process_due() >= self.batch_size:
+            pass
+        self.depth = await self.redis.zcard(TX_RETRY_SCHEDULE)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "retried": dict(self.retried),
+            "recovered": dict(self.recovered),
+            "dropped": dict(self.dropped),
+        }
+
+    async def start(self):
+        logger.info("Starting failed transaction reprocessor")
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                await self.run_once()
+            except RedisError as e:
+                logger.error(f"Failed to reprocess failed transactions: {e}")
+            except Exception as e:
+                logger.exception(f"Reprocessor error: {e}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+        await self.pusher.close()
+
+    async def stop(self):
+        self._stop.set()
@@ -9,6 +9,7 @@ from solbot_db.redis import RedisClient
 from solbot_services.copytrade import CopyTradeService
 from solders.pubkey import Pubkey  # type: ignore
 
+from .geyser.inline import InlineTransactionSubscriber as GeyserInlineMonitor
 from .geyser.tx_subscriber import TransactionDetailSubscriber as GeyserMonitor
 from .wss.tx_subscriber import TransactionDetailSubscriber as RPCMonitor
 
@@ -17,7 +18,7 @@ class TxMonitor:
     def __init__(
         self,
         wallets: Sequence[Pubkey],
-        mode: Literal["wss", "geyser"] = "wss",
+        mode: Literal["wss", "geyser", "geyser-inline"] = "wss",
     ):
         self.mode = mode
         redis = RedisClient.get_instance()
@@ -35,6 +36,14 @@ class TxMonitor:
                 redis,
                 wallets,
             )
+        elif mode == "geyser-inline":
+            # 在进程内解析并发布 TxEvent, Redis 交易详情队列仅用于溢出与失败
+            self.monitor = GeyserInlineMonitor(
+                settings.rpc.geyser.endpoint,
+                settings.rpc.geyser.api_key,
+                redis,
+                wallets,
+            )
         else:
             raise ValueError("Invalid mode")
 
@@ -55,6 +64,7 @@ class TxMonitor:
         # 从数据库中获取已激活的目标地址
         monitor_addresses = await Monitor.get_active_wallet_addresses()
         copytrade_addresses = await CopyTradeService.get_active_wallet_addresses()
+        await self._update_priority_wallets(copytrade_addresses)
         # 合并两个列表
         active_wallet_addresses = list(set(list(monitor_addresses) + list(copytrade_addresses)))
         for address in active_wallet_addresses:
@@ -77,11 +87,26 @@ class TxMonitor:
         await self.events.unsubscribe()
         await self.monitor.stop()
 
+    async def _update_priority_wallets(self, copytrade_addresses: Sequence[str] | None = None):
+        """Geyser 模式下优先处理有跟单的钱包, 响应队列满时这些钱包的交易最后被淘汰"""
+        if not isinstance(self.monitor, GeyserMonitor):
+            return
+        if copytrade_addresses is None:
+            try:
+                copytrade_addresses = await CopyTradeService.get_active_wallet_addresses()
+            except Exception as e:
+                logger.error(f"Failed to load copytrade wallets: {e}")
+                return
+        wallets = set(copytrade_addresses)
+        wallets.update(str(copytrade.target_wallet) for copytrade in settings.copytrades)
+        self.monitor.set_priority_wallets(list(wallets))
+
     async def _handle_resume_event(self, event: MonitorEvent):
         """处理恢复监听事件"""
         try:
             wallet = Pubkey.from_string(event.target_wallet)
             await self.monitor.subscribe_wallet_transactions(wallet)
+            await self._update_priority_wallets()
             logger.info(f"Resumed monitoring wallet: {wallet}")
         except Exception as e:
             logger.error(f"Failed to resume monitoring wallet {event.target_wallet}: {e}")
@@ -92,6 +117,7 @@ class TxMonitor:
         try:
             wallet = Pubkey.from_string(event.target_wallet)
             await self.monitor.unsubscribe_wallet_transactions(wallet)
+            await self._update_priority_wallets()
             logger.info(f"Paused monitoring wallet: {wallet}")
         except Exception as e:
             logger.error(f"Failed to pause monitoring wallet {event.target_wallet}: {e}")
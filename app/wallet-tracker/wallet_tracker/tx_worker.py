@@ -1,20 +1,70 @@
 import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Literal
 
 import aioredis
 import orjson as json
 from aioredis.exceptions import RedisError
-from solbot_common.cp.tx_event import TxEventProducer
 from solbot_common.log import logger
+from solbot_common.types import TxEvent
 
 from wallet_tracker import benchmark
 from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL, NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.dedup import TX_EVENT_NAMESPACE, SignatureDeduplicator
 from wallet_tracker.exceptions import (
     NotSwapTransaction,
     TransactionError,
     UnknownTransactionType,
     ZeroChangeAmountError,
 )
+from wallet_tracker.ingress import BatchPopper, BatchPusher, wrap_failed
 from wallet_tracker.parser import RawTXParser
+from wallet_tracker.reorder import create_tx_event_producer, produce_tx_event
+
+
+@dataclass
+class ParseResult:
+    """子进程解析结果
+
+    解析过程中的异常不会直接抛回主进程（部分自定义异常无法被 pickle），
+    而是转换为 status 与 error。
+    """
+
+    status: Literal["ok", "tx_error", "not_swap", "unknown_type", "zero_amount", "failed"]
+    tx_hash: str | None = None
+    block_time: int | None = None
+    tx_event: TxEvent | None = None
+    error: str | None = None
+    parse_start: float = 0.0
+    parse_end: float = 0.0
+
+
+def parse_tx_detail(tx_detail_text: str) -> ParseResult:
+    """解析交易详情, 在进程池中执行"""
+    parse_start = time.time()
+    tx_hash = None
+    block_time = None
+    try:
+        tx_parser = RawTXParser.from_json(tx_detail_text)
+        tx_hash = tx_parser.get_tx_hash()
+        block_time = tx_parser.get_block_time()
+        tx_event = tx_parser.parse()
+        status = "ok" if tx_event is not None else "failed"
+        return ParseResult(status, tx_hash, block_time, tx_event, None, parse_start, time.time())
+    except TransactionError as e:
+        status, error = "tx_error", str(e)
+    except NotSwapTransaction:
+        status, error = "not_swap", None
+    except UnknownTransactionType:
+        status, error = "unknown_type", None
+    except ZeroChangeAmountError as e:
+        status, error = "zero_amount", str(e)
+    except Exception as e:
+        status, error = "failed", repr(e)
+    return ParseResult(status, tx_hash, block_time, None, error, parse_start, time.time())
 
 
 class TransactionWorker:
@@ -26,18 +76,56 @@ class TransactionWorker:
     - 加仓
     - 减仓
     - 清仓
+
+    Args:
+        redis: Redis 客户端
+        parse_processes: 解析进程数。为 0 时在事件循环中解析；大于 0 时将交易详情交给
+            进程池解析，并按出队顺序发布 TxEvent；小于 0 时使用 CPU 核心数
+        pop_batch_size: 单次从 Redis 取出的最大交易详情数
     """
 
-    def __init__(self, redis: aioredis.Redis):
+    def __init__(self, redis: aioredis.Redis, parse_processes: int = 0, pop_batch_size: int = 32):
         self.redis: aioredis.Redis = redis
+        self.pop_batch_size = pop_batch_size
+        self.popper = BatchPopper(redis, NEW_TX_DETAIL_CHANNEL, count=pop_batch_size)
+        self.pusher = BatchPusher(redis)
         self.is_running = False
-        self.lock = asyncio.Lock()
-        self.tx_event_producer = TxEventProducer(redis)
+        self.tx_event_producer = create_tx_event_producer(redis)
+        # 避免重复的 TxEvent 触发重复跟单
+        self.dedup = SignatureDeduplicator(redis, TX_EVENT_NAMESPACE)
+        if parse_processes < 0:
+            parse_processes = os.cpu_count() or 1
+        self.parse_processes = parse_processes
+        self.executor: ProcessPoolExecutor | None = None
+        # 已提交到进程池、等待按顺序发布的解析任务
+        self.pending: asyncio.Queue[tuple[str, asyncio.Future[ParseResult]]] = asyncio.Queue(
+            maxsize=max(parse_processes, 1) * 4
+        )
+        self.workers: list[asyncio.Task] = []
 
     async def push_parse_failed_to_redis(self, tx_event: str):
         """解析失败的交易详情放入失败队列"""
         assert self.redis is not None
-        await self.redis.lpush(FAILED_TX_DETAIL_CHANNEL, tx_event)
+        await self.pusher.push(FAILED_TX_DETAIL_CHANNEL, wrap_failed(tx_event))
+
+    async def produce(self, tx_event: TxEvent, tx_detail_text: str) -> None:
+        """发布 TxEvent, 时间窗口内已发布过的交易会被跳过
+
+        发布失败时撤销去重记录, 并将交易详情放入失败队列等待重试
+        """
+        if not await self.dedup.is_new(tx_event.signature):
+            logger.info(f"Skipping duplicate tx event: {tx_event.signature}")
+            return
+
+        async def on_failure(tx_event: TxEvent, error: Exception) -> None:
+            logger.error(f"Failed to produce tx event {tx_event.signature}: {error}")
+            await self.dedup.forget(tx_event.signature)
+            await self.push_parse_failed_to_redis(tx_detail_text)
+
+        if not await produce_tx_event(self.tx_event_producer, tx_event, on_failure):
+            return
+        await benchmark.record_produced(tx_event.signature)
+        logger.success(f"New tx event: {tx_event.signature}")
 
     async def process_transaction(self, tx_detail: dict):
         """处理单个交易"""
@@ -59,8 +147,7 @@ class TransactionWorker:
                 # 加入到失败队列
                 await self.push_parse_failed_to_redis(tx_detail_text)
                 return
-            await self.tx_event_producer.produce(tx_event)
-            logger.success(f"New tx event: {tx_hash}")
+            await self.produce(tx_event, tx_detail_text)
         except TransactionError as e:
             logger.info(f"Transaction status is not valid, status: {e}")
         except NotSwapTransaction:
@@ -80,18 +167,47 @@ class TransactionWorker:
         # finally:
         #     await benchmark.show_timeline(tx_hash)
 
+    async def process_parse_result(self, tx_detail_text: str, result: ParseResult):
+        """处理进程池返回的解析结果"""
+        tx_hash = result.tx_hash
+        if tx_hash is not None and result.block_time is not None:
+            await benchmark.record_block_time(tx_hash, result.block_time)
+            await benchmark.record_parse_time(tx_hash, result.parse_start, result.parse_end)
+
+        if result.status == "ok" and result.tx_event is not None:
+            await self.produce(result.tx_event, tx_detail_text)
+        elif result.status == "tx_error":
+            logger.info(f"Transaction status is not valid, status: {result.error}")
+        elif result.status == "not_swap":
+            logger.info(f"Tx is not swap transaction, details: {tx_hash}")
+        elif result.status == "unknown_type":
+            logger.info(f"Tx type is not valid, details: {tx_hash}")
+        elif result.status == "zero_amount":
+            logger.info(f"Tx amount is zero, details: {tx_hash}")
+        else:
+            logger.error(
+                f"Failed to process transaction: {result.error}, details: {tx_detail_text}"
+            )
+            # 加入到失败队列
+            await self.push_parse_failed_to_redis(tx_detail_text)
+
     async def worker(self):
-        """单个 worker 协程"""
+        """单个 worker 协程
+
+        出队本身是原子操作，多个 worker 无需加锁即可并发出队。
+        """
         while self.is_running:
             try:
                 assert self.redis is not None
-                async with self.lock:
-                    result = await self.redis.brpop(NEW_TX_DETAIL_CHANNEL, timeout=1)
-                    if result is None:  # timeout occurred
-                        continue
-                _, tx_detail = result
-                json_data = json.loads(tx_detail)
-                await self.process_transaction(json_data)
+                tx_details = await self.popper.pop()
+                for tx_detail in tx_details:
+                    # 单条交易出错不影响同一批次的其他交易
+                    try:
+                        json_data = json.loads(tx_detail)
+                        await self.process_transaction(json_data)
+                    except Exception as e:
+                        logger.error(f"Worker error: {e}")
+                        logger.exception(e)
             except RedisError as e:
                 logger.error(f"Failed to push transaction to Redis: {e}")
                 continue
@@ -103,10 +219,62 @@ class TransactionWorker:
                 logger.exception(e)
                 continue
 
+    async def dispatcher(self):
+        """从队列中取出交易详情并提交给进程池
+
+        待发布队列有上限，进程池处理不过来时会暂停出队，积压留在 Redis 中。
+        """
+        assert self.executor is not None
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            try:
+                # 单次出队数量不超过待发布队列的剩余容量
+                free = self.pending.maxsize - self.pending.qsize()
+                self.popper.count = max(min(self.pop_batch_size, free), 1)
+                for tx_detail_text in await self.popper.pop():
+                    future = loop.run_in_executor(self.executor, parse_tx_detail, tx_detail_text)
+                    await self.pending.put((tx_detail_text, future))
+            except RedisError as e:
+                logger.error(f"Failed to pop transaction from Redis: {e}")
+                continue
+            except asyncio.CancelledError:
+                logger.info("Dispatcher task cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Dispatcher error: {e}")
+                logger.exception(e)
+                continue
+
+    async def emitter(self):
+        """按出队顺序等待解析结果并发布 TxEvent"""
+        while self.is_running:
+            try:
+                tx_detail_text, future = await self.pending.get()
+                try:
+                    result = await future
+                except Exception as e:
+                    result = ParseResult("failed", error=repr(e))
+                await self.process_parse_result(tx_detail_text, result)
+            except asyncio.CancelledError:
+                logger.info("Emitter task cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Emitter error: {e}")
+                logger.exception(e)
+                continue
+
     async def start(self, num_workers: int = 2):
         """启动多个 worker 协程并行处理消息"""
         self.is_running = True
-        self.workers = [asyncio.create_task(self.worker()) for _ in range(num_workers)]
+        if self.parse_processes > 0:
+            logger.info(f"Starting transaction worker with {self.parse_processes} parse processes")
+            self.executor = ProcessPoolExecutor(max_workers=self.parse_processes)
+            self.workers = [
+                asyncio.create_task(self.dispatcher()),
+                asyncio.create_task(self.emitter()),
+            ]
+        else:
+            self.workers = [asyncio.create_task(self.worker()) for _ in range(num_workers)]
         try:
             await asyncio.gather(*self.workers)
         except asyncio.CancelledError:
@@ -120,6 +288,13 @@ class TransactionWorker:
                 if not worker.done():
                     worker.cancel()
             await asyncio.gather(*self.workers, return_exceptions=True)
+            try:
+                await self.pusher.close()
+            except RedisError as e:
+                logger.error(f"Failed to flush failed transactions to Redis: {e}")
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
 
     async def stop(self) -> None:
         """Stop the wallet monitor gracefully."""
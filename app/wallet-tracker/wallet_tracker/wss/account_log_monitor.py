@@ -1,53 +1,98 @@
 """
 连接 RPC 监听账户日志
 监控聪明钱包的交易活动，并将消息推送至 Redis
+
+钱包按哈希分配到多个 WebSocket 连接 (`settings.rpc.endpoints` 中每个节点建立
+`connections_per_endpoint` 个连接), 每个连接的订阅数有上限。连接断开后, 该连接上的
+钱包会迁移到其他健康的连接, 断开的连接持续重连, 恢复后重新接收新的钱包。
 """
 
 import asyncio
-from collections.abc import Sequence
+import zlib
+from collections.abc import Iterable, Sequence
 
 import aioredis
-from _pickle import PicklingError
-from solana.rpc.websocket_api import connect
 from solbot_common.config import settings
 from solbot_common.log import logger
-from solders.errors import SerdeJSONError  # type: ignore
+from solbot_common.types import TxEvent
 from solders.pubkey import Pubkey  # type: ignore
-from solders.rpc.config import RpcTransactionLogsFilterMentions  # type: ignore
-from solders.rpc.responses import LogsNotification, SubscriptionResult  # type: ignore
-from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+from solders.rpc.responses import LogsNotification  # type: ignore
 
 from wallet_tracker import benchmark
 from wallet_tracker.constants import NEW_TX_SIGNATURE_CHANNEL
+from wallet_tracker.dedup import (
+    SIGNATURE_NAMESPACE,
+    TX_EVENT_NAMESPACE,
+    SignatureDeduplicator,
+)
+from wallet_tracker.ingress import BatchPusher
+from wallet_tracker.parser.logs import parse_logs
+from wallet_tracker.reorder import create_tx_event_producer, produce_tx_event
+from wallet_tracker.replay import StreamRecorder
+from wallet_tracker.wss.connection import LogsConnection
 
 
 class AccountLogMonitor:
     def __init__(
         self,
         init_wallets: Sequence[Pubkey],
-        rpc_endpoint: str,
+        rpc_endpoints: str | Sequence[str],
         redis_client: aioredis.Redis,
         redis_channel: str = NEW_TX_SIGNATURE_CHANNEL,
+        connections_per_endpoint: int = 1,
+        max_wallets_per_connection: int = 1000,
+        max_pending_subscriptions: int = 500,
+        log_fast_path: bool = False,
+        recorder: StreamRecorder | None = None,
     ):
         """
         初始化监控器
 
         Args:
             init_wallets: 要监控的钱包地址列表
-            rpc_endpoint: Solana RPC 端点
+            rpc_endpoints: Solana RPC 端点, 可以是多个
             redis_channel: Redis 发布订阅频道名
+            connections_per_endpoint: 每个端点建立的 WebSocket 连接数
+            max_wallets_per_connection: 单个连接最多订阅的钱包数
+            max_pending_subscriptions: 单个连接最多同时等待响应的订阅请求数
+            log_fast_path: 能从日志中识别出交易时直接发布临时的 TxEvent, 不再查询交易详情
+            recorder: 录制收到的日志消息, 用于离线回放
         """
+        if isinstance(rpc_endpoints, str):
+            rpc_endpoints = [rpc_endpoints]
+        if not rpc_endpoints or connections_per_endpoint < 1:
+            raise ValueError("At least one websocket connection is required")
+
         self.init_wallets = list(init_wallets)
-        self.websocket_url = rpc_endpoint.replace("https://", "wss://")
         self.redis_channel = redis_channel
         self.redis = redis_client
+        self.pusher = BatchPusher(redis_client)
+        # 同一交易可能提及多个被监听的钱包, 或同时由其他数据源写入
+        self.dedup = SignatureDeduplicator(redis_client, SIGNATURE_NAMESPACE)
+        self.log_fast_path = log_fast_path
+        self.recorder = recorder
+        self.tx_event_producer = create_tx_event_producer(redis_client)
+        self.event_dedup = SignatureDeduplicator(redis_client, TX_EVENT_NAMESPACE)
         self.is_running = False
-        # FIXME: 目前采用的是钱包与钱包建立映射关系，是否可能出现多个钱包跟踪同一个目标钱包的情况。其中一个钱包取消了订阅，是否可能导致其他钱包也无法收到消息
-        self.subscription_ids = {}  # 新增：存储钱包地址和订阅ID的映射
-        self.websocket = None  # 新增：存储 websocket 连接
-        self.waitting_subscribe_response_wallet = None  # 新增：存储等待订阅响应的钱包地址
-        self.subscribed_wallets = set()  # 新增：存储已订阅的钱包地址
-        self.subscribe_lock = asyncio.Lock()  # 新增：订阅锁
+        self.max_wallets_per_connection = max_wallets_per_connection
+        self.connections = [
+            LogsConnection(
+                f"WS-{i}-{j}",
+                endpoint.replace("https://", "wss://"),
+                self.process_log,
+                self._on_connection_state_change,
+                commitment=settings.rpc.commitment,
+                max_pending=max_pending_subscriptions,
+            )
+            for i, endpoint in enumerate(rpc_endpoints)
+            for j in range(connections_per_endpoint)
+        ]
+        # 钱包 -> 连接序号
+        self.assignments: dict[str, int] = {}
+        # 每个连接分配的钱包数
+        self.loads = [0] * len(self.connections)
+        # 所有连接都已满, 暂未分配的钱包
+        self.unassigned: set[str] = set()
         self.waitting_subscribe_wallet: asyncio.Queue[Pubkey] = (
             asyncio.Queue()
         )  # 新增：等待订阅的钱包队列
@@ -56,6 +101,17 @@ class AccountLogMonitor:
         )  # 新增：等待取消订阅的钱包队列
         self.__subscribe_task_join_handle = None  # 新增：订阅任务句柄
         self.__unsubscribe_task_join_handle = None  # 新增：取消订阅任务句柄
+        # 连接状态变化触发的迁移任务
+        self._rebalance_tasks: set[asyncio.Task] = set()
+        # 串行化钱包分配, 避免迁移与订阅/取消订阅交错
+        self._assign_lock = asyncio.Lock()
+
+    @property
+    def subscribed_wallets(self) -> set[str]:
+        wallets: set[str] = set()
+        for connection in self.connections:
+            wallets.update(connection.subscriptions.subscribed_wallets)
+        return wallets
 
     async def process_log(self, message: LogsNotification) -> None:
         """
@@ -65,69 +121,186 @@ class AccountLogMonitor:
             message: WebSocket 返回的日志数据
         """
         try:
+            if self.recorder is not None:
+                self.recorder.record_logs(message)
             signature = str(message.result.value.signature)
             assert self.redis is not None, "Redis is not connected"
-            # 发送到 Redis
-            await self.redis.lpush(self.redis_channel, signature)
+            if not await self.dedup.is_new(signature):
+                logger.debug(f"Skipping duplicate tx signature: {signature}")
+                return
+            try:
+                if self.log_fast_path and await self.process_log_fast_path(message):
+                    return
+                # 发送到 Redis, 批量写入
+                await self.pusher.push(self.redis_channel, signature)
+            except Exception:
+                await self.dedup.forget(signature)
+                raise
             await benchmark.init(str(signature))
             logger.info(f"New tx signature: {signature}")
         except Exception as e:
             logger.error(f"Error processing log: {e}")
 
-    async def process_subscribe_result(self, message: SubscriptionResult) -> None:
-        subscription_id = message.result
-        if self.waitting_subscribe_response_wallet is None:
-            raise ValueError(f"Unexpected subscription result: {message}")
+    async def process_log_fast_path(self, message: LogsNotification) -> bool:
+        """从日志中解析交易并直接发布 TxEvent, 无法解析时返回 False"""
+        value = message.result.value
+        if value.err is not None:
+            return False
+        signature = str(value.signature)
+        tx_event = parse_logs(
+            signature, value.logs, self.assignments, slot=message.result.context.slot
+        )
+        if tx_event is None:
+            return False
+        await benchmark.init(signature)
+        if await self.event_dedup.is_new(signature) and await produce_tx_event(
+            self.tx_event_producer, tx_event, self._on_fast_path_failed
+        ):
+            await benchmark.record_produced(signature)
+            logger.success(f"New provisional tx event from logs: {signature}")
+        return True
 
-        async with self.subscribe_lock:
-            self.subscription_ids[self.waitting_subscribe_response_wallet] = subscription_id
-            old_wallet = self.waitting_subscribe_response_wallet
-            self.waitting_subscribe_response_wallet = None
+    async def _on_fast_path_failed(self, tx_event: TxEvent, error: Exception) -> None:
+        """快速路径发布失败时撤销去重记录, 改为查询交易详情的常规路径"""
+        logger.warning(f"Failed to produce tx event from logs {tx_event.signature}: {error}")
+        await self.event_dedup.forget(tx_event.signature)
+        await self.pusher.push(self.redis_channel, tx_event.signature)
 
-        logger.info(f"Subscribed to logs with subscription ID: {subscription_id}")
-        if old_wallet not in self.subscribed_wallets:
-            self.subscribed_wallets.add(old_wallet)
+    def shard_of(self, wallet: str) -> int:
+        """钱包所在的首选连接, 使用 crc32 保证不同进程间结果一致"""
+        return zlib.crc32(wallet.encode()) % len(self.connections)
+
+    def _pick_connection(
+        self,
+        wallet: str,
+        healthy_only: bool = False,
+        exclude: int | None = None,
+    ) -> int | None:
+        """为钱包选择连接: 从首选连接开始, 优先选择已连接且未满的连接"""
+        start = self.shard_of(wallet)
+        candidates = []
+        for offset in range(len(self.connections)):
+            index = (start + offset) % len(self.connections)
+            if index == exclude or self.loads[index] >= self.max_wallets_per_connection:
+                continue
+            if self.connections[index].is_connected:
+                return index
+            candidates.append(index)
+        if healthy_only or not candidates:
+            return None
+        return candidates[0]
+
+    def _move(self, wallet: str, index: int | None) -> None:
+        """记录钱包所在的连接, index 为 None 表示取消分配"""
+        previous = self.assignments.pop(wallet, None)
+        if previous is not None:
+            self.loads[previous] -= 1
+        if index is not None:
+            self.assignments[wallet] = index
+            self.loads[index] += 1
+
+    async def _assign(self, wallets: Iterable[str]) -> None:
+        batches: dict[int, list[str]] = {}
+        for wallet in wallets:
+            if wallet in self.assignments:
+                continue
+            index = self._pick_connection(wallet)
+            if index is None:
+                if wallet not in self.unassigned:
+                    logger.error(
+                        f"Cannot subscribe wallet {wallet}: all {len(self.connections)} "
+                        f"connections are full ({self.max_wallets_per_connection} wallets "
+                        "per connection)"
+                    )
+                self.unassigned.add(wallet)
+                continue
+            self.unassigned.discard(wallet)
+            self._move(wallet, index)
+            batches.setdefault(index, []).append(wallet)
+
+        for index, batch in batches.items():
+            await self.connections[index].subscriptions.subscribe(batch)
 
     async def subscribe_wallet(self, wallet: Pubkey) -> None:
         """订阅单个钱包"""
-        if not self.websocket:
-            logger.warning(
-                f"WebSocket connection is not established. Cannot subscribe to wallet: {wallet}"
-            )
-            return
+        await self.subscribe_wallets([wallet])
 
-        logger.debug(f"Subscribing to wallet: {wallet}")
-        async with self.subscribe_lock:
-            self.waitting_subscribe_response_wallet = str(wallet)
-            await self.websocket.logs_subscribe(
-                filter_=RpcTransactionLogsFilterMentions(wallet),
-                commitment=settings.rpc.commitment,
-            )
+    async def subscribe_wallets(self, wallets: list[Pubkey]) -> None:
+        """批量订阅钱包, 未连接时会在连接建立后订阅"""
+        logger.debug(f"Subscribing to {len(wallets)} wallets")
+        async with self._assign_lock:
+            await self._assign(str(wallet) for wallet in wallets)
 
     async def unsubscribe_wallet(self, wallet: Pubkey) -> None:
         """取消订阅单个钱包"""
-        if not self.websocket:
-            logger.warning(
-                f"WebSocket connection is not established. Cannot subscribe to wallet: {wallet}"
-            )
+        await self.unsubscribe_wallets([wallet])
+
+    async def unsubscribe_wallets(self, wallets: list[Pubkey]) -> None:
+        """批量取消订阅钱包, 释放的容量用于暂未分配的钱包"""
+        async with self._assign_lock:
+            batches: dict[int, list[str]] = {}
+            for wallet in map(str, wallets):
+                self.unassigned.discard(wallet)
+                index = self.assignments.get(wallet)
+                if index is not None:
+                    self._move(wallet, None)
+                    batches.setdefault(index, []).append(wallet)
+            for index, batch in batches.items():
+                await self.connections[index].subscriptions.unsubscribe(batch)
+            if self.unassigned:
+                await self._assign(list(self.unassigned))
+
+    def _on_connection_state_change(self, connection: LogsConnection) -> None:
+        if not self.is_running:
             return
+        task = asyncio.create_task(self._rebalance(connection))
+        self._rebalance_tasks.add(task)
+        task.add_done_callback(self._rebalance_tasks.discard)
+
+    async def _rebalance(self, connection: LogsConnection) -> None:
+        """连接断开时迁移其钱包, 连接恢复时分配暂未分配的钱包"""
+        async with self._assign_lock:
+            if connection.is_connected:
+                if self.unassigned:
+                    await self._assign(list(self.unassigned))
+                return
+
+            failed = self.connections.index(connection)
+            moved: dict[int, list[str]] = {}
+            for wallet, index in list(self.assignments.items()):
+                if index != failed:
+                    continue
+                target = self._pick_connection(wallet, healthy_only=True, exclude=failed)
+                # 没有健康且未满的连接, 剩余钱包等待该连接重连
+                if target is None:
+                    break
+                self._move(wallet, target)
+                moved.setdefault(target, []).append(wallet)
+
+            for target, batch in moved.items():
+                await connection.subscriptions.unsubscribe(batch)
+                await self.connections[target].subscriptions.subscribe(batch)
+                logger.info(
+                    f"Moved {len(batch)} wallets from {connection.name} "
+                    f"to {self.connections[target].name}"
+                )
 
-        wallet_str = str(wallet)
-        if wallet_str in self.subscription_ids:
-            async with self.subscribe_lock:
-                subscription_id = self.subscription_ids[wallet_str]
-                del self.subscription_ids[wallet_str]
-                self.subscribed_wallets.remove(wallet_str)
-                await self.websocket.logs_unsubscribe(subscription_id)
-            logger.info(f"Unsubscribed from wallet: {wallet}")
+    @staticmethod
+    async def _drain(queue: asyncio.Queue[Pubkey]) -> list[Pubkey]:
+        """等待至少一个钱包, 并取出队列中已有的全部钱包"""
+        wallets = [await queue.get()]
+        while not queue.empty():
+            wallets.append(queue.get_nowait())
+        return wallets
 
     async def __subscribe_task(self) -> None:
         """订阅所有钱包"""
         while self.is_running:
             try:
-                wallet = await self.waitting_subscribe_wallet.get()
-                await self.subscribe_wallet(wallet)
-                self.waitting_subscribe_wallet.task_done()
+                wallets = await self._drain(self.waitting_subscribe_wallet)
+                await self.subscribe_wallets(wallets)
+                for _ in wallets:
+                    self.waitting_subscribe_wallet.task_done()
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -138,9 +311,10 @@ class AccountLogMonitor:
         """取消订阅所有钱包"""
         while self.is_running:
             try:
-                wallet = await self.waitting_unsubscribe_wallet.get()
-                await self.unsubscribe_wallet(wallet)
-                self.waitting_unsubscribe_wallet.task_done()
+                wallets = await self._drain(self.waitting_unsubscribe_wallet)
+                await self.unsubscribe_wallets(wallets)
+                for _ in wallets:
+                    self.waitting_unsubscribe_wallet.task_done()
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -148,87 +322,29 @@ class AccountLogMonitor:
         return
 
     async def start(self) -> None:
-        """启动监控服务"""
+        """启动监控服务, 直到调用 `stop`"""
         self.is_running = True
-        retry_count = 0
-        max_retries = 5
-        base_delay = 5
 
-        while self.is_running:
-            # 如果断开了，重新连接时，需要将已订阅的钱包重新进行订阅
-            for wallet in self.subscribed_wallets:
-                self.waitting_subscribe_wallet.put_nowait(Pubkey.from_string(wallet))
+        # 初始钱包, 连接建立后订阅
+        await self.subscribe_wallets(self.init_wallets)
 
-            try:
-                async with connect(
-                    self.websocket_url,
-                    ping_timeout=30,
-                    ping_interval=20,
-                    close_timeout=20,
-                ) as websocket:
-                    self.websocket = websocket
-                    logger.info(
-                        f"Successfully connected to Solana WebSocket RPC({self.websocket_url})"
-                    )
-                    retry_count = 0  # Reset retry count on successful connection
-
-                    for wallet in self.init_wallets:
-                        await self.waitting_subscribe_wallet.put(wallet)
-
-                    if self.__subscribe_task_join_handle is None:
-                        self.__subscribe_task_join_handle = asyncio.create_task(
-                            self.__subscribe_task()
-                        )
-                    if self.__unsubscribe_task_join_handle is None:
-                        self.__unsubscribe_task_join_handle = asyncio.create_task(
-                            self.__unsubscribe_task()
-                        )
-
-                    while self.is_running:
-                        try:
-                            messages = await websocket.recv()
-                            for message in messages:
-                                if isinstance(message, SubscriptionResult):
-                                    await self.process_subscribe_result(message)
-                                    continue
-                                elif isinstance(message, LogsNotification):
-                                    await self.process_log(message)
-                        except (ConnectionClosedError, ConnectionClosedOK) as ws_error:
-                            logger.warning(f"WebSocket connection closed: {ws_error}")
-                            break
-                        except (SerdeJSONError, PicklingError) as e:
-                            # FIXME: 取消订阅后，接收到的消息反序列化失败
-                            logger.warning(f"Skipping invalid message: {e}")
-                        except Exception as e:
-                            logger.error(f"Error processing message: {e}")
-                            logger.exception(e)
-                            break
-            except Exception as e:
-                logger.error(f"Error in monitor loop: {e}")
-                logger.exception(e)
-
-            # Clean up and prepare for reconnection
-            self.subscription_ids.clear()
-            await self.cleanup()
-
-            # Implement exponential backoff for all reconnection attempts
-            retry_count += 1
-            if retry_count > max_retries:
-                logger.error(f"Maximum retries ({max_retries}) reached. Stopping monitor.")
-                self.is_running = False
-                break
+        if self.__subscribe_task_join_handle is None:
+            self.__subscribe_task_join_handle = asyncio.create_task(self.__subscribe_task())
+        if self.__unsubscribe_task_join_handle is None:
+            self.__unsubscribe_task_join_handle = asyncio.create_task(self.__unsubscribe_task())
 
-            delay = min(base_delay * (2 ** (retry_count - 1)), 60)  # Cap at 60 seconds
-            logger.info(
-                f"Attempting reconnection in {delay} seconds (attempt {retry_count}/{max_retries})"
-            )
-            await asyncio.sleep(delay)
+        logger.info(f"Starting {len(self.connections)} websocket connections")
+        await asyncio.gather(*(connection.run() for connection in self.connections))
 
     async def cleanup(self) -> None:
         """清理连接"""
+        for connection in self.connections:
+            await connection.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+
         try:
-            if self.websocket:
-                await self.websocket.close()
+            await self.pusher.close()
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
 
@@ -244,6 +360,8 @@ class AccountLogMonitor:
         if self.__unsubscribe_task_join_handle:
             self.__unsubscribe_task_join_handle.cancel()
             self.__unsubscribe_task_join_handle = None
+        for task in self._rebalance_tasks:
+            task.cancel()
 
     async def stop(self) -> None:
         """停止监控服务"""
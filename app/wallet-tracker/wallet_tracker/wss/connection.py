@@ -0,0 +1,147 @@
+"""单个 WebSocket logsSubscribe 连接
+
+每个连接维护自己的 `LogsSubscriptionManager`, 断开后无限重连 (指数退避, 最长 60 秒),
+连接状态变化时通知 `AccountLogMonitor`, 由其将钱包迁移到其他健康的连接。
+"""
+
+import asyncio
+from _pickle import PicklingError
+from collections.abc import Awaitable, Callable
+
+from solana.rpc.commitment import Commitment
+from solana.rpc.websocket_api import SolanaWsClientProtocol, SubscriptionError, connect
+from solbot_common.log import logger
+from solders.errors import SerdeJSONError  # type: ignore
+from solders.rpc.responses import LogsNotification, SubscriptionResult  # type: ignore
+from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+
+from wallet_tracker.wss.subscription import LogsSubscriptionManager
+
+
+class LogsConnection:
+    """单个 WebSocket 连接及其上的钱包订阅
+
+    Args:
+        name: 连接名称, 用于日志
+        websocket_url: WebSocket 端点
+        on_log: 收到日志通知时的回调
+        on_state_change: 连接建立或断开时的回调
+        commitment: 订阅使用的 commitment
+        max_pending: 最多同时等待响应的订阅请求数
+        base_delay: 重连的初始间隔 (秒)
+        max_delay: 重连的最大间隔 (秒)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        websocket_url: str,
+        on_log: Callable[[LogsNotification], Awaitable[None]],
+        on_state_change: Callable[["LogsConnection"], None] | None = None,
+        commitment: Commitment | None = None,
+        max_pending: int = 500,
+        base_delay: float = 5,
+        max_delay: float = 60,
+    ):
+        self.name = name
+        self.websocket_url = websocket_url
+        self.on_log = on_log
+        self.on_state_change = on_state_change
+        self.subscriptions = LogsSubscriptionManager(commitment, max_pending=max_pending)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.websocket: SolanaWsClientProtocol | None = None
+        self.is_running = False
+        self._resubscribe_task: asyncio.Task | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.websocket is not None
+
+    @property
+    def wallets(self) -> set[str]:
+        """分配到该连接的钱包 (包括尚未订阅成功的)"""
+        return self.subscriptions.wallets
+
+    def __repr__(self) -> str:
+        return f"LogsConnection({self.name}, wallets={len(self.wallets)})"
+
+    def _set_websocket(self, websocket: SolanaWsClientProtocol | None) -> None:
+        if websocket is None:
+            self.subscriptions.detach()
+        else:
+            self.subscriptions.attach(websocket)
+        self.websocket = websocket
+        if self.on_state_change is not None:
+            self.on_state_change(self)
+
+    async def run(self) -> None:
+        """维持连接, 断开后重连, 直到调用 `stop`"""
+        self.is_running = True
+        retry_count = 0
+
+        while self.is_running:
+            try:
+                async with connect(
+                    self.websocket_url,
+                    ping_timeout=30,
+                    ping_interval=20,
+                    close_timeout=20,
+                ) as websocket:
+                    logger.info(f"[{self.name}] Connected to Solana WebSocket RPC")
+                    retry_count = 0
+                    self._set_websocket(websocket)
+                    # 在后台重新订阅, 接收循环需要同时处理订阅响应
+                    self._resubscribe_task = asyncio.create_task(
+                        self.subscriptions.resubscribe_all()
+                    )
+                    await self._recv_loop(websocket)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"[{self.name}] Error in connection loop: {e}")
+                logger.exception(e)
+            finally:
+                if self._resubscribe_task is not None:
+                    self._resubscribe_task.cancel()
+                    self._resubscribe_task = None
+                if self.websocket is not None:
+                    self._set_websocket(None)
+
+            if not self.is_running:
+                break
+            # 不再限制重试次数, 其他连接会接管该连接上的钱包
+            retry_count += 1
+            delay = min(self.base_delay * (2 ** (retry_count - 1)), self.max_delay)
+            logger.info(
+                f"[{self.name}] Attempting reconnection in {delay} seconds (attempt {retry_count})"
+            )
+            await asyncio.sleep(delay)
+
+    async def _recv_loop(self, websocket: SolanaWsClientProtocol) -> None:
+        while self.is_running:
+            try:
+                messages = await websocket.recv()
+                for message in messages:
+                    if isinstance(message, SubscriptionResult):
+                        await self.subscriptions.on_subscription_result(message)
+                    elif isinstance(message, LogsNotification):
+                        await self.on_log(message)
+            except SubscriptionError as e:
+                logger.warning(f"[{self.name}] Subscription failed: {e}")
+                self.subscriptions.on_subscription_error(e.subscription.id, e)
+            except (ConnectionClosedError, ConnectionClosedOK) as ws_error:
+                logger.warning(f"[{self.name}] WebSocket connection closed: {ws_error}")
+                return
+            except (SerdeJSONError, PicklingError) as e:
+                # FIXME: 取消订阅后，接收到的消息反序列化失败
+                logger.warning(f"[{self.name}] Skipping invalid message: {e}")
+
+    async def stop(self) -> None:
+        self.is_running = False
+        websocket = self.websocket
+        if websocket is not None:
+            try:
+                await websocket.close()
+            except Exception as e:
+                logger.error(f"[{self.name}] Error during cleanup: {e}")
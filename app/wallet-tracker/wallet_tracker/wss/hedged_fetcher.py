@@ -0,0 +1,175 @@
+"""对冲查询交易详情
+
+原先每个签名都会同时向 `settings.rpc.endpoints` 中的所有节点发送 getTransaction,
+RPC 消耗是节点数的 N 倍, 而通常只有最快的一个结果被使用。
+
+`HedgedFetcher` 为每个节点记录延迟与成功率 (EWMA) 以及最近的延迟样本:
+- 先只请求得分最高的节点
+- 该节点在其 p90 延迟内没有返回 (或返回失败) 时, 才向下一个节点发送备用请求
+- 所有节点都返回 "交易尚不可查" 时, 按较短的重试间隔重新查询, 而不是直接放弃。
+  "交易尚不可查" 是节点的正常响应, 只记录延迟, 不降低成功率 (新签名通常最先问到的
+  首选节点查不到, 否则首选节点会被反复降级); 只有异常与 RPC 错误计为失败
+- 每隔 explore_interval 轮将其他节点排在首位, 使变快的节点有机会重新被选中
+
+在尾延迟相近的情况下, 大部分签名只需要一次 RPC 请求。
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+
+from solbot_common.log import logger
+from solders.signature import Signature  # type: ignore
+
+Fetch = Callable[[Signature], Awaitable[dict | None]]
+
+
+@dataclass
+class EndpointStats:
+    name: str
+    fetch: Fetch
+    # 正常响应 (包括交易尚不可查) 的请求延迟 (秒)
+    ewma_latency: float = 0.0
+    success_rate: float = 1.0
+    samples: deque[float] = field(default_factory=lambda: deque(maxlen=64))
+    requests: int = 0
+    errors: int = 0
+
+    @property
+    def score(self) -> float:
+        """期望耗时, 越小越好. 未请求过的节点排在最前, 从未成功的节点排在最后"""
+        if not self.samples:
+            return 0.0 if self.requests == 0 else float("inf")
+        return self.ewma_latency / max(self.success_rate, 0.05)
+
+    def p90(self) -> float | None:
+        if len(self.samples) < 8:
+            return None
+        samples = sorted(self.samples)
+        return samples[int(len(samples) * 0.9) - 1]
+
+    def record(self, latency: float, success: bool, alpha: float) -> None:
+        self.success_rate += alpha * ((1.0 if success else 0.0) - self.success_rate)
+        if success:
+            if not self.samples:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency += alpha * (latency - self.ewma_latency)
+            self.samples.append(latency)
+
+
+class HedgedFetcher:
+    """按节点得分依次发送对冲请求
+
+    Args:
+        fetchers: (名称, 查询函数) 列表, 查询函数在交易尚不可查时返回 None
+        alpha: EWMA 的平滑系数
+        min_hedge_delay: 发送备用请求前的最短等待 (秒)
+        max_hedge_delay: 发送备用请求前的最长等待 (秒)
+        retry_delays: 所有节点都查不到交易时, 每轮重试前的等待 (秒)
+        explore_interval: 每隔多少轮轮流优先请求其他节点, 0 表示不探测
+        default_hedge_delay: 节点还没有延迟样本时的等待 (秒)
+    """
+
+    def __init__(
+        self,
+        fetchers: Sequence[tuple[str, Fetch]],
+        alpha: float = 0.2,
+        min_hedge_delay: float = 0.05,
+        max_hedge_delay: float = 1.0,
+        retry_delays: Sequence[float] = (0.1, 0.2, 0.3, 0.5, 0.8, 1.2),
+        explore_interval: int = 50,
+        default_hedge_delay: float = 0.3,
+    ):
+        if not fetchers:
+            raise ValueError("At least one fetcher is required")
+        self.endpoints = [EndpointStats(name, fetch) for name, fetch in fetchers]
+        self.alpha = alpha
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.retry_delays = tuple(retry_delays)
+        self.explore_interval = explore_interval
+        self.default_hedge_delay = default_hedge_delay
+        self.rounds = 0
+        self.hedges = 0
+
+    def ranked(self) -> list[EndpointStats]:
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score)
+
+    def _next_candidates(self) -> list[EndpointStats]:
+        candidates = self.ranked()
+        self.rounds += 1
+        if (
+            self.explore_interval > 0
+            and len(candidates) > 1
+            and self.rounds % self.explore_interval == 0
+        ):
+            index = 1 + (self.rounds // self.explore_interval) % (len(candidates) - 1)
+            candidates.insert(0, candidates.pop(index))
+        return candidates
+
+    def hedge_delay(self, endpoint: EndpointStats) -> float:
+        """等待该节点返回的时间, 超过后发送备用请求"""
+        delay = endpoint.p90()
+        if delay is None:
+            delay = max(endpoint.ewma_latency * 2, self.default_hedge_delay)
+        return min(max(delay, self.min_hedge_delay), self.max_hedge_delay)
+
+    async def _fetch_one(self, endpoint: EndpointStats, signature: Signature) -> dict | None:
+        endpoint.requests += 1
+        start = time.perf_counter()
+        try:
+            result = await endpoint.fetch(signature)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            endpoint.errors += 1
+            endpoint.record(time.perf_counter() - start, False, self.alpha)
+            logger.warning(f"Error fetching {signature} from {endpoint.name}: {e}")
+            return None
+        # 交易尚不可查不是节点的失败
+        endpoint.record(time.perf_counter() - start, True, self.alpha)
+        return result
+
+    async def _fetch_round(self, signature: Signature) -> dict | None:
+        """按得分依次请求各节点, 返回第一个查到的交易"""
+        candidates = self._next_candidates()
+        tasks: dict[asyncio.Task, EndpointStats] = {}
+        try:
+            while candidates or tasks:
+                if candidates:
+                    endpoint = candidates.pop(0)
+                    if tasks:
+                        self.hedges += 1
+                        logger.debug(f"Hedging {signature} to {endpoint.name}")
+                    tasks[asyncio.create_task(self._fetch_one(endpoint, signature))] = endpoint
+                    timeout = self.hedge_delay(endpoint) if candidates else None
+                else:
+                    timeout = None
+
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    endpoint = tasks.pop(task)
+                    result = task.result()
+                    if result is not None:
+                        logger.info(f"Fetched transaction {signature} from {endpoint.name}")
+                        return result
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch(self, signature: Signature) -> dict | None:
+        """查询交易详情, 所有重试后仍查不到时返回 None"""
+        result = await self._fetch_round(signature)
+        for delay in self.retry_delays:
+            if result is not None:
+                return result
+            await asyncio.sleep(delay)
+            logger.debug(f"Transaction {signature} is not available yet, retrying")
+            result = await self._fetch_round(signature)
+        return result
@@ -0,0 +1,151 @@
+"""WebSocket logsSubscribe 订阅管理
+
+原先每次只订阅一个钱包, 并在 `subscribe_lock` 下等待 `SubscriptionResult`,
+断线重连后逐个重新订阅, 恢复上千个钱包需要数分钟。
+
+`LogsSubscriptionManager` 连续发送多个 logsSubscribe 请求而不等待响应,
+根据 JSON-RPC 请求 id 将 `SubscriptionResult` 对应到钱包; 重连后一次性重新订阅
+所有钱包。同时等待响应的请求数有上限, 避免瞬间发送过多请求被节点限流。
+"""
+
+import asyncio
+from collections.abc import Iterable
+
+from solana.rpc.commitment import Commitment
+from solana.rpc.websocket_api import SolanaWsClientProtocol
+from solbot_common.log import logger
+from solders.commitment_config import CommitmentLevel  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.config import (  # type: ignore
+    RpcTransactionLogsConfig,
+    RpcTransactionLogsFilterMentions,
+)
+from solders.rpc.requests import LogsSubscribe  # type: ignore
+from solders.rpc.responses import SubscriptionResult  # type: ignore
+
+
+class LogsSubscriptionManager:
+    """管理单个 WebSocket 连接上的钱包日志订阅
+
+    Args:
+        commitment: 订阅使用的 commitment
+        max_pending: 最多同时等待响应的订阅请求数
+        retry_delay: 订阅失败后重试的间隔 (秒)
+    """
+
+    def __init__(
+        self,
+        commitment: Commitment | None = None,
+        max_pending: int = 500,
+        retry_delay: float = 1,
+    ):
+        self.config = RpcTransactionLogsConfig(
+            None if commitment is None else CommitmentLevel.from_string(commitment)
+        )
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        # 需要订阅的钱包, 重连后会全部重新订阅
+        self.wallets: set[str] = set()
+        # 钱包 -> 订阅 ID
+        self.subscription_ids: dict[str, int] = {}
+        # 请求 ID -> 等待响应的钱包
+        self.pending: dict[int, str] = {}
+        self.websocket: SolanaWsClientProtocol | None = None
+        self._slots = asyncio.Semaphore(max_pending)
+        self._retry_tasks: set[asyncio.Task] = set()
+
+    @property
+    def subscribed_wallets(self) -> set[str]:
+        return set(self.subscription_ids)
+
+    def attach(self, websocket: SolanaWsClientProtocol) -> None:
+        """绑定新的连接, 旧连接上的订阅状态全部失效"""
+        self.websocket = websocket
+        self.subscription_ids.clear()
+        self.pending.clear()
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    def detach(self) -> None:
+        self.websocket = None
+        self.subscription_ids.clear()
+        self.pending.clear()
+
+    async def subscribe(self, wallets: Iterable[str]) -> None:
+        """订阅钱包, 未连接时会在连接建立后订阅"""
+        wallets = [wallet for wallet in wallets if wallet not in self.wallets]
+        self.wallets.update(wallets)
+        await self._send_subscribe(wallets)
+
+    async def resubscribe_all(self) -> None:
+        """在当前连接上重新订阅所有钱包"""
+        await self._send_subscribe(list(self.wallets))
+
+    async def _send_subscribe(self, wallets: Iterable[str]) -> None:
+        websocket = self.websocket
+        if websocket is None:
+            return
+
+        pending_wallets = set(self.pending.values())
+        sent = 0
+        for wallet in wallets:
+            if wallet in self.subscription_ids or wallet in pending_wallets:
+                continue
+            await self._slots.acquire()
+            # 等待期间连接已断开, 剩余钱包在重连后订阅
+            if self.websocket is not websocket:
+                return
+            # 等待期间钱包已被取消订阅
+            if wallet not in self.wallets:
+                self._slots.release()
+                continue
+            request_id = websocket.increment_counter_and_get_id()
+            self.pending[request_id] = wallet
+            pending_wallets.add(wallet)
+            filter_ = RpcTransactionLogsFilterMentions(Pubkey.from_string(wallet))
+            await websocket.send_data(LogsSubscribe(filter_, self.config, request_id))
+            sent += 1
+        if sent:
+            logger.info(f"Sent {sent} logsSubscribe requests")
+
+    async def unsubscribe(self, wallets: Iterable[str]) -> None:
+        """取消订阅钱包
+
+        尚未收到响应的订阅会在收到 `SubscriptionResult` 后取消。
+        """
+        for wallet in wallets:
+            self.wallets.discard(wallet)
+            subscription_id = self.subscription_ids.pop(wallet, None)
+            if subscription_id is not None and self.websocket is not None:
+                await self.websocket.logs_unsubscribe(subscription_id)
+                logger.info(f"Unsubscribed from wallet: {wallet}")
+
+    async def on_subscription_result(self, message: SubscriptionResult) -> None:
+        """根据请求 ID 记录订阅 ID"""
+        wallet = self.pending.pop(message.id, None)
+        if wallet is None:
+            logger.warning(f"Unexpected subscription result: {message}")
+            return
+        self._slots.release()
+
+        if wallet not in self.wallets:
+            if self.websocket is not None:
+                await self.websocket.logs_unsubscribe(message.result)
+            return
+        self.subscription_ids[wallet] = message.result
+        logger.debug(f"Subscribed to wallet {wallet} with subscription ID: {message.result}")
+
+    def on_subscription_error(self, request_id: int, error: Exception) -> None:
+        """订阅失败, 稍后在同一连接上重试"""
+        wallet = self.pending.pop(request_id, None)
+        if wallet is None:
+            return
+        self._slots.release()
+        logger.error(f"Failed to subscribe wallet {wallet}: {error}")
+        task = asyncio.create_task(self._retry(wallet, self.websocket))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry(self, wallet: str, websocket: SolanaWsClientProtocol | None) -> None:
+        await asyncio.sleep(self.retry_delay)
+        if self.websocket is websocket and wallet in self.wallets:
+            await self._send_subscribe([wallet])
@@ -1,28 +1,187 @@
+"""交易详情查询
+
+`TxDetailRawFetcher` 将同一时间窗口内的多个签名合并为一个 JSON-RPC 批量请求
+(数量达到 max_batch_size 或等待超过 max_delay 时发送), 并直接用 orjson 解析响应的原始
+字节, 不再经过 solders 响应对象与 `to_json()`。节点明确拒绝批量请求 (400/405/413 状态码
+或 -32600 错误对象) 时退回逐个请求; 限流 (429, -32005 等) 等临时错误只让本批次失败,
+由调用方 (`HedgedFetcher`) 按重试计划重试, 不会关闭批量请求。
+"""
+
+import asyncio
+import itertools
+
 import httpx
 import orjson as json
-from solana.rpc.async_api import AsyncClient
 from solbot_common.config import settings
 from solbot_common.log import logger
 from solders.signature import Signature  # type: ignore
 
+# 表示节点不接受批量请求的 HTTP 状态码
+BATCH_REJECTED_STATUS_CODES = frozenset({400, 405, 413})
+# JSON-RPC Invalid Request, 不支持批量请求的节点返回该错误
+BATCH_REJECTED_ERROR_CODE = -32600
+
+
+def is_batch_rejected(data: dict) -> bool:
+    """批量请求的单个错误响应是否表示节点不支持批量请求 (而不是限流等临时错误)"""
+    status_code = data.get("status_code")
+    if status_code is not None:
+        return status_code in BATCH_REJECTED_STATUS_CODES
+    error = data.get("error")
+    if not isinstance(error, dict):
+        return False
+    code = error.get("code")
+    if code is None:
+        return "batch" in str(error.get("message", "")).lower()
+    return code == BATCH_REJECTED_ERROR_CODE
+
 
 class TxDetailRawFetcher:
-    def __init__(self, rpc_url: str = settings.rpc.rpc_url) -> None:
+    """批量 getTransaction
+
+    Args:
+        rpc_url: RPC 节点
+        max_batch_size: 单个批量请求最多包含的签名数
+        max_delay: 第一个签名进入窗口后最多等待的秒数
+        timeout: HTTP 请求超时 (秒)
+        client: HTTP 客户端, 默认新建
+    """
+
+    def __init__(
+        self,
+        rpc_url: str = settings.rpc.rpc_url,
+        max_batch_size: int = 20,
+        max_delay: float = 0.01,
+        timeout: float = 10,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
         self.rpc_url = rpc_url
-        self.client = AsyncClient(rpc_url)
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.client = client or httpx.AsyncClient(timeout=timeout)
+        self.batch_supported = True
+        self._ids = itertools.count(1)
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+        self._send_tasks: set[asyncio.Task] = set()
 
     async def fetch(self, signature: Signature) -> dict | None:
-        logger.debug(f"Fetching transaction from {self.rpc_url}")
-        resp = await self.client.get_transaction(
-            signature,
-            encoding="json",
-            commitment=settings.rpc.commitment,
-            max_supported_transaction_version=0,
+        """查询交易详情, 交易尚不可查时返回 None"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((str(signature), future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._flush_task = None
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            self._flush_task = None
+        batch, self._pending = self._pending, []
+        # 调用方已取消 (例如对冲请求中其他节点先返回) 的签名不再查询
+        batch = [(signature, future) for signature, future in batch if not future.done()]
+        if not batch:
+            return
+        task = asyncio.create_task(self._send(batch))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+
+    def _build_request(self, request_id: int, signature: str) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "getTransaction",
+            "params": [
+                signature,
+                {
+                    "encoding": "json",
+                    "commitment": settings.rpc.commitment,
+                    "maxSupportedTransactionVersion": 0,
+                },
+            ],
+        }
+
+    async def _post(self, payload: list | dict) -> list | dict:
+        response = await self.client.post(
+            self.rpc_url,
+            content=json.dumps(payload),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        return json.loads(response.content)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        logger.debug(f"Fetching {len(batch)} transactions from {self.rpc_url}")
+        requests = {next(self._ids): item for item in batch}
+        try:
+            if self.batch_supported and len(requests) > 1:
+                payload = [
+                    self._build_request(request_id, signature)
+                    for request_id, (signature, _) in requests.items()
+                ]
+                try:
+                    data = await self._post(payload)
+                except httpx.HTTPStatusError as e:
+                    # 部分节点以 400/405/413 拒绝批量请求, 429 等其他状态码直接失败
+                    if e.response.status_code not in BATCH_REJECTED_STATUS_CODES:
+                        raise
+                    data = {"status_code": e.response.status_code}
+                if isinstance(data, dict):
+                    # 限流等临时错误同样返回单个错误对象, 此时不能关闭批量请求
+                    if not is_batch_rejected(data):
+                        raise Exception(f"Batch request failed: {data}")
+                    logger.info(
+                        f"Batch requests are not supported by {self.rpc_url}, "
+                        f"falling back to single requests: {data}"
+                    )
+                    self.batch_supported = False
+                    responses = await self._send_single(requests)
+                else:
+                    responses = data
+            else:
+                responses = await self._send_single(requests)
+        except Exception as e:
+            for _, future in requests.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for response in responses:
+            item = requests.pop(response.get("id"), None)
+            if item is None:
+                continue
+            _, future = item
+            if future.done():
+                continue
+            if "result" not in response:
+                future.set_exception(Exception(f"Error message: {response}"))
+            else:
+                future.set_result(response["result"])
+        for signature, future in requests.values():
+            if not future.done():
+                future.set_exception(Exception(f"No response for {signature}"))
+
+    async def _send_single(self, requests: dict[int, tuple[str, asyncio.Future]]) -> list[dict]:
+        responses = await asyncio.gather(
+            *(
+                self._post(self._build_request(request_id, signature))
+                for request_id, (signature, _) in requests.items()
+            ),
+            return_exceptions=True,
         )
-        data = json.loads(resp.to_json())
-        if "result" not in data:
-            raise Exception(f"Error message: {data}")
-        return data["result"]
+        result = []
+        for request_id, response in zip(requests, responses, strict=True):
+            if isinstance(response, BaseException):
+                response = {"id": request_id, "error": repr(response)}
+            result.append(response)
+        return result
 
 
 class TxDetailShyftFetcher:
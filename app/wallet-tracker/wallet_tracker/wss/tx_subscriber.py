@@ -17,6 +17,9 @@ from wallet_tracker.constants import (
     NEW_TX_SIGNATURE_CHANNEL,
 )
 from wallet_tracker.exceptions import NotSwapTransaction, TransactionError
+from wallet_tracker.ingress import BatchPopper, BatchPusher, wrap_failed
+from wallet_tracker.replay import StreamRecorder
+from wallet_tracker.wss.hedged_fetcher import HedgedFetcher
 from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
 
 from .account_log_monitor import AccountLogMonitor
@@ -32,79 +35,54 @@ class TransactionDetailSubscriber:
         rpc_endpoint: str,
         redis_client: Redis,
         wallets: Sequence[Pubkey],
+        pop_batch_size: int = 16,
     ):
         self.wallets = wallets
         self.rpc_endpoint = rpc_endpoint
         self.redis = redis_client
+        self.pusher = BatchPusher(redis_client)
+        self.popper = BatchPopper(redis_client, NEW_TX_SIGNATURE_CHANNEL, count=pop_batch_size)
         self.rpc_client: Client | None = None
         self.is_running = False
         self.fetchers = [
             (f"Raw-{i}", TxDetailRawFetcher(endpoint).fetch)
             for i, endpoint in enumerate(settings.rpc.endpoints)
         ]
-        self.lock = asyncio.Lock()
+        self.fetcher = HedgedFetcher(self.fetchers)
         self.account_log_monitor = AccountLogMonitor(
             self.wallets,
-            settings.rpc.rpc_url,
+            settings.rpc.endpoints,
             self.redis,
+            connections_per_endpoint=settings.rpc.wss.connections_per_endpoint,
+            max_wallets_per_connection=settings.rpc.wss.max_wallets_per_connection,
+            max_pending_subscriptions=settings.rpc.wss.max_pending_subscriptions,
+            log_fast_path=settings.monitor.log_fast_path,
+            recorder=(
+                StreamRecorder(settings.monitor.record_path)
+                if settings.monitor.record_path
+                else None
+            ),
         )
 
     async def fetch_transaction_detail(self, tx_sig: str) -> dict | None:
-        tasks = []
-        for fetcher_name, fetcher in self.fetchers:
-            tasks.append(self._fetch_with_name(fetcher_name, fetcher, tx_sig))
-
+        """优先请求最快的节点, 超过其 p90 延迟后才向其他节点发送备用请求"""
         try:
-            remaining = set(tasks)
-            while remaining:
-                done, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
-
-                # 检查完成的任务结果
-                for task in done:
-                    try:
-                        result = task.result()
-                        if result is not None:
-                            # 找到有效结果，取消剩余任务
-                            for t in remaining:
-                                t.cancel()
-                            return result
-                    except Exception:
-                        continue
-
-            # 所有任务都完成但没有找到有效结果
-            logger.error(f"Transaction not found: {tx_sig}")
-            return None
-
+            result = await self.fetcher.fetch(Signature.from_string(tx_sig))
         except Exception as e:
             logger.error(f"Failed to fetch transaction: {e}")
             logger.exception(e)
-            # 发生异常时取消所有未完成的任务
-            for task in tasks:
-                if not task.done():
-                    task.cancel()
-            return None
-
-    async def _fetch_with_name(self, fetcher_name: str, fetcher, tx_sig: str) -> dict | None:
-        try:
-            logger.info(f"Fetching transaction from {fetcher_name}")
-            tx_detail = await fetcher(Signature.from_string(tx_sig))
-            if tx_detail is not None:
-                logger.info(f"Successfully fetched transaction from {fetcher_name}")
-                return tx_detail
-            logger.warning(f"Failed to fetch transaction from {fetcher_name}")
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching from {fetcher_name}: {e}")
-            logger.exception(e)
             return None
+        if result is None:
+            logger.error(f"Transaction not found: {tx_sig}")
+        return result
 
     async def push_transaction_to_redis(self, tx_detail: str):
         assert self.redis is not None
-        await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, tx_detail)
+        await self.pusher.push(NEW_TX_DETAIL_CHANNEL, tx_detail)
 
     async def push_failed_transaction_to_redis(self, tx_detail: str):
         assert self.redis is not None
-        await self.redis.lpush(FAILED_TX_SIGNATURE_CHANNEL, tx_detail)
+        await self.pusher.push(FAILED_TX_SIGNATURE_CHANNEL, wrap_failed(tx_detail))
 
     async def process_transaction(self, tx_sig: str):
         """处理单个交易"""
@@ -135,17 +113,18 @@ class TransactionDetailSubscriber:
             await benchmark.show_timeline(tx_sig)
 
     async def worker(self):
-        """单个 worker 协程"""
+        """单个 worker 协程
+
+        每次最多取出 pop_batch_size 个签名并发查询交易详情。
+        """
         while True:
             try:
                 assert self.redis is not None
-                async with self.lock:
-                    result = await self.redis.brpop(NEW_TX_SIGNATURE_CHANNEL, timeout=1)
-                if result is None:
+                tx_sigs = await self.popper.pop()
+                if not tx_sigs:
                     continue
-                _, tx_sig = result
-                logger.info(f"Received tx signature: {tx_sig}")
-                await self.process_transaction(tx_sig)
+                logger.info(f"Received {len(tx_sigs)} tx signatures")
+                await asyncio.gather(*(self.process_transaction(tx_sig) for tx_sig in tx_sigs))
             except RedisError as e:
                 logger.error(f"Failed to push transaction to Redis: {e}")
                 # await self.connect_redis()
@@ -182,6 +161,7 @@ class TransactionDetailSubscriber:
         self.is_running = False
         for worker in self.workers:
             worker.cancel()
+        await self.pusher.close()
 
     async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """订阅钱包的交易信息。
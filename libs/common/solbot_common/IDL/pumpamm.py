@@ -16,6 +16,7 @@ from solbot_common.constants import (
     SYSTEM_PROGRAM_ID,
     TOKEN_PROGRAM_ID,
 )
+from solbot_common.utils.pda import find_program_address
 
 
 class PumpAmmInterface:
@@ -34,7 +35,7 @@ class PumpAmmInterface:
     def get_coin_creator_vault_authority_pda(coin_creator: Pubkey) -> Pubkey:
         """计算代币创建者金库权限 PDA"""
         seeds = [b"creator_vault", bytes(coin_creator)]
-        pda, _ = Pubkey.find_program_address(seeds, PUMP_AMM_PROGRAM)
+        pda, _ = find_program_address(seeds, PUMP_AMM_PROGRAM)
         return pda
 
     @staticmethod
@@ -47,14 +48,14 @@ class PumpAmmInterface:
     def get_user_volume_accumulator_pda(user: Pubkey, user_acc_target: Pubkey) -> Pubkey:
         """计算用户交易量累加器 PDA"""
         seeds = [b"user_volume_accumulator", bytes(user_acc_target)]
-        pda, _ = Pubkey.find_program_address(seeds, PUMP_AMM_PROGRAM)
+        pda, _ = find_program_address(seeds, PUMP_AMM_PROGRAM)
         return pda
 
     @staticmethod
     def get_pump_amm_global_config_pda() -> Pubkey:
         """计算 Pump AMM 全局配置 PDA"""
         seeds = [b"global_config"]  # 对应 IDL 中的种子
-        pda, _ = Pubkey.find_program_address(seeds, PUMP_AMM_PROGRAM)
+        pda, _ = find_program_address(seeds, PUMP_AMM_PROGRAM)
         return pda
 
     def buy(
@@ -163,7 +164,7 @@ class PumpAmmInterface:
             coin_creator: 代币创建者地址
         - 直接从 Pool 账户读取 `pool_base_token_account` 与 `pool_quote_token_account`
         """
-        from spl.token.instructions import get_associated_token_address
+        from solbot_common.utils.pda import get_associated_token_address
 
         user = self.keypair.pubkey()
 
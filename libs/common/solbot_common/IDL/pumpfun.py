@@ -1,10 +1,14 @@
+import hashlib
 import pathlib
+import re
+import struct
+from functools import cache
 
 from anchorpy.program.core import Program
 from anchorpy.provider import Provider, Wallet
-from anchorpy_core.idl import Idl  # type: ignore
+from anchorpy_core.idl import Idl, IdlTypeSimple  # type: ignore
 from solana.rpc.async_api import AsyncClient
-from solders.instruction import Instruction
+from solders.instruction import AccountMeta, Instruction
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 
@@ -18,16 +22,80 @@ from solbot_common.constants import (
 )
 
 
+@cache
+def load_idl() -> Idl:
+    """读取 pumpfun.json, 每个进程只解析一次"""
+    idl_path = pathlib.Path(__file__).parent / "pumpfun.json"
+    with open(idl_path) as f:
+        return Idl.from_json(f.read())
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+class PumpFunInstructionCoder:
+    """Pump.fun 指令编码器
+
+    从 IDL 预先生成每个指令的 discriminator、参数布局与账户模板,
+    编码时只需拼接字节并按模板填入账户, 不经过 anchorpy 的动态编码。
+    与 anchorpy 的编码结果逐字节一致, 账户字典的键同样使用 snake_case。
+
+    Args:
+        instructions: 需要编码的指令名
+    """
+
+    def __init__(self, instructions: tuple[str, ...] = ("buy", "sell")):
+        self._layouts: dict[str, tuple[bytes, struct.Struct, tuple[tuple[str, bool, bool], ...]]] = {}
+        idl = load_idl()
+        for ix in idl.instructions:
+            if ix.name not in instructions:
+                continue
+            for arg in ix.args:
+                if arg.ty != IdlTypeSimple.U64:
+                    raise ValueError(f"Unsupported argument type {arg.ty} in {ix.name}")
+            discriminator = hashlib.sha256(f"global:{ix.name}".encode()).digest()[:8]
+            args = struct.Struct("<" + "Q" * len(ix.args))
+            accounts = tuple(
+                (_snake_case(account.name), account.is_signer, account.is_mut)
+                for account in ix.accounts
+            )
+            self._layouts[ix.name] = (discriminator, args, accounts)
+
+        missing = set(instructions) - self._layouts.keys()
+        if missing:
+            raise ValueError(f"Instructions not found in IDL: {missing}")
+
+    def encode(self, name: str, args: tuple[int, ...], accounts: dict[str, Pubkey]) -> Instruction:
+        """编码指令
+
+        Args:
+            name: 指令名, 如 "buy" / "sell"
+            args: 按 IDL 顺序排列的参数
+            accounts: 账户名 (snake_case) 到地址的映射
+        """
+        discriminator, layout, template = self._layouts[name]
+        return Instruction(
+            PUMP_FUN_PROGRAM,
+            discriminator + layout.pack(*args),
+            [
+                AccountMeta(accounts[account], is_signer, is_writable)
+                for account, is_signer, is_writable in template
+            ],
+        )
+
+
+@cache
+def get_instruction_coder() -> PumpFunInstructionCoder:
+    return PumpFunInstructionCoder()
+
+
 class PumpFunInterface:
     def __init__(self, keypair: Keypair, client: AsyncClient):
         self.keypair = keypair
         self.client = client
         provider = Provider(connection=client, wallet=Wallet(keypair))
-        idl_path = pathlib.Path(__file__).parent / "pumpfun.json"
-        with open(idl_path) as f:
-            idl = Idl.from_json(f.read())
-
-        self.program = Program(idl, PUMP_FUN_PROGRAM, provider)
+        self.program = Program(load_idl(), PUMP_FUN_PROGRAM, provider)
         self.connection = provider.connection
 
     def buy(
@@ -103,15 +103,68 @@ class WalletConfig(BaseModel):
         return Keypair.from_base58_string(self.private_key)
 
 
+class MetricsConfig(BaseModel):
+    # 延迟统计的 HTTP 接口, 端口为 0 时不启动
+    host: str = "127.0.0.1"
+    port: int = 0
+    # 输出各阶段延迟分位数的周期 (秒)
+    interval: float = 60
+    # 采样保留完整时间线的比例, 0 表示不采样
+    trace_sample_rate: float = 0.0
+    max_traces: int = 100
+
+
+class QueueConfig(BaseModel):
+    # Redis 队列的容量上限, 超出时丢弃最早的消息, 0 表示不限制
+    tx_signature: int = 10000
+    tx_detail: int = 10000
+    # 两个失败队列 (交易签名 / 交易详情) 各自的容量上限
+    failed: int = 10000
+    # 失败队列中消息的保留时间 (秒), 0 表示不过期
+    failed_ttl: float = 86400
+    # 整理队列的间隔 (秒)
+    compact_interval: float = 60
+
+
+class RetryConfig(BaseModel):
+    # 重试失败队列中的交易 (查询详情失败 / 解析失败)
+    enable: bool = True
+    # 跟单时效 (秒), 出块超过该时间的交易不再重试
+    max_age: float = 60
+    max_attempts: int = 5
+    # 首次重试的等待 (秒), 之后每次翻倍, 不超过 max_delay
+    base_delay: float = 1
+    max_delay: float = 16
+    # 单次取出的最大条目数
+    batch_size: int = 50
+    # 检查重试计划的间隔 (秒)
+    interval: float = 0.5
+
+
 class MonitorConfig(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    mode: str = "wss"  # or "geyser"
+    mode: str = "wss"  # or "geyser", "geyser-inline"
     wallets: list[Pubkey] = Field(default_factory=list)
+    # 交易解析进程数, 0 表示在事件循环中解析, -1 表示与 CPU 核心数一致
+    parse_processes: int = 0
+    # 签名去重的时间窗口 (秒), 0 表示不去重
+    dedup_window: float = 120
+    # wss 模式下从日志中解析 Pump.fun 买入, 跳过 getTransaction 直接发布临时 TxEvent
+    log_fast_path: bool = False
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+    queues: QueueConfig = Field(default_factory=QueueConfig)
+    retry: RetryConfig = Field(default_factory=RetryConfig)
+    # 将收到的 Geyser / WSS 消息录制到该文件, 用于离线回放, 为空时不录制
+    record_path: str = ""
+    # 发布前按 (slot, tx_index) 重排同一钱包的 TxEvent, 事件最多等待的秒数, 0 表示不重排
+    reorder_window: float = 0
+    # 重排缓冲区的事件数上限
+    reorder_max_pending: int = 1000
 
     @field_validator("mode", mode="after")
     def validate_mode(cls, value: str) -> str:
-        if value.lower() not in ["wss", "geyser"]:
+        if value.lower() not in ["wss", "geyser", "geyser-inline"]:
             raise ValueError(f"Invalid mode: {value}")
         return value
 
@@ -124,6 +177,42 @@ class GeyserConfig(BaseModel):
     enable: bool = False
     endpoint: str = ""
     api_key: str = ""
+    # 订阅 stream 数, 钱包按哈希分配到各个 stream
+    streams: int = 1
+    # 单个 stream 最多订阅的钱包数
+    max_wallets_per_stream: int = 1000
+    # 合并订阅变更的时间窗口 (秒)
+    subscribe_debounce: float = 0.1
+    # 响应队列容量, 队列满时不阻塞 gRPC 读取, 按 overflow 策略降级
+    response_queue_size: int = 1000
+    # drop: 丢弃最早的普通交易; spill: 跳过去重直接写入 Redis 交易详情队列
+    overflow: str = "drop"
+    # 队列深度达到容量的该比例后丢弃 ping
+    ping_watermark: float = 0.5
+    # response worker 数量范围, 队列深度达到容量的 scale_up_ratio 时扩容, 队列为空时缩容
+    min_workers: int = 2
+    max_workers: int = 8
+    scale_up_ratio: float = 0.25
+    scale_interval: float = 1.0
+    # 订阅 blocks_meta, 用真实的区块时间标记交易 (关闭时使用收到交易时的本地时间)
+    block_meta: bool = True
+    # 保存最近多少个 slot 的区块时间
+    slot_clock_size: int = 4096
+
+    @field_validator("overflow", mode="after")
+    def validate_overflow(cls, value: str) -> str:
+        if value not in ["drop", "spill"]:
+            raise ValueError(f"Invalid overflow policy: {value}")
+        return value
+
+
+class WssConfig(BaseModel):
+    # 每个 rpc 节点建立的 WebSocket 连接数, 钱包按哈希分配到所有连接
+    connections_per_endpoint: int = 1
+    # 单个连接最多订阅的钱包数
+    max_wallets_per_connection: int = 1000
+    # 单个连接最多同时等待响应的订阅请求数
+    max_pending_subscriptions: int = 500
 
 
 class RPCConfig(BaseModel):
@@ -131,6 +220,7 @@ class RPCConfig(BaseModel):
     endpoints: list[str]
     commitment: Commitment
     geyser: GeyserConfig
+    wss: WssConfig = Field(default_factory=WssConfig)
 
     @property
     def rpc_url(self) -> str:
@@ -144,6 +234,18 @@ class RPCConfig(BaseModel):
             raise ValueError(f"Invalid commitment level: {value}")
 
 
+class ReserveMirrorConfig(BaseModel):
+    # 通过 accountSubscribe 订阅最近交易过的 Raydium AMM v4 池子的 vault,
+    # 关闭时只由后台定期批量刷新
+    subscribe: bool = True
+    # 最多跟踪的池子数, 超出时取消最久未交易池子的订阅
+    max_pools: int = 100
+    # 未订阅的余额距上次确认的最长时间 (秒), 超过后交易时重新查询
+    max_age: float = 2.0
+    # 后台刷新未订阅 vault 的间隔 (秒)
+    refresh_interval: float = 1.0
+
+
 class TradingConfig(BaseModel):
     unit_price: int
     unit_limit: int
@@ -151,6 +253,7 @@ class TradingConfig(BaseModel):
     preflight_check: bool = False
     use_jito: bool = True
     jito_api: str = "https://mainnet.block-engine.jito.wtf"
+    reserve_mirror: ReserveMirrorConfig = Field(default_factory=ReserveMirrorConfig)
 
     @field_validator("jito_api", mode="before")
     def validate_jito_api(cls, value: str) -> str:
@@ -27,8 +27,9 @@ class TxEventProducer:
                 maxlen=10000,  # Keep last 10k events
             )
         except Exception as e:
-            # Log error but don't re-raise to avoid disrupting the producer
+            # Re-raise so callers can undo dedup and route the event to the failed queue
             logger.error(f"Error producing tx event to Redis Stream: {e}")
+            raise
 
 
 class TxEventConsumer:
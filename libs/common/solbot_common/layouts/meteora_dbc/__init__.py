@@ -1,6 +1,11 @@
 from .pool_state import PoolState
 from .pool_config import PoolConfig
-from .pool_utils import fetch_pool_state, fetch_pool_config, fetch_pool_from_rpc
+from .pool_utils import (
+    fetch_pool_config,
+    fetch_pool_from_rpc,
+    fetch_pool_state,
+    fetch_pool_state_by_base_mint,
+)
 from .swap_estimate import swap_base_to_quote, swap_quote_to_base
 
 __all__ = [
@@ -9,6 +14,7 @@ __all__ = [
 	"fetch_pool_state",
 	"fetch_pool_config",
 	"fetch_pool_from_rpc",
+    "fetch_pool_state_by_base_mint",
     "swap_base_to_quote",
     "swap_quote_to_base",
 ]
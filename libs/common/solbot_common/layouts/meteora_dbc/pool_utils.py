@@ -7,7 +7,7 @@ from solana.rpc.types import MemcmpOpts
 
 from solbot_common.constants import METEORA_DBC_PROGRAM
 from .pool_config import POOL_CONFIG_LAYOUT, parse_pool_config
-from .pool_state import POOL_STATE_LAYOUT, parse_pool_state
+from .pool_state import POOL_STATE_LAYOUT, PoolState, parse_pool_state
 
 async def fetch_pool_state(client: AsyncClient, pool_str: str):
     pool_pubkey = Pubkey.from_string(pool_str)
@@ -40,3 +40,19 @@ async def fetch_pool_from_rpc(client: AsyncClient, base_mint: str) -> str | None
         return None
     
     return None
+
+
+async def fetch_pool_state_by_base_mint(client: AsyncClient, base_mint: str) -> PoolState | None:
+    """通过 base mint 查找池子并直接解析返回的账户数据, 省去再次查询池子账户"""
+    memcmp_filter_base = MemcmpOpts(offset=136, bytes=base_mint)
+    response = await client.get_program_accounts(
+        METEORA_DBC_PROGRAM,
+        commitment=Processed,
+        encoding="base64",
+        filters=[memcmp_filter_base],
+    )
+    if not response.value:
+        return None
+    keyed_account = response.value[0]
+    decoded_data = POOL_STATE_LAYOUT.parse(bytes(keyed_account.account.data))
+    return parse_pool_state(keyed_account.pubkey, decoded_data)
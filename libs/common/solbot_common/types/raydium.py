@@ -7,6 +7,7 @@ from typing_extensions import Self
 
 from solbot_common.constants import OPEN_BOOK_PROGRAM, RAY_AUTHORITY_V4, TOKEN_PROGRAM_ID
 from solbot_common.layouts.amm_v4 import LIQUIDITY_STATE_LAYOUT_V4, MARKET_STATE_LAYOUT_V3
+from solbot_common.utils.pda import create_program_address
 
 
 def bytes_of(value):
@@ -65,7 +66,7 @@ class AmmV4PoolKeys:
             base_vault=Pubkey.from_bytes(amm_data_decoded.poolCoinTokenAccount),
             quote_vault=Pubkey.from_bytes(amm_data_decoded.poolPcTokenAccount),
             market_id=marketId,
-            market_authority=Pubkey.create_program_address(
+            market_authority=create_program_address(
                 seeds=[bytes(marketId), bytes_of(vault_signer_nonce)],
                 program_id=open_book_program,
             ),
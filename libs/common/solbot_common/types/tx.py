@@ -27,6 +27,11 @@ class TxEvent:
     pre_token_amount: int
     post_token_amount: int
     program_id: str | None = None
+    # 仅根据交易日志构建, tx_type 与 pre/post_token_amount 为估计值
+    provisional: bool = False
+    # 交易所在的 slot 与区块内序号, 用于按链上顺序发布同一钱包的事件, 未知时为 None
+    slot: int | None = None
+    tx_index: int | None = None
 
     def to_json(self) -> str:
         return json.dumps(asdict(self)).decode("utf-8")
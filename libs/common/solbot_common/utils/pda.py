@@ -0,0 +1,110 @@
+"""PDA / ATA 推导缓存
+
+每次 Pump 交易都要多次推导 bonding curve、creator vault、交易量累加器和 ATA 地址,
+`find_program_address` 最多要尝试 255 个 bump, 每次都要计算哈希。多个跟单钱包跟随同一个
+钱包时, 同样的地址会被反复推导。
+
+`DerivationCache` 以 (seeds, program) 为键缓存推导结果, 容量有上限 (LRU)。
+所有构建器通过本模块的 `find_program_address` / `create_program_address` /
+`get_associated_token_address` 推导地址, 共用进程内的 `derivation_cache`。
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import TypeVar
+
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.constants import (
+    ASSOCIATED_TOKEN_PROGRAM_ID,
+    TOKEN_2022_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+)
+
+T = TypeVar("T")
+
+
+class DerivationCache:
+    """地址推导的 LRU 缓存
+
+    Args:
+        maxsize: 最多缓存的地址数
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        if maxsize < 1:
+            raise ValueError("maxsize must be greater than 0")
+        self.maxsize = maxsize
+        self._cache: OrderedDict[tuple, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _get(self, key: tuple, derive: Callable[[], T]) -> T:
+        try:
+            value = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            value = derive()
+            self._cache[key] = value
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+            return value
+        self.hits += 1
+        self._cache.move_to_end(key)
+        return value  # type: ignore
+
+    def find_program_address(
+        self, seeds: Sequence[bytes], program_id: Pubkey
+    ) -> tuple[Pubkey, int]:
+        seeds = [bytes(seed) for seed in seeds]
+        key = ("find", *seeds, program_id)
+        return self._get(key, lambda: Pubkey.find_program_address(seeds, program_id))
+
+    def create_program_address(self, seeds: Sequence[bytes], program_id: Pubkey) -> Pubkey:
+        seeds = [bytes(seed) for seed in seeds]
+        key = ("create", *seeds, program_id)
+        return self._get(key, lambda: Pubkey.create_program_address(seeds, program_id))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+derivation_cache = DerivationCache()
+
+
+def find_program_address(seeds: Sequence[bytes], program_id: Pubkey) -> tuple[Pubkey, int]:
+    """带缓存的 `Pubkey.find_program_address`"""
+    return derivation_cache.find_program_address(seeds, program_id)
+
+
+def create_program_address(seeds: Sequence[bytes], program_id: Pubkey) -> Pubkey:
+    """带缓存的 `Pubkey.create_program_address`"""
+    return derivation_cache.create_program_address(seeds, program_id)
+
+
+def get_associated_token_address(
+    owner: Pubkey, mint: Pubkey, token_program_id: Pubkey = TOKEN_PROGRAM_ID
+) -> Pubkey:
+    """带缓存的 `spl.token.instructions.get_associated_token_address`"""
+    if token_program_id not in (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID):
+        raise ValueError(
+            "token_program_id must be one of TOKEN_PROGRAM_ID or TOKEN_2022_PROGRAM_ID."
+        )
+    ata, _ = find_program_address(
+        [bytes(owner), bytes(token_program_id), bytes(mint)], ASSOCIATED_TOKEN_PROGRAM_ID
+    )
+    return ata
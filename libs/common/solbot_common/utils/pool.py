@@ -26,6 +26,7 @@ from solbot_common.layouts.cpmm import CPMM_POOL_STATE_LAYOUT
 from solbot_common.log import logger
 from solbot_common.types.raydium import DIRECTION, AmmV4PoolKeys, ClmmPoolKeys, CpmmPoolKeys
 from solbot_common.utils import get_async_client
+from solbot_common.utils.pda import create_program_address, find_program_address
 
 
 class AMMData(TypedDict):
@@ -93,7 +94,7 @@ async def fetch_amm_v4_pool_keys(pool_id: str) -> AmmV4PoolKeys | None:
         base_vault=Pubkey.from_bytes(amm_data_decoded.poolCoinTokenAccount),
         quote_vault=Pubkey.from_bytes(amm_data_decoded.poolPcTokenAccount),
         market_id=marketId,
-        market_authority=Pubkey.create_program_address(
+        market_authority=create_program_address(
             seeds=[bytes(marketId), bytes_of(vault_signer_nonce)],
             program_id=open_book_program,
         ),
@@ -160,14 +161,14 @@ async def fetch_clmm_pool_keys(pool_id: str, zero_for_one: bool = True) -> ClmmP
         return (tick_current // (tick_spacing * tick_array_size)) * (tick_spacing * tick_array_size)
 
     def get_pda_tick_array_address(pool_id: Pubkey, start_index: int):
-        tick_array, _ = Pubkey.find_program_address(
+        tick_array, _ = find_program_address(
             [b"tick_array", bytes(pool_id), struct.pack(">i", start_index)],
             RAYDIUM_CLMM,
         )
         return tick_array
 
     def get_pda_tick_array_bitmap_extension(pool_id: Pubkey):
-        bitmap_extension, _ = Pubkey.find_program_address(
+        bitmap_extension, _ = find_program_address(
             [b"pool_tick_array_bitmap_extension", bytes(pool_id)], RAYDIUM_CLMM
         )
         return bitmap_extension
@@ -387,11 +388,6 @@ async def get_amm_v4_reserves(pool_keys: AmmV4PoolKeys) -> tuple:
     )
     balances = balances_response.value
 
-    balances_response = await client.get_multiple_accounts_json_parsed(
-        [quote_vault, base_vault], Processed
-    )
-    balances = balances_response.value
-
     try:
         quote_account = balances[0]
         base_account = balances[1]
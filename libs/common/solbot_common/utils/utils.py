@@ -13,17 +13,17 @@ from solders.pubkey import Pubkey  # type: ignore
 from solders.signature import Signature  # type: ignore
 from solders.transaction_status import \
     TransactionConfirmationStatus  # type: ignore
-from spl.token.instructions import get_associated_token_address
+from solbot_common.utils.pda import find_program_address, get_associated_token_address
 
 
 def get_global_volume_accumulator_pda(program_id: Pubkey) -> Pubkey:
     """计算全局交易量累加器 PDA"""
-    pda, _ = Pubkey.find_program_address([b"global_volume_accumulator"], program_id)
+    pda, _ = find_program_address([b"global_volume_accumulator"], program_id)
     return pda
 
 def get_user_volume_accumulator_pda(user: Pubkey, program_id: Pubkey) -> Pubkey:
     """计算用户交易量累加器 PDA"""
-    pda, _ = Pubkey.find_program_address([b"user_volume_accumulator", bytes(user)], program_id)
+    pda, _ = find_program_address([b"user_volume_accumulator", bytes(user)], program_id)
     return pda
 
 def get_bonding_curve_pda(mint: Pubkey, program: Pubkey) -> tuple[Pubkey, int]:
@@ -38,7 +38,7 @@ def get_bonding_curve_pda(mint: Pubkey, program: Pubkey) -> tuple[Pubkey, int]:
         Tuple of (bonding curve address, bump seed)
     """
 
-    return Pubkey.find_program_address([b"bonding-curve", bytes(mint)], program)
+    return find_program_address([b"bonding-curve", bytes(mint)], program)
     # return Pubkey.find_program_address([b"creator-vault", bytes(mint)], program)
 def get_bonding_curve_pda_creator_vault(mint: Pubkey, program: Pubkey) :
     """
@@ -53,7 +53,7 @@ def get_bonding_curve_pda_creator_vault(mint: Pubkey, program: Pubkey) :
     """
     # creator - vault
     # return Pubkey.find_program_address([b"bonding-curve", bytes(mint)], program)
-    return Pubkey.find_program_address([b"creator-vault", bytes(mint)], program)
+    return find_program_address([b"creator-vault", bytes(mint)], program)
 
 async def get_bonding_curve_account(
     client: AsyncClient, mint: Pubkey, program: Pubkey
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Geyser 交易解码基准测试
+
+对比 tests/ 下 Geyser 调试数据的三种解析路径:
+
+- legacy: proto_to_dict -> orjson.dumps -> orjson.loads -> RawTXParser (原有路径)
+- rpc-dict: transaction_to_rpc_dict -> orjson.dumps -> orjson.loads -> RawTXParser
+- native: GeyserTXParser 直接读取 protobuf 字段
+
+用法:
+    uv run python scripts/bench_geyser_decode.py [--iterations 2000]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import orjson as json
+from wallet_tracker.exceptions import (
+    NotSwapTransaction,
+    UnknownTransactionType,
+    ZeroChangeAmountError,
+)
+from wallet_tracker.geyser.codec import (
+    load_update_dumps,
+    transaction_to_rpc_dict,
+    update_from_dict,
+)
+from wallet_tracker.geyser.tx_subscriber import proto_to_dict
+from wallet_tracker.parser import GeyserTXParser, RawTXParser
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests"
+FIXTURES = ["数据.json", "数据2.json", "meteroadbc.json", "Photon Program + Pump.fun AMM.json"]
+EXPECTED_ERRORS = (NotSwapTransaction, UnknownTransactionType, ZeroChangeAmountError, ValueError)
+
+
+def legacy_path(update) -> None:
+    transaction = proto_to_dict(update)["transaction"]
+    data = {**transaction["transaction"]}
+    data["slot"] = int(transaction["slot"])
+    data["version"] = 0
+    data["blockTime"] = int(time.time())
+    payload = json.dumps(data)
+    try:
+        RawTXParser(json.loads(payload)).parse()
+    except EXPECTED_ERRORS:
+        pass
+
+
+def rpc_dict_path(update) -> None:
+    payload = json.dumps(transaction_to_rpc_dict(update.transaction, int(time.time())))
+    try:
+        RawTXParser(json.loads(payload)).parse()
+    except EXPECTED_ERRORS:
+        pass
+
+
+def native_path(update) -> None:
+    try:
+        GeyserTXParser(update.transaction).parse()
+    except EXPECTED_ERRORS:
+        pass
+
+
+def bench(name: str, fn: Callable, updates: list, iterations: int) -> float:
+    # 预热
+    for update in updates:
+        fn(update)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for update in updates:
+            fn(update)
+    elapsed = time.perf_counter() - start
+    per_tx_us = elapsed / (iterations * len(updates)) * 1e6
+    print(f"{name:<10} {per_tx_us:>10.1f} us/tx {iterations * len(updates) / elapsed:>12.0f} tx/s")
+    return per_tx_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    updates = [
+        update_from_dict(data)
+        for name in FIXTURES
+        for data in load_update_dumps(FIXTURES_DIR / name)
+    ]
+    print(f"Loaded {len(updates)} transactions, {args.iterations} iterations\n")
+
+    legacy = bench("legacy", legacy_path, updates, args.iterations)
+    rpc_dict = bench("rpc-dict", rpc_dict_path, updates, args.iterations)
+    native = bench("native", native_path, updates, args.iterations)
+    print(f"\nrpc-dict speedup: {legacy / rpc_dict:.1f}x")
+    print(f"native speedup:   {legacy / native:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""RawTXParser 基准测试
+
+生成合成交易 (每笔交易的签名、签名者、mint 和余额都不同) 并逐笔解析,
+统计解析耗时以及进程 RSS 随解析数量的变化。解析器不应持有已解析的交易,
+RSS 在预热后应保持平稳。
+
+用法:
+    uv run python scripts/bench_raw_tx_parser.py [--count 1000000] [--token-accounts 4]
+"""
+
+import argparse
+import resource
+import time
+from pathlib import Path
+
+from solbot_common.constants import TOKEN_PROGRAM_ID, WSOL
+from wallet_tracker.parser import RawTXParser
+
+TOKEN_PROGRAM_ID_STR = str(TOKEN_PROGRAM_ID)
+WSOL_STR = str(WSOL)
+PUMP_LOG = "Program 6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P invoke [1]"
+
+
+def rss_mb() -> float:
+    """当前 RSS, 非 Linux 平台退化为峰值 RSS"""
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def token_balance(index: int, owner: str, mint: str, amount: int) -> dict:
+    return {
+        "accountIndex": index,
+        "mint": mint,
+        "owner": owner,
+        "programId": TOKEN_PROGRAM_ID_STR,
+        "uiTokenAmount": {
+            "uiAmount": amount / 1e6,
+            "decimals": 6,
+            "amount": str(amount),
+            "uiAmountString": str(amount / 1e6),
+        },
+    }
+
+
+def synthetic_tx(i: int, token_accounts: int) -> dict:
+    """构造一笔买入交易, 另外附带 token_accounts 个其他持有者的余额"""
+    who = f"Wallet{i:038d}"
+    mint = f"Mint{i:036d}pump"
+    pre = [token_balance(1, f"Pool{i:040d}", WSOL_STR, 10**12)]
+    post = [
+        token_balance(1, f"Pool{i:040d}", WSOL_STR, 10**12 + 10**9),
+        token_balance(2, who, mint, 10**9 + i),
+    ]
+    for j in range(token_accounts):
+        owner = f"Holder{j:03d}{i:032d}"
+        pre.append(token_balance(3 + j, owner, mint, 10**12 + j))
+        post.append(token_balance(3 + j, owner, mint, 10**12 + j))
+    return {
+        "slot": 300_000_000 + i,
+        "blockTime": 1735689600 + i,
+        "transaction": {
+            "signatures": [f"Sig{i:085d}"],
+            "message": {"accountKeys": [who, f"Pool{i:040d}", mint]},
+        },
+        "meta": {
+            "err": None,
+            "preBalances": [5 * 10**9, 0, 0],
+            "postBalances": [4 * 10**9, 0, 0],
+            "logMessages": [
+                "Program ComputeBudget111111111111111111111111111111 invoke [1]",
+                PUMP_LOG,
+            ],
+            "preTokenBalances": pre,
+            "postTokenBalances": post,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--token-accounts", type=int, default=4)
+    args = parser.parse_args()
+
+    checkpoint = max(args.count // 10, 1)
+    start_rss = rss_mb()
+    parse_elapsed = 0.0
+    print(f"{'parsed':>10} {'us/tx':>8} {'rss MB':>8} {'delta MB':>9}")
+    for i in range(args.count):
+        tx = synthetic_tx(i, args.token_accounts)
+        start = time.perf_counter()
+        RawTXParser(tx).parse()
+        parse_elapsed += time.perf_counter() - start
+        if (i + 1) % checkpoint == 0:
+            rss = rss_mb()
+            per_tx_us = parse_elapsed / (i + 1) * 1e6
+            print(f"{i + 1:>10} {per_tx_us:>8.2f} {rss:>8.1f} {rss - start_rss:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
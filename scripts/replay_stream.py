@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""回放录制的 Geyser / WSS 消息, 压测 wallet-tracker 的处理流程
+
+消息送入 `TxMonitor` 创建的订阅者 (不连接 Geyser / WebSocket), 由
+`TransactionWorker` 通过 config.toml 中的 Redis 完成解析与发布, 结束后输出吞吐量与
+各阶段延迟。请使用本地 Redis, 回放会向其写入 TxEvent。wss 模式仍会通过 RPC 查询
+交易详情 (日志快速路径除外)。使用 --repeat 生成的文件中签名会重复, 需要将
+monitor.dedup_window 设为 0, 否则重复的交易会被去重跳过。
+
+用法:
+    # 由 tests/ 下的调试数据生成录制文件
+    uv run python scripts/replay_stream.py seed replay.bin --repeat 100
+    # 按 10 倍速回放, --speed 0 为最大速度
+    uv run python scripts/replay_stream.py replay replay.bin --mode geyser-inline --speed 10
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from solbot_common.config import settings
+from solbot_db.redis import RedisClient
+from solders.pubkey import Pubkey  # type: ignore
+from wallet_tracker.benchmark import benchmark_service
+from wallet_tracker.benchmark.service import STAGES
+from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL, NEW_TX_SIGNATURE_CHANNEL
+from wallet_tracker.replay import StreamReplayer, seed_recording
+from wallet_tracker.tx_monitor import TxMonitor
+from wallet_tracker.tx_worker import TransactionWorker
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests"
+FIXTURES = ["数据.json", "数据2.json", "meteroadbc.json", "Photon Program + Pump.fun AMM.json"]
+
+
+async def wait_idle(redis, idle: float) -> None:
+    """等待 Redis 队列清空, 且 idle 秒内没有新的 TxEvent 发布"""
+    last = (-1, -1)
+    idle_since = time.monotonic()
+    while True:
+        await asyncio.sleep(0.2)
+        backlog = await redis.llen(NEW_TX_DETAIL_CHANNEL) + await redis.llen(
+            NEW_TX_SIGNATURE_CHANNEL
+        )
+        progress = (benchmark_service.produced, benchmark_service.current["parse"].count)
+        if backlog or progress != last:
+            last = progress
+            idle_since = time.monotonic()
+        elif time.monotonic() - idle_since >= idle:
+            return
+
+
+async def replay(args) -> None:
+    wallets = [Pubkey.from_string(wallet) for wallet in args.wallet] or settings.monitor.wallets
+    redis = RedisClient.get_instance()
+    monitor = TxMonitor(wallets, mode=args.mode).monitor
+    worker = TransactionWorker(redis, parse_processes=settings.monitor.parse_processes)
+    worker_task = asyncio.create_task(worker.start())
+
+    on_update = on_logs = None
+    if args.mode == "wss":
+        log_monitor = monitor.account_log_monitor  # type: ignore
+        await log_monitor.subscribe_wallets(wallets)
+        monitor.is_running = True
+        monitor.workers = [asyncio.create_task(monitor.worker()) for _ in range(2)]  # type: ignore
+        on_logs = log_monitor.process_log
+    else:
+        monitor.is_running = True
+        await monitor._start_workers()  # type: ignore
+        on_update = monitor.response_queue.put  # type: ignore
+
+    start = time.monotonic()
+    stats = await StreamReplayer(args.path, speed=args.speed).replay(on_update, on_logs)
+    await wait_idle(redis, args.idle)
+    elapsed = time.monotonic() - start - args.idle
+
+    print(f"\nReplayed {stats.records} messages in {stats.elapsed:.2f}s ({stats.rate:.0f} msg/s)")
+    print(f"Errors: {stats.errors}")
+    produced = benchmark_service.produced
+    print(f"Produced {produced} tx events ({produced / max(elapsed, 1e-9):.0f} events/s)\n")
+    snapshot = benchmark_service.snapshot()["stages"]
+    print(f"{'stage':<10}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for stage in STAGES:
+        s = snapshot[stage]
+        print(
+            f"{stage:<10}{s['count']:>8}{s['p50'] * 1000:>10.2f}{s['p90'] * 1000:>10.2f}"
+            f"{s['p99'] * 1000:>10.2f}{s['max'] * 1000:>10.2f}"
+        )
+
+    await monitor.stop()
+    await worker.stop()
+    worker_task.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed = subparsers.add_parser("seed", help="由 tests/ 下的 Geyser 调试数据生成录制文件")
+    seed.add_argument("path")
+    seed.add_argument("--interval", type=float, default=0.05, help="消息间隔 (秒)")
+    seed.add_argument("--repeat", type=int, default=1)
+
+    play = subparsers.add_parser("replay", help="回放录制文件")
+    play.add_argument("path")
+    play.add_argument("--mode", choices=["wss", "geyser", "geyser-inline"], default="geyser")
+    play.add_argument("--speed", type=float, default=1.0, help="回放倍速, 0 为最大速度")
+    play.add_argument("--wallet", action="append", default=[], help="wss 模式监听的钱包")
+    play.add_argument("--idle", type=float, default=2.0, help="没有新事件多久后结束 (秒)")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        count = seed_recording(
+            (FIXTURES_DIR / name for name in FIXTURES),
+            args.path,
+            interval=args.interval,
+            repeat=args.repeat,
+        )
+        print(f"Wrote {count} messages to {args.path}")
+    else:
+        asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    main()
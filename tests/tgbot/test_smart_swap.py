@@ -0,0 +1,47 @@
+import pytest
+from solbot_common.types import TxEvent, TxType
+from tg_bot.notify import smart_swap
+from tg_bot.notify.smart_swap import SmartWalletSwapAlertNotify
+from tg_bot.templates import render_notify_swap
+
+
+class FakeTokenInfoCache:
+    async def get(self, mint):
+        return None
+
+
+def buy_event(provisional: bool) -> TxEvent:
+    return TxEvent(
+        signature="sig",
+        from_amount=10**9,
+        from_decimals=9,
+        to_amount=2_000 * 10**6,
+        to_decimals=6,
+        mint="mint",
+        who="wallet",
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=1_700_000_000,
+        pre_token_amount=0,
+        post_token_amount=2_000 * 10**6,
+        provisional=provisional,
+    )
+
+
+@pytest.mark.asyncio
+async def test_provisional_buy_is_not_labelled_as_open_position(monkeypatch):
+    monkeypatch.setattr(smart_swap, "TokenInfoCache", FakeTokenInfoCache)
+    notify = object.__new__(SmartWalletSwapAlertNotify)
+
+    message = await notify.build_swap_message(buy_event(provisional=False))
+    assert message.tx_type_cn == "开仓"
+    assert "当前持仓" in render_notify_swap(message)
+
+    # 临时事件不知道交易前的持仓, 不区分开仓与加仓
+    message = await notify.build_swap_message(buy_event(provisional=True))
+    assert message.tx_type_cn == "买入"
+    assert message.position_change_formatted == "+2000.0000"
+    assert message.post_amount is None
+    rendered = render_notify_swap(message)
+    assert "买入 2000.0 个" in rendered
+    assert "当前持仓" not in rendered
@@ -0,0 +1,54 @@
+from solbot_common.constants import WSOL
+from solbot_common.models.swap_record import SwapRecord, TransactionStatus
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.instructions import get_associated_token_address
+from trading.ata import AtaExistenceCache
+
+
+def swap_record(owner: Pubkey, mint: Pubkey, status: TransactionStatus) -> SwapRecord:
+    return SwapRecord(
+        status=status,
+        user_pubkey=str(owner),
+        swap_mode="ExactIn",
+        input_mint=str(WSOL),
+        output_mint=str(mint),
+        input_amount=10**9,
+        input_token_decimals=9,
+        output_amount=10**6,
+        output_token_decimals=6,
+    )
+
+
+def test_unknown_ata_is_created_idempotently():
+    cache = AtaExistenceCache()
+    owner, mint = Pubkey.new_unique(), Pubkey.new_unique()
+
+    ix = cache.create_instruction(owner, mint)
+    assert ix is not None
+    # CreateIdempotent 的指令数据为 1
+    assert bytes(ix.data) == bytes([1])
+    assert ix.accounts[1].pubkey == get_associated_token_address(owner, mint)
+
+
+def test_confirmed_transactions_feed_the_cache():
+    cache = AtaExistenceCache(maxsize=2)
+    owner, mint = Pubkey.new_unique(), Pubkey.new_unique()
+
+    # 超时未确认的交易不影响缓存
+    cache.observe(swap_record(owner, mint, TransactionStatus.EXPIRED))
+    assert not cache.exists(owner, mint)
+
+    cache.observe(swap_record(owner, mint, TransactionStatus.SUCCESS))
+    assert cache.create_instruction(owner, mint) is None
+
+    cache.observe(swap_record(owner, mint, TransactionStatus.FAILED))
+    assert cache.create_instruction(owner, mint) is not None
+
+    # 超过容量时淘汰最久未使用的记录
+    a, b, c = (Pubkey.new_unique() for _ in range(3))
+    cache.add(owner, a)
+    cache.add(owner, b)
+    assert cache.exists(owner, a)
+    cache.add(owner, c)
+    assert len(cache) == 2
+    assert not cache.exists(owner, b)
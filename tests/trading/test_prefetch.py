@@ -0,0 +1,118 @@
+import asyncio
+import struct
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from solbot_common.constants import PUMP_FUN_PROGRAM, PUMP_GLOBAL_ACCOUNT
+from solbot_common.layouts.bonding_curve_account import BONDING_CURVE_ACCOUNT_LAYOUT_V2
+from solbot_common.layouts.global_account import GLOBAL_ACCOUNT_LAYOUT
+from solbot_common.utils.utils import get_bonding_curve_pda
+from solders.account import Account  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from trading.swap import SwapDirection
+from trading.transaction.builders import pump
+from trading.transaction.builders.base import PrefetchPlan
+
+
+class FakeRpcClient:
+    def __init__(self, accounts: dict[Pubkey, Account]):
+        self.accounts = accounts
+        self.get_multiple_accounts = AsyncMock(side_effect=self._get_multiple_accounts)
+        self.get_account_info = AsyncMock()
+        self.get_account_info_json_parsed = AsyncMock()
+
+    async def _get_multiple_accounts(self, pubkeys, commitment=None, encoding=None):
+        return SimpleNamespace(value=[self.accounts.get(pubkey) for pubkey in pubkeys])
+
+
+def bonding_curve_account(creator: Pubkey) -> Account:
+    data = struct.pack("<Q", 6966180631402821399) + BONDING_CURVE_ACCOUNT_LAYOUT_V2.build(
+        {
+            "virtual_token_reserves": 1_000_000 * 10**6,
+            "virtual_sol_reserves": 30 * 10**9,
+            "real_token_reserves": 800_000 * 10**6,
+            "real_sol_reserves": 0,
+            "token_total_supply": 1_000_000_000 * 10**6,
+            "complete": False,
+            "creator": bytes(creator),
+        }
+    )
+    return Account(10**7, data, PUMP_FUN_PROGRAM)
+
+
+def global_account(fee_recipient: Pubkey) -> Account:
+    data = struct.pack("<Q", 9183522199395952807) + GLOBAL_ACCOUNT_LAYOUT.build(
+        {
+            "initialized": True,
+            "authority": bytes(Pubkey.new_unique()),
+            "fee_recipient": bytes(fee_recipient),
+            "initial_virtual_token_reserves": 0,
+            "initial_virtual_sol_reserves": 0,
+            "initial_real_token_reserves": 0,
+            "token_total_supply": 0,
+            "fee_basis_points": 100,
+            "withdrawal_authority": bytes(Pubkey.new_unique()),
+            "enable_migration": True,
+            "pool_migration_fee": 0,
+            "creator_fee": 0,
+            "fee_recipients": [bytes(Pubkey.new_unique()) for _ in range(7)],
+        }
+    )
+    return Account(10**7, data, PUMP_FUN_PROGRAM)
+
+
+@pytest.mark.asyncio
+async def test_plan_batches_accounts_and_runs_calls_concurrently():
+    a, b = Pubkey.new_unique(), Pubkey.new_unique()
+    rpc_client = FakeRpcClient({a: global_account(Pubkey.new_unique())})
+    ready = asyncio.Event()
+
+    async def waiter():
+        # 只有与 setter 并发执行才能完成
+        await asyncio.wait_for(ready.wait(), 1)
+        return "waited"
+
+    async def setter(value):
+        ready.set()
+        return value
+
+    plan = PrefetchPlan().account("a", a).account("b", b)
+    plan.call("waiter", waiter).call("setter", setter, 42)
+    prefetched = await plan.execute(rpc_client)  # type: ignore
+
+    rpc_client.get_multiple_accounts.assert_awaited_once()
+    assert rpc_client.get_multiple_accounts.await_args.args[0] == [a, b]
+    assert prefetched["a"] is not None
+    assert prefetched["b"] is None
+    assert (prefetched["waiter"], prefetched["setter"]) == ("waited", 42)
+
+    with pytest.raises(ValueError):
+        plan.account("setter", a)
+
+
+@pytest.mark.asyncio
+async def test_pump_buy_reads_its_inputs_in_one_round(monkeypatch):
+    mint, creator, fee_recipient = Pubkey.new_unique(), Pubkey.new_unique(), Pubkey.new_unique()
+    bonding_curve, _ = get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM)
+    rpc_client = FakeRpcClient(
+        {
+            bonding_curve: bonding_curve_account(creator),
+            PUMP_GLOBAL_ACCOUNT: global_account(fee_recipient),
+        }
+    )
+    blockhash = Hash.new_unique()
+    monkeypatch.setattr(pump, "get_latest_blockhash", AsyncMock(return_value=(blockhash, 0)))
+
+    builder = pump.PumpTransactionBuilder(rpc_client)  # type: ignore
+    tx = await builder.build_swap_transaction(
+        Keypair(), str(mint), 0.1, SwapDirection.Buy, slippage_bps=100
+    )
+
+    rpc_client.get_multiple_accounts.assert_awaited_once()
+    rpc_client.get_account_info.assert_not_awaited()
+    rpc_client.get_account_info_json_parsed.assert_not_awaited()
+    assert tx.message.recent_blockhash == blockhash
+    assert fee_recipient in tx.message.account_keys
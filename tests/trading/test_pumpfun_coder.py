@@ -0,0 +1,60 @@
+import pytest
+from solana.rpc.async_api import AsyncClient
+from solbot_common.constants import (
+    PUMP_BUY_METHOD,
+    PUMP_FUN_ACCOUNT,
+    PUMP_FUN_PROGRAM,
+    PUMP_GLOBAL_ACCOUNT,
+    PUMP_SELL_METHOD,
+    SYSTEM_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+)
+from solbot_common.IDL.pumpfun import PumpFunInterface, get_instruction_coder, load_idl
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+
+
+def swap_accounts(owner: Pubkey, direction: str) -> dict[str, Pubkey]:
+    accounts = {
+        "fee_recipient": Pubkey.new_unique(),
+        "mint": Pubkey.new_unique(),
+        "bonding_curve": Pubkey.new_unique(),
+        "associated_bonding_curve": Pubkey.new_unique(),
+        "associated_user": Pubkey.new_unique(),
+        "user": owner,
+        "global": PUMP_GLOBAL_ACCOUNT,
+        "system_program": SYSTEM_PROGRAM_ID,
+        "token_program": TOKEN_PROGRAM_ID,
+        "creator_vault": Pubkey.new_unique(),
+        "event_authority": PUMP_FUN_ACCOUNT,
+        "program": PUMP_FUN_PROGRAM,
+    }
+    if direction == "buy":
+        accounts["global_volume_accumulator"] = Pubkey.new_unique()
+        accounts["user_volume_accumulator"] = Pubkey.new_unique()
+    return accounts
+
+
+@pytest.mark.parametrize("direction", ["buy", "sell"])
+def test_encoded_instruction_matches_anchorpy(direction):
+    keypair = Keypair()
+    accounts = swap_accounts(keypair.pubkey(), direction)
+    args = (123_456_789_000, 2**64 - 1)
+
+    program = PumpFunInterface(keypair, AsyncClient("http://localhost:8899")).program
+    expected = program.methods[direction].args(list(args)).accounts(accounts).instruction()
+
+    assert get_instruction_coder().encode(direction, args, accounts) == expected
+
+
+def test_idl_is_loaded_once_and_discriminators_match_constants():
+    assert load_idl() is load_idl()
+    coder = get_instruction_coder()
+    accounts = swap_accounts(Pubkey.new_unique(), "buy")
+    buy = coder.encode("buy", (1, 2), accounts)
+    sell = coder.encode("sell", (1, 2), accounts)
+    assert int.from_bytes(bytes(buy.data)[:8], "little") == PUMP_BUY_METHOD
+    assert int.from_bytes(bytes(sell.data)[:8], "little") == PUMP_SELL_METHOD
+    # 卖出不需要交易量累加器
+    assert len(buy.accounts) == 14
+    assert len(sell.accounts) == 12
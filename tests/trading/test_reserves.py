@@ -0,0 +1,115 @@
+import asyncio
+import struct
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from solbot_common.constants import TOKEN_PROGRAM_ID, WSOL
+from solbot_common.types.raydium import AmmV4PoolKeys
+from solders.account import Account  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.responses import (  # type: ignore
+    AccountNotification,
+    AccountNotificationResult,
+    RpcResponseContext,
+    SubscriptionResult,
+)
+from trading.reserves import AmmV4ReserveMirror, amm_v4_amount_out, apply_slippage
+
+
+def token_account(amount: int) -> Account:
+    data = bytes(64) + struct.pack("<Q", amount) + bytes(93)
+    return Account(2_039_280, data, TOKEN_PROGRAM_ID)
+
+
+def pool_keys() -> AmmV4PoolKeys:
+    fields = {name: Pubkey.new_unique() for name in AmmV4PoolKeys.__dataclass_fields__}
+    fields.update(base_mint=Pubkey.new_unique(), quote_mint=WSOL)
+    fields.update(base_decimals=6, quote_decimals=9)
+    return AmmV4PoolKeys(**fields)
+
+
+class FakeRpcClient:
+    """按 vault 返回余额的 getMultipleAccounts"""
+
+    def __init__(self):
+        self.amounts: dict[Pubkey, int] = {}
+        self.slot = 100
+        self.get_multiple_accounts = AsyncMock(side_effect=self._get_multiple_accounts)
+
+    async def _get_multiple_accounts(self, pubkeys, commitment=None, encoding=None):
+        value = [token_account(self.amounts[pubkey]) for pubkey in pubkeys]
+        return SimpleNamespace(context=SimpleNamespace(slot=self.slot), value=value)
+
+
+def test_integer_swap_math():
+    # 1 SOL 买入, 储备 100 SOL / 1_000_000 token
+    amount_out = amm_v4_amount_out(10**9, 100 * 10**9, 10**12)
+    assert amount_out == 9_876_482_091
+    assert apply_slippage(amount_out, 100) == 9_777_717_270
+
+
+@pytest.mark.asyncio
+async def test_reserves_are_fetched_once_and_served_from_memory():
+    rpc_client = FakeRpcClient()
+    keys = pool_keys()
+    rpc_client.amounts = {keys.base_vault: 10**12, keys.quote_vault: 100 * 10**9}
+    mirror = AmmV4ReserveMirror(rpc_client, max_age=60)  # type: ignore
+
+    reserves = await mirror.get_reserves(keys)
+    assert (reserves.token_reserve, reserves.sol_reserve) == (10**12, 100 * 10**9)
+    assert reserves.token_decimals == 6
+    assert reserves.slot == 100
+    # 两个 vault 在一次请求中查询
+    rpc_client.get_multiple_accounts.assert_awaited_once()
+
+    await mirror.get_reserves(keys)
+    rpc_client.get_multiple_accounts.assert_awaited_once()
+    assert mirror.stats() == {"pools": 1, "subscribed": 0, "hits": 1, "misses": 1}
+
+    # 过期后重新查询, 早于当前 slot 的结果被忽略
+    mirror.max_age = 0
+    rpc_client.slot = 99
+    rpc_client.amounts[keys.base_vault] = 1
+    reserves = await mirror.get_reserves(keys)
+    assert reserves.token_reserve == 10**12
+
+
+@pytest.mark.asyncio
+async def test_subscribed_vaults_follow_notifications():
+    rpc_client = FakeRpcClient()
+    keys = pool_keys()
+    rpc_client.amounts = {keys.base_vault: 10**12, keys.quote_vault: 100 * 10**9}
+    mirror = AmmV4ReserveMirror(rpc_client, max_pools=1, max_age=0)  # type: ignore
+    mirror.websocket = AsyncMock()
+    mirror.websocket.increment_counter_and_get_id = MagicMock(side_effect=[1, 2])
+    # 首次交易时查询余额并在后台订阅两个 vault
+    await mirror.get_reserves(keys)
+    await asyncio.sleep(0)
+    assert set(mirror.pending.values()) == {keys.base_vault, keys.quote_vault}
+
+    for request_id, subscription_id in [(1, 11), (2, 12)]:
+        await mirror.on_subscription_result(SubscriptionResult(request_id, subscription_id))
+    # 订阅生效前的变化不会推送, 重新查询之前不使用内存中的余额
+    assert mirror.reserves_of(keys) is None
+    await mirror.refresh()
+    assert mirror.reserves_of(keys) is not None
+
+    vault = mirror.vault_of_subscription[11]
+    context = RpcResponseContext(120)
+    notification = AccountNotificationResult(token_account(42), context)
+    mirror.on_account_notification(AccountNotification(notification, 11))
+    assert mirror.balances[vault].amount == 42
+    assert mirror.balances[vault].slot == 120
+
+    # 超过 max_pools 时取消最久未交易池子的订阅
+    other = pool_keys()
+    rpc_client.amounts.update({other.base_vault: 1, other.quote_vault: 1})
+    mirror.websocket.increment_counter_and_get_id = MagicMock(side_effect=[3, 4])
+    await mirror.get_reserves(other)
+    await asyncio.sleep(0)
+    assert keys.amm_id not in mirror.pools
+    assert vault not in mirror.balances
+    assert mirror.vault_of_subscription == {}
+    assert mirror.websocket.account_unsubscribe.await_count == 2
+    await mirror.stop()
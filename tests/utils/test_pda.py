@@ -0,0 +1,39 @@
+import pytest
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.utils.pda import DerivationCache, get_associated_token_address
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.constants import TOKEN_2022_PROGRAM_ID
+from spl.token.instructions import get_associated_token_address as spl_get_ata
+
+
+def test_cached_derivations_match_solders_and_spl():
+    owner, mint = Pubkey.new_unique(), Pubkey.new_unique()
+    assert get_associated_token_address(owner, mint) == spl_get_ata(owner, mint)
+    assert get_associated_token_address(owner, mint, TOKEN_2022_PROGRAM_ID) == spl_get_ata(
+        owner, mint, TOKEN_2022_PROGRAM_ID
+    )
+    with pytest.raises(ValueError):
+        get_associated_token_address(owner, mint, PUMP_FUN_PROGRAM)
+
+    cache = DerivationCache()
+    seeds = [b"bonding-curve", bytes(mint)]
+    expected = Pubkey.find_program_address(seeds, PUMP_FUN_PROGRAM)
+    assert cache.find_program_address(seeds, PUMP_FUN_PROGRAM) == expected
+    assert cache.find_program_address(seeds, PUMP_FUN_PROGRAM) == expected
+    assert cache.stats() == {"size": 1, "maxsize": 100_000, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_least_recently_used_derivation_is_evicted():
+    cache = DerivationCache(maxsize=2)
+    a, b, c = ([b"seed", bytes([i])] for i in range(3))
+    cache.find_program_address(a, PUMP_FUN_PROGRAM)
+    cache.find_program_address(b, PUMP_FUN_PROGRAM)
+    cache.find_program_address(a, PUMP_FUN_PROGRAM)
+    cache.find_program_address(c, PUMP_FUN_PROGRAM)
+    assert len(cache) == 2
+
+    # b 最久未使用, 被淘汰
+    cache.find_program_address(a, PUMP_FUN_PROGRAM)
+    assert cache.hits == 2
+    cache.find_program_address(b, PUMP_FUN_PROGRAM)
+    assert cache.misses == 4
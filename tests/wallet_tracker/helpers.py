@@ -0,0 +1,53 @@
+"""wallet_tracker 测试共用的辅助函数与 fake 对象"""
+
+import asyncio
+import itertools
+import json
+from pathlib import Path
+
+from yellowstone_grpc.grpc import geyser_pb2
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        return json.load(f)["result"]
+
+
+class FakeWebsocket:
+    """记录发送的订阅请求与取消订阅的 WSS 连接"""
+
+    def __init__(self):
+        self.counter = itertools.count()
+        self.sent = []
+        self.unsubscribed = []
+
+    def increment_counter_and_get_id(self) -> int:
+        return next(self.counter) + 1
+
+    async def send_data(self, message):
+        self.sent.append(message)
+
+    async def logs_unsubscribe(self, subscription_id: int):
+        self.unsubscribed.append(subscription_id)
+
+
+class FakeGeyserClient:
+    """每次订阅依次返回 updates 后保持连接, 记录初始请求与后续请求队列"""
+
+    def __init__(self, updates: list[geyser_pb2.SubscribeUpdate] | None = None):
+        self.updates = updates or []
+        self.initial_requests = []
+        self.request_queues: list[asyncio.Queue] = []
+
+    async def subscribe_with_request(self, request):
+        self.initial_requests.append(request)
+        queue = asyncio.Queue()
+        self.request_queues.append(queue)
+
+        async def responses():
+            for update in self.updates:
+                yield update
+            await asyncio.Event().wait()
+
+        return queue, responses()
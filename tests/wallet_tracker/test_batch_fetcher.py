@@ -0,0 +1,150 @@
+import asyncio
+
+import httpx
+import orjson as json
+import pytest
+from solders.signature import Signature
+from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
+
+SIGNATURES = [Signature.new_unique() for _ in range(5)]
+
+
+def make_fetcher(handler, **kwargs) -> TxDetailRawFetcher:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return TxDetailRawFetcher("https://rpc.example", client=client, **kwargs)
+
+
+def transaction(signature: str) -> dict:
+    return {"slot": 1, "transaction": {"signatures": [signature]}}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_one_batch_request():
+    posts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        posts.append(payload)
+        # 响应乱序返回, 第一个签名尚不可查, 第二个返回错误
+        responses = []
+        for i, item in enumerate(reversed(payload)):
+            signature = item["params"][0]
+            if signature == str(SIGNATURES[0]):
+                responses.append({"jsonrpc": "2.0", "id": item["id"], "result": None})
+            elif signature == str(SIGNATURES[1]):
+                responses.append({"jsonrpc": "2.0", "id": item["id"], "error": {"code": i}})
+            else:
+                responses.append(
+                    {"jsonrpc": "2.0", "id": item["id"], "result": transaction(signature)}
+                )
+        return httpx.Response(200, content=json.dumps(responses))
+
+    fetcher = make_fetcher(handler, max_delay=0.01)
+    results = await asyncio.gather(
+        *(fetcher.fetch(signature) for signature in SIGNATURES), return_exceptions=True
+    )
+
+    assert len(posts) == 1
+    assert [item["params"][0] for item in posts[0]] == [str(s) for s in SIGNATURES]
+    assert results[0] is None
+    assert isinstance(results[1], Exception)
+    for signature, result in zip(SIGNATURES[2:], results[2:], strict=True):
+        assert result == transaction(str(signature))
+
+
+@pytest.mark.asyncio
+async def test_batch_is_sent_when_full():
+    posts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        posts.append(len(payload))
+        return httpx.Response(
+            200, content=json.dumps([{"id": item["id"], "result": {}} for item in payload])
+        )
+
+    fetcher = make_fetcher(handler, max_batch_size=2, max_delay=10)
+    await asyncio.wait_for(
+        asyncio.gather(*(fetcher.fetch(signature) for signature in SIGNATURES[:4])), 1
+    )
+    assert posts == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_when_batch_is_not_supported():
+    batch_posts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal batch_posts
+        payload = json.loads(request.content)
+        if isinstance(payload, list):
+            batch_posts += 1
+            error = {"jsonrpc": "2.0", "id": None, "error": {"message": "batch not allowed"}}
+            return httpx.Response(200, content=json.dumps(error))
+        signature = payload["params"][0]
+        return httpx.Response(
+            200, content=json.dumps({"id": payload["id"], "result": transaction(signature)})
+        )
+
+    fetcher = make_fetcher(handler)
+    results = await asyncio.gather(*(fetcher.fetch(signature) for signature in SIGNATURES))
+    assert [r["transaction"]["signatures"][0] for r in results] == [str(s) for s in SIGNATURES]
+    assert not fetcher.batch_supported
+
+    await asyncio.gather(*(fetcher.fetch(signature) for signature in SIGNATURES))
+    assert batch_posts == 1
+
+
+@pytest.mark.asyncio
+async def test_falls_back_when_batch_is_rejected_with_http_error():
+    batch_posts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal batch_posts
+        payload = json.loads(request.content)
+        if isinstance(payload, list):
+            batch_posts += 1
+            return httpx.Response(413, content=b"Payload Too Large")
+        signature = payload["params"][0]
+        return httpx.Response(
+            200, content=json.dumps({"id": payload["id"], "result": transaction(signature)})
+        )
+
+    fetcher = make_fetcher(handler)
+    results = await asyncio.gather(*(fetcher.fetch(signature) for signature in SIGNATURES))
+    # 被拒绝的窗口逐个重试, 之后不再发送批量请求
+    assert [r["transaction"]["signatures"][0] for r in results] == [str(s) for s in SIGNATURES]
+    assert not fetcher.batch_supported
+
+    await asyncio.gather(*(fetcher.fetch(signature) for signature in SIGNATURES))
+    assert batch_posts == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "response",
+    [
+        httpx.Response(429, content=b"Too Many Requests"),
+        httpx.Response(
+            200,
+            content=json.dumps(
+                {"jsonrpc": "2.0", "id": None, "error": {"code": -32005, "message": "rate limit"}}
+            ),
+        ),
+    ],
+)
+async def test_rate_limited_batch_keeps_batching(response: httpx.Response):
+    posts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        posts.append(json.loads(request.content))
+        return response
+
+    fetcher = make_fetcher(handler)
+    results = await asyncio.gather(
+        *(fetcher.fetch(signature) for signature in SIGNATURES), return_exceptions=True
+    )
+    # 本批次失败, 由调用方重试; 不会拆成逐个请求加重限流
+    assert all(isinstance(result, Exception) for result in results)
+    assert len(posts) == 1
+    assert fetcher.batch_supported
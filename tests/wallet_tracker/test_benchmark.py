@@ -0,0 +1,91 @@
+import random
+import time
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from wallet_tracker import benchmark
+from wallet_tracker.benchmark import BenchmarkService, LatencyHistogram, MetricsServer
+
+
+def test_histogram_percentiles_are_within_precision():
+    rng = random.Random(0)
+    values = sorted(rng.expovariate(10) for _ in range(20_000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    for percent in (50, 90, 99, 99.9):
+        expected = values[int(len(values) * percent / 100) - 1]
+        assert histogram.percentile(percent) == pytest.approx(expected, rel=0.02)
+    assert histogram.max == pytest.approx(values[-1], abs=1e-6)
+
+
+def test_histograms_merge_by_bucket():
+    first, second, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(1000):
+        value = i / 1000
+        (first if i % 2 else second).record(value)
+        combined.record(value)
+    first.merge(second)
+    assert first.counts == combined.counts
+    assert first.percentile(99) == combined.percentile(99)
+
+    with pytest.raises(ValueError):
+        first.merge(LatencyHistogram(sub_buckets=64))
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stages(monkeypatch):
+    service = BenchmarkService(trace_sample_rate=1.0)
+    monkeypatch.setattr(benchmark.decorator, "benchmark_service", service)
+
+    block_time = int(time.time()) - 1
+    await benchmark.init("tx")
+    async with benchmark.with_fetch_tx("tx"):
+        pass
+    await benchmark.record_block_time("tx", block_time)
+    async with benchmark.with_parse_tx("tx"):
+        pass
+    await benchmark.record_produced("tx")
+
+    snapshot = service.snapshot()
+    for stage in ("detect", "fetch", "parse", "produce", "total"):
+        assert snapshot["stages"][stage]["count"] == 1
+    assert snapshot["stages"]["total"]["min"] >= 1
+    # 发布后时间线只保留在采样中
+    assert snapshot["pending"] == 0
+    (trace,) = service.traces
+    assert trace["tx_hash"] == "tx"
+    assert trace["block_time"] == block_time
+
+    service.rotate()
+    assert service.current["parse"].count == 0
+    assert service.snapshot()["stages"]["parse"]["count"] == 1
+
+
+def test_pending_timelines_are_bounded():
+    service = BenchmarkService(max_pending=10)
+    for i in range(25):
+        service.mark(f"tx{i}", "tx_detected")
+    assert len(service.pending) == 10
+    assert service.evicted == 15
+    assert "tx24" in service.pending and "tx0" not in service.pending
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    service = BenchmarkService()
+    service.observe("fetch", 0.25)
+    client = TestClient(TestServer(MetricsServer(service=service).build_app()))
+    await client.start_server()
+    try:
+        response = await client.get("/metrics")
+        text = await response.text()
+        assert 'wallet_tracker_latency_seconds{stage="fetch",quantile="0.99"} 0.25' in text
+        assert 'wallet_tracker_latency_seconds_count{stage="fetch"} 1' in text
+
+        response = await client.get("/metrics.json")
+        assert (await response.json())["stages"]["fetch"]["count"] == 1
+    finally:
+        await client.close()
@@ -0,0 +1,117 @@
+import pytest
+from aioredis.exceptions import ConnectionError
+from wallet_tracker.dedup import _FORGET_SCRIPT, SignatureDeduplicator
+
+
+class FakeBloomRedis:
+    """按 `_CHECK_AND_SET_SCRIPT` 的语义在内存中维护 bitmap"""
+
+    def __init__(self):
+        self.bitmaps: dict[str, set[int]] = {}
+        self.calls = 0
+        self.fail = False
+
+    async def eval(self, script, numkeys, current, previous, *args):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis is down")
+        if script == _FORGET_SCRIPT:
+            for bits in (self.bitmaps.get(current, set()), self.bitmaps.get(previous, set())):
+                bits.difference_update(args)
+            return len(args)
+        k, _ttl, *positions = args
+        current_bits = self.bitmaps.setdefault(current, set())
+        previous_bits = self.bitmaps.get(previous, set())
+        result = []
+        for i in range(0, len(positions), k):
+            group = positions[i : i + k]
+            is_new = any(pos not in current_bits for pos in group)
+            in_previous = all(pos in previous_bits for pos in group)
+            current_bits.update(group)
+            result.append(0 if is_new and not in_previous else 1)
+        return result
+
+
+@pytest.mark.asyncio
+async def test_local_lru_filters_duplicates():
+    dedup = SignatureDeduplicator(None, "test", window=60)
+    assert await dedup.filter_new(["a", "b", "a"]) == ["a", "b"]
+    assert not await dedup.is_new("b")
+    assert await dedup.is_new("c")
+    assert dedup.stats.checked == 5
+    assert dedup.stats.local_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_local_lru_is_bounded():
+    dedup = SignatureDeduplicator(None, "test", window=60, local_size=2)
+    await dedup.filter_new(["a", "b", "c"])
+    assert len(dedup._seen) == 2
+    assert await dedup.is_new("a")
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_redis_filter():
+    redis = FakeBloomRedis()
+    first = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    second = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    signatures = [f"sig{i}" for i in range(100)]
+
+    assert await first.filter_new(signatures) == signatures
+    assert await second.filter_new([*signatures, "new"]) == ["new"]
+    assert second.stats.remote_hits == 100
+    assert second.stats.hit_rate == pytest.approx(100 / 101)
+    # 一次批量检查只需一次 Redis 往返
+    assert redis.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_previous_window_is_checked():
+    redis = FakeBloomRedis()
+    dedup = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    await dedup.is_new("sig")
+    # 模拟进入下一个窗口
+    ((key, bits),) = redis.bitmaps.items()
+    namespace, epoch = key.rsplit(":", 1)
+    redis.bitmaps = {f"{namespace}:{int(epoch) - 1}": bits}
+
+    other = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    assert not await other.is_new("sig")
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fail_open():
+    redis = FakeBloomRedis()
+    redis.fail = True
+    dedup = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    assert await dedup.is_new("sig")
+    assert dedup.stats.errors == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_when_window_is_zero():
+    dedup = SignatureDeduplicator(FakeBloomRedis(), "test", window=0)  # type: ignore
+    assert await dedup.filter_new(["a", "a"]) == ["a", "a"]
+
+
+@pytest.mark.asyncio
+async def test_forget_lets_signature_through_again():
+    redis = FakeBloomRedis()
+    dedup = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    other = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    assert await dedup.is_new("sig")
+    # 例如发布 TxEvent 失败
+    await dedup.forget("sig")
+    assert await other.is_new("sig")
+    assert not await dedup.is_new("sig")
+
+
+@pytest.mark.asyncio
+async def test_forget_ignores_redis_errors():
+    redis = FakeBloomRedis()
+    dedup = SignatureDeduplicator(redis, "test", window=60)  # type: ignore
+    assert await dedup.is_new("sig")
+    redis.fail = True
+    await dedup.forget("sig")
+    assert dedup.stats.errors == 1
+    assert "sig" not in dedup._seen
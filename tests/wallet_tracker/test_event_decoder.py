@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import pytest
+from solbot_common.constants import METEORA_DBC_PROGRAM, PUMP_FUN_PROGRAM
+from wallet_tracker.geyser.codec import load_update_dumps, update_from_dict
+from wallet_tracker.geyser.tx_subscriber import proto_to_dict
+from wallet_tracker.parser import GeyserTXParser, RawTXParser
+from wallet_tracker.parser.events import (
+    EVENT_IX_TAG,
+    event_discriminator,
+    iter_program_data,
+    registry,
+)
+
+from .helpers import read_raw_tx
+
+FIXTURES_DIR = Path(__file__).parent.parent
+PUMP_AMM_PROGRAM_ID = "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA"
+
+
+def load_update(name: str):
+    return update_from_dict(next(load_update_dumps(FIXTURES_DIR / name)))
+
+
+def test_registry_dispatches_by_program_id():
+    assert set(registry.decoders) == {
+        str(PUMP_FUN_PROGRAM),
+        PUMP_AMM_PROGRAM_ID,
+        str(METEORA_DBC_PROGRAM),
+    }
+    # pumpamm.json 给出的 discriminator 与按名称计算的一致
+    assert event_discriminator("BuyEvent") in registry.decoders[PUMP_AMM_PROGRAM_ID]
+
+
+def test_decode_pump_trade_event_from_logs():
+    tx_detail = read_raw_tx("raw/open")
+    (program_id, data), *_ = iter_program_data(tx_detail["meta"]["logMessages"])
+    event = registry.decode(program_id, data)
+    assert event is not None
+    assert event.direction == "buy"
+    assert event.mint == "7LCnGcBjiiaqWMkhTfEEemx5mWdLBHbrgDjCPbTbpump"
+    assert event.user == "7DMcENeWGQ9MVqy7jLo54n9ibzH1DQBNtTa7otBsgjnJ"
+    assert event.sol_amount == 2_000_000_000
+    assert event.token_amount == 59023574727001
+
+    # emit_cpi 形式的数据带有 EVENT_IX_TAG 前缀
+    assert registry.decode(program_id, EVENT_IX_TAG + data) == event
+    # 未知程序、未知事件或数据不完整
+    assert registry.decode(str(METEORA_DBC_PROGRAM), data) is None
+    assert registry.decode(program_id, bytes(8) + data[8:]) is None
+    assert registry.decode(program_id, data[:40]) is None
+
+
+def test_meteora_dbc_event_from_inner_instructions():
+    update = load_update("meteroadbc.json")
+    parser = GeyserTXParser(update.transaction)
+    (event,) = parser.get_swap_events()
+    assert event.program_id == str(METEORA_DBC_PROGRAM)
+    assert event.direction == "buy"
+    assert event.token_amount == 429351803169
+    # 报价代币是 USDC, 不提供 SOL 数量
+    assert event.sol_amount is None
+    assert parser.get_swap_program_id() == str(METEORA_DBC_PROGRAM)
+
+    # 由 Geyser 消息转换的 dict 中, 内部指令数据为 base58
+    tx_detail = proto_to_dict(update)["transaction"]["transaction"]
+    assert RawTXParser(tx_detail).get_swap_events() == [event]
+
+
+@pytest.mark.parametrize(
+    "name,direction,user",
+    [
+        ("数据2.json", "buy", "4DdrfiDHpmx55i4SPssxVzS9ZaKLb8qr45NKY9Er9nNh"),
+        (
+            "Photon Program + Pump.fun AMM.json",
+            "sell",
+            "DfMxre4cKmvogbLrPigxmibVTTQDuzjdXojWzjCXXhzj",
+        ),
+    ],
+)
+def test_pump_amm_events(name, direction, user):
+    parser = GeyserTXParser(load_update(name).transaction)
+    (event,) = parser.get_swap_events()
+    assert event.program_id == PUMP_AMM_PROGRAM_ID
+    assert event.name == ("BuyEvent" if direction == "buy" else "SellEvent")
+    assert event.direction == direction
+    assert event.user == user
+    # PumpSwap 还不在 SWAP_PROGRAMS 中
+    assert parser.get_swap_program_id() is None
+
+
+def test_event_amounts_fall_back_to_balances_on_partial_routes():
+    # 路由将买单拆到 PumpSwap 与 Meteora DLMM, 事件只覆盖其中一部分
+    parser = GeyserTXParser(load_update("数据2.json").transaction)
+    tx_event = parser.parse()
+    assert tx_event is not None
+    (event,) = parser.get_swap_events()
+    assert tx_event.to_amount == tx_event.post_token_amount - tx_event.pre_token_amount
+    assert tx_event.to_amount > event.token_amount
+
+
+def test_swap_program_id_only_matches_invoked_programs():
+    tx_detail = read_raw_tx("raw/open3")
+    logs = [
+        log
+        for log in tx_detail["meta"]["logMessages"]
+        if not log.startswith("Program 675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8")
+    ]
+    tx_detail["meta"]["logMessages"] = [
+        *logs,
+        "Program log: 675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8",
+    ]
+    assert RawTXParser(tx_detail).get_swap_program_id() is None
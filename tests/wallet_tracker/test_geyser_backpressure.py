@@ -0,0 +1,127 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from solders.pubkey import Pubkey  # type: ignore
+from wallet_tracker.benchmark.metrics import render_queue_metrics
+from wallet_tracker.geyser.backpressure import ResponseQueue, WorkerScaler
+from yellowstone_grpc.grpc import geyser_pb2
+
+COPYTRADE_WALLET = Pubkey.new_unique()
+
+
+def ping() -> geyser_pb2.SubscribeUpdate:
+    update = geyser_pb2.SubscribeUpdate()
+    update.ping.SetInParent()
+    return update
+
+
+def transaction(slot: int, wallet: Pubkey | None = None) -> geyser_pb2.SubscribeUpdate:
+    update = geyser_pb2.SubscribeUpdate(filters=["key"])
+    update.transaction.slot = slot
+    keys = update.transaction.transaction.transaction.message.account_keys
+    keys.append(bytes(wallet or Pubkey.new_unique()))
+    return update
+
+
+@pytest.mark.asyncio
+async def test_put_never_blocks_and_sheds_pings_first():
+    queue = ResponseQueue(maxsize=4, ping_watermark=0.5)
+    await queue.put(ping())
+    await queue.put(transaction(1))
+    # 深度达到 watermark, 新的 ping 直接丢弃
+    await queue.put(ping())
+    assert queue.dropped["ping"] == 1
+
+    await queue.put(transaction(2))
+    await queue.put(transaction(3))
+    # 队列已满, 淘汰已排队的 ping
+    await asyncio.wait_for(queue.put(transaction(4)), timeout=1)
+    assert queue.dropped["ping"] == 2
+    # 再次溢出时淘汰最早的普通交易
+    await queue.put(transaction(5))
+    assert queue.dropped["normal"] == 1
+    assert [(await queue.get()).transaction.slot for _ in range(4)] == [2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_copytrade_wallets_are_served_first_and_evicted_last():
+    queue = ResponseQueue(maxsize=3)
+    queue.set_priority_wallets([str(COPYTRADE_WALLET)])
+    await queue.put(transaction(1))
+    await queue.put(transaction(2, COPYTRADE_WALLET))
+    await queue.put(transaction(3))
+    await queue.put(transaction(4, COPYTRADE_WALLET))
+    # 队列中全部是优先交易时, 新的普通交易被淘汰
+    await queue.put(transaction(5, COPYTRADE_WALLET))
+    await queue.put(transaction(6))
+
+    assert queue.dropped == {"ping": 0, "normal": 3, "priority": 0}
+    assert [(await queue.get()).transaction.slot for _ in range(3)] == [2, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_spill_policy_hands_over_evicted_transactions():
+    spill = AsyncMock()
+    queue = ResponseQueue(maxsize=1, overflow="spill", spill=spill)
+    await queue.put(transaction(1))
+    await queue.put(transaction(2))
+
+    spill.assert_awaited_once()
+    assert spill.await_args.args[0].transaction.slot == 1
+    assert queue.spilled == 1
+    assert queue.dropped["normal"] == 0
+    assert (await queue.get()).transaction.slot == 2
+
+    with pytest.raises(ValueError):
+        ResponseQueue(overflow="spill")
+
+
+@pytest.mark.asyncio
+async def test_join_accounts_for_evicted_messages():
+    queue = ResponseQueue(maxsize=1)
+    await queue.put(transaction(1))
+    await queue.put(transaction(2))
+    await queue.get()
+    queue.task_done()
+    await asyncio.wait_for(queue.join(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_scaler_follows_queue_depth():
+    queue = ResponseQueue(maxsize=8)
+    release = asyncio.Event()
+
+    async def worker():
+        while True:
+            await queue.get()
+            await release.wait()
+            queue.task_done()
+
+    scaler = WorkerScaler(queue, worker, min_workers=1, max_workers=3, interval=3600)
+    scaler.start()
+    for slot in range(4):
+        await queue.put(transaction(slot))
+    await asyncio.sleep(0)
+    scaler.scale()
+    scaler.scale()
+    scaler.scale()
+    assert len(scaler.workers) == 3
+
+    release.set()
+    await queue.join()
+    await asyncio.sleep(0)
+    scaler.scale()
+    scaler.scale()
+    assert len(scaler.workers) == 1
+    await scaler.stop()
+
+
+def test_render_queue_metrics():
+    queue = ResponseQueue(maxsize=10)
+    queue.dropped["ping"] = 3
+    lines = render_queue_metrics({"geyser_response": {**queue.stats(), "workers": 2}})
+    assert "# TYPE wallet_tracker_queue_depth gauge" in lines
+    assert 'wallet_tracker_queue_workers{queue="geyser_response"} 2' in lines
+    assert 'wallet_tracker_queue_dropped_total{queue="geyser_response",reason="ping"} 3' in lines
+    assert "# TYPE wallet_tracker_queue_spilled_total counter" in lines
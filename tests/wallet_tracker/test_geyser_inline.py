@@ -0,0 +1,89 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import orjson as json
+import pytest
+from solbot_common.types import TxType
+from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL, NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.geyser.codec import load_update_dumps, update_from_dict
+from wallet_tracker.geyser.inline import InlineTransactionSubscriber
+from wallet_tracker.ingress import unwrap_failed
+
+FIXTURES_DIR = Path(__file__).parent.parent
+
+
+def load_transaction(name: str):
+    data = next(load_update_dumps(FIXTURES_DIR / name))
+    return update_from_dict(data).transaction
+
+
+def make_subscriber(parse_queue_size: int = 10) -> InlineTransactionSubscriber:
+    subscriber = InlineTransactionSubscriber(
+        "", "", AsyncMock(), [], parse_queue_size=parse_queue_size
+    )
+    subscriber.pusher = AsyncMock()
+    subscriber.tx_event_producer = AsyncMock()
+    return subscriber
+
+
+@pytest.mark.asyncio
+async def test_inline_parse_and_produce():
+    subscriber = make_subscriber()
+    tasks = [
+        asyncio.create_task(subscriber._parse_worker()),
+        asyncio.create_task(subscriber._event_worker()),
+    ]
+    await subscriber._process_transaction(load_transaction("数据2.json"))
+    await subscriber.parse_queue.join()
+    await subscriber.event_queue.join()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    subscriber.tx_event_producer.produce.assert_awaited_once()
+    tx_event = subscriber.tx_event_producer.produce.await_args.args[0]
+    assert tx_event.tx_type == TxType.OPEN_POSITION
+    subscriber.pusher.push.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_inline_redelivery_is_produced_after_failed_produce():
+    subscriber = make_subscriber()
+    subscriber.event_dedup.redis = None
+    subscriber.tx_event_producer.produce.side_effect = [ConnectionError("redis is down"), None]
+    task = asyncio.create_task(subscriber._event_worker())
+    transaction = load_transaction("数据2.json")
+    for _ in range(2):
+        await subscriber._parse_transaction(transaction, 1_700_000_000)
+        await subscriber.event_queue.join()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert subscriber.tx_event_producer.produce.await_count == 2
+    # 发布失败的交易同时写入失败队列, 由 FailedTxReprocessor 重试
+    subscriber.pusher.push.assert_awaited_once()
+    channel, payload = subscriber.pusher.push.await_args.args
+    assert channel == FAILED_TX_DETAIL_CHANNEL
+    failed_at, data = unwrap_failed(payload)
+    assert failed_at is not None
+    assert json.loads(data)["slot"] == transaction.slot
+    assert json.loads(data)["blockTime"] == 1_700_000_000
+
+
+@pytest.mark.asyncio
+async def test_inline_spills_to_redis_when_full():
+    subscriber = make_subscriber(parse_queue_size=1)
+    transaction = load_transaction("数据.json")
+    assert subscriber.slot_clock is not None
+    subscriber.slot_clock.update(transaction.slot, 1_700_000_000)
+    await subscriber._process_transaction(transaction)
+    await subscriber._process_transaction(transaction)
+
+    assert subscriber.parse_queue.qsize() == 1
+    subscriber.pusher.push.assert_awaited_once()
+    channel, payload = subscriber.pusher.push.await_args.args
+    assert channel == NEW_TX_DETAIL_CHANNEL
+    assert json.loads(payload)["slot"] == transaction.slot
+    # 使用 blocks_meta 中的区块时间而不是本地时间
+    assert json.loads(payload)["blockTime"] == 1_700_000_000
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import orjson as json
+import pytest
+from wallet_tracker.exceptions import NotSwapTransaction
+from wallet_tracker.geyser.codec import (
+    load_update_dumps,
+    transaction_to_rpc_dict,
+    update_from_dict,
+)
+from wallet_tracker.geyser.tx_subscriber import proto_to_dict
+from wallet_tracker.parser import GeyserTXParser, RawTXParser
+
+FIXTURES_DIR = Path(__file__).parent.parent
+FIXTURES = ["数据.json", "数据2.json", "meteroadbc.json", "Photon Program + Pump.fun AMM.json"]
+BLOCK_TIME = 1735689600
+
+
+def load_updates():
+    updates = []
+    for name in FIXTURES:
+        for data in load_update_dumps(FIXTURES_DIR / name):
+            updates.append(pytest.param(update_from_dict(data), id=name))
+    return updates
+
+
+def legacy_tx_detail(update) -> dict:
+    """旧的解析路径: proto_to_dict -> orjson -> dict"""
+    transaction = proto_to_dict(update)["transaction"]
+    data = {**transaction["transaction"]}
+    data["slot"] = int(transaction["slot"])
+    data["transactionIndex"] = int(transaction["transaction"].get("index", 0))
+    data["version"] = 0
+    data["blockTime"] = BLOCK_TIME
+    return json.loads(json.dumps(data))
+
+
+def parse_or_exception(parser):
+    try:
+        return parser.parse()
+    except (NotSwapTransaction, ValueError) as e:
+        return type(e)
+
+
+@pytest.mark.parametrize("update", load_updates())
+def test_geyser_parser_matches_raw_parser(update):
+    expected = parse_or_exception(RawTXParser(legacy_tx_detail(update)))
+    parsed = parse_or_exception(GeyserTXParser(update.transaction, block_time=BLOCK_TIME))
+    assert parsed == expected
+
+
+@pytest.mark.parametrize("update", load_updates())
+def test_transaction_to_rpc_dict(update):
+    legacy = legacy_tx_detail(update)
+    data = json.loads(json.dumps(transaction_to_rpc_dict(update.transaction, BLOCK_TIME)))
+
+    assert data["slot"] == legacy["slot"]
+    assert data["transaction"]["signatures"] == legacy["transaction"]["signatures"]
+    assert (
+        data["transaction"]["message"]["accountKeys"]
+        == legacy["transaction"]["message"]["accountKeys"]
+    )
+    assert data["meta"]["logMessages"] == legacy["meta"]["logMessages"]
+    assert data["meta"]["preBalances"] == [int(b) for b in legacy["meta"]["preBalances"]]
+    assert parse_or_exception(RawTXParser(data)) == parse_or_exception(RawTXParser(legacy))
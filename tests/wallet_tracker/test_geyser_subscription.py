@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from wallet_tracker.geyser.subscription import SubscriptionManager
+
+from .helpers import FakeGeyserClient
+
+
+def wallets(n: int) -> list[str]:
+    return [f"Wallet{i:038d}" for i in range(n)]
+
+
+def test_shard_assignment_is_stable_and_capped():
+    manager = SubscriptionManager(asyncio.Queue(), streams=4, max_wallets_per_stream=10)
+    for wallet in wallets(40):
+        assert manager.add(wallet)
+    assert all(len(stream.wallets) == 10 for stream in manager.streams)
+    assert not manager.add("one-more")
+
+    other = SubscriptionManager(asyncio.Queue(), streams=4, max_wallets_per_stream=100)
+    for wallet in wallets(40):
+        other.add(wallet)
+        assert other.assignments[wallet] == other.shard_of(wallet)
+
+    assert manager.remove(wallets(1)[0])
+    assert not manager.remove(wallets(1)[0])
+    assert len(manager.wallets) == 39
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_per_stream():
+    client = FakeGeyserClient()
+    manager = SubscriptionManager(asyncio.Queue(), streams=2, debounce=0.01)
+    manager.add("initial")
+    await manager.start(client)  # type: ignore
+    await asyncio.sleep(0)
+
+    # 每个 stream 建立时使用当前钱包列表订阅
+    assert len(client.initial_requests) == 2
+    assert sum(len(r.transactions) for r in client.initial_requests) == 1
+
+    for wallet in wallets(200):
+        manager.add(wallet)
+    manager.remove("initial")
+    await asyncio.sleep(0.05)
+
+    updates = [queue.get_nowait() for queue in client.request_queues if not queue.empty()]
+    assert [queue.qsize() for queue in client.request_queues] == [0, 0]
+    assert len(updates) == 2
+    subscribed = set()
+    for request in updates:
+        subscribed.update(request.transactions["key"].account_include)
+    assert subscribed == set(wallets(200))
+
+    await manager.stop()
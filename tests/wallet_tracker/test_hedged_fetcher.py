@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from solders.signature import Signature
+from wallet_tracker.wss.hedged_fetcher import HedgedFetcher
+
+SIGNATURE = Signature.default()
+
+
+class FakeEndpoint:
+    def __init__(self, latency: float, results: list | None = None):
+        self.latency = latency
+        # 依次返回的结果, 用完后返回最后一个
+        self.results = results if results is not None else [{"slot": 1}]
+        self.calls = 0
+
+    async def fetch(self, signature: Signature) -> dict | None:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        result = self.results[min(self.calls, len(self.results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_needs_single_request():
+    fast = FakeEndpoint(0.001)
+    slow = FakeEndpoint(0.05)
+    fetcher = HedgedFetcher(
+        [("slow", slow.fetch), ("fast", fast.fetch)], min_hedge_delay=0.02, retry_delays=()
+    )
+    # 预热: 学习各节点的延迟
+    for _ in range(10):
+        await fetcher.fetch(SIGNATURE)
+    fast.calls = slow.calls = 0
+
+    for _ in range(10):
+        assert await fetcher.fetch(SIGNATURE) == {"slot": 1}
+    assert fetcher.ranked()[0].name == "fast"
+    assert (fast.calls, slow.calls) == (10, 0)
+
+
+@pytest.mark.asyncio
+async def test_backup_is_fired_after_hedge_delay():
+    stuck = FakeEndpoint(1)
+    backup = FakeEndpoint(0.001)
+    fetcher = HedgedFetcher(
+        [("stuck", stuck.fetch), ("backup", backup.fetch)],
+        min_hedge_delay=0.01,
+        max_hedge_delay=0.01,
+        retry_delays=(),
+    )
+    assert await asyncio.wait_for(fetcher.fetch(SIGNATURE), 0.5) == {"slot": 1}
+    assert fetcher.hedges == 1
+    assert backup.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_error_triggers_backup_immediately():
+    broken = FakeEndpoint(0.001, [RuntimeError("boom")])
+    backup = FakeEndpoint(0.001)
+    fetcher = HedgedFetcher(
+        [("broken", broken.fetch), ("backup", backup.fetch)], max_hedge_delay=10, retry_delays=()
+    )
+    assert await asyncio.wait_for(fetcher.fetch(SIGNATURE), 0.5) == {"slot": 1}
+    assert fetcher.endpoints[0].success_rate < 1
+
+
+@pytest.mark.asyncio
+async def test_not_yet_available_is_retried():
+    lagging = FakeEndpoint(0.001, [None, None, {"slot": 2}])
+    fetcher = HedgedFetcher([("lagging", lagging.fetch)], retry_delays=(0.001,) * 5)
+    assert await fetcher.fetch(SIGNATURE) == {"slot": 2}
+    assert lagging.calls == 3
+
+    missing = FakeEndpoint(0.001, [None])
+    fetcher = HedgedFetcher([("missing", missing.fetch)], retry_delays=(0.001,) * 2)
+    assert await fetcher.fetch(SIGNATURE) is None
+    assert missing.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_not_yet_available_does_not_demote_primary():
+    # 新签名在首选节点上尚不可查, 由稍慢的备用节点查到
+    primary = FakeEndpoint(0.001, [None])
+    backup = FakeEndpoint(0.01)
+    fetcher = HedgedFetcher(
+        [("primary", primary.fetch), ("backup", backup.fetch)],
+        explore_interval=0,
+        retry_delays=(),
+    )
+    for _ in range(10):
+        assert await fetcher.fetch(SIGNATURE) == {"slot": 1}
+
+    assert fetcher.ranked()[0].name == "primary"
+    assert fetcher.endpoints[0].success_rate == 1
+    assert primary.calls == 10
@@ -0,0 +1,226 @@
+import asyncio
+
+import pytest
+from aioredis.exceptions import ConnectionError as RedisConnectionError
+from aioredis.exceptions import ResponseError
+from wallet_tracker.ingress import (
+    _EXPIRE_FAILED_SCRIPT,
+    BatchPopper,
+    BatchPusher,
+    QueueCompactor,
+    QueueLimits,
+    unwrap_failed,
+    wrap_failed,
+)
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.commands = []
+
+    def lpush(self, key, *values):
+        self.commands.append(("lpush", key, values))
+        return self
+
+    def ltrim(self, key, start, end):
+        self.commands.append(("ltrim", key, (start, end)))
+        return self
+
+    def llen(self, key):
+        self.commands.append(("llen", key, ()))
+        return self
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        if self.redis.down:
+            raise RedisConnectionError("Redis is down")
+        results = []
+        for command, key, args in self.commands:
+            results.append(getattr(self.redis, f"_{command}")(key, *args))
+        return results
+
+
+class FakeRedis:
+    """只实现列表相关命令的内存 Redis"""
+
+    def __init__(self, support_blmpop: bool = True):
+        self.lists: dict[str, list[str]] = {}
+        self.round_trips = 0
+        self.support_blmpop = support_blmpop
+        # 为 True 时 pipeline 写入失败
+        self.down = False
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self)
+
+    def _lpush(self, key: str, *values: str) -> int:
+        items = self.lists.setdefault(key, [])
+        for value in values:
+            items.insert(0, value)
+        return len(items)
+
+    def _ltrim(self, key: str, start: int, end: int) -> bool:
+        items = self.lists.get(key, [])
+        end = len(items) + end if end < 0 else end
+        self.lists[key] = items[start : end + 1]
+        return True
+
+    def _llen(self, key: str) -> int:
+        return len(self.lists.get(key, []))
+
+    def _rpop(self, key: str, count: int) -> list[str]:
+        items = self.lists.get(key, [])
+        popped = []
+        while items and len(popped) < count:
+            popped.append(items.pop())
+        return popped
+
+    async def execute_command(self, *args):
+        self.round_trips += 1
+        if not self.support_blmpop:
+            raise ResponseError("unknown command 'BLMPOP'")
+        _, _, _, key, _, _, count = args
+        popped = self._rpop(key, count)
+        return [key, popped] if popped else None
+
+    async def brpop(self, key, timeout=0):
+        self.round_trips += 1
+        popped = self._rpop(key, 1)
+        return (key, popped[0]) if popped else None
+
+    async def eval(self, script, numkeys, key, *args):
+        self.round_trips += 1
+        if script == _EXPIRE_FAILED_SCRIPT:
+            return self._expire(key, *args)
+        return self._rpop(key, args[0])
+
+    def _expire(self, key: str, deadline: float, count: int) -> int:
+        """与 _EXPIRE_FAILED_SCRIPT 相同的逻辑"""
+        items = self.lists.get(key, [])
+        expired = 0
+        for item in reversed(items[-count:]):
+            failed_at, _ = unwrap_failed(item)
+            if failed_at is not None and failed_at >= deadline:
+                break
+            expired += 1
+        if expired:
+            del items[-expired:]
+        return expired
+
+
+@pytest.mark.asyncio
+async def test_pusher_flush_on_size():
+    redis = FakeRedis()
+    pusher = BatchPusher(redis, max_batch_size=3, max_delay=10)  # type: ignore
+    for i in range(3):
+        await pusher.push("q", str(i))
+    assert redis.lists["q"] == ["2", "1", "0"]
+    assert redis.round_trips == 1
+    assert pusher.size == 0
+
+
+@pytest.mark.asyncio
+async def test_pusher_flush_on_deadline():
+    redis = FakeRedis()
+    pusher = BatchPusher(redis, max_batch_size=100, max_delay=0.01)  # type: ignore
+    await pusher.push("a", "1")
+    await pusher.push("b", "2")
+    assert redis.lists == {}
+    await asyncio.sleep(0.05)
+    assert redis.lists == {"a": ["1"], "b": ["2"]}
+    assert redis.round_trips == 1
+
+
+@pytest.mark.asyncio
+async def test_pusher_retries_failed_flush_without_new_pushes():
+    redis = FakeRedis()
+    redis.down = True
+    limits = QueueLimits()
+    pusher = BatchPusher(
+        redis,  # type: ignore
+        max_batch_size=2,
+        max_delay=0.001,
+        limits=limits,
+        max_buffer=3,
+        retry_delay=0.01,
+    )
+    await pusher.push("q", "0")
+    await asyncio.sleep(0.005)
+    assert redis.round_trips == 1
+    # 重试等待期间缓冲区达到 max_batch_size 不会立即写入, 超过 max_buffer 时丢弃最早的消息
+    for i in range(1, 5):
+        await pusher.push("q", str(i))
+    assert redis.round_trips == 1
+    assert pusher.buffers["q"] == ["2", "3", "4"]
+    assert limits.stats("q")["dropped"] == {"buffer": 2}
+
+    # 恢复后由已安排的重试写入, 不需要新的 push
+    redis.down = False
+    await asyncio.sleep(0.1)
+    assert redis.lists["q"] == ["4", "3", "2"]
+    assert pusher.size == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("support_blmpop", [True, False])
+async def test_popper_keeps_fifo_order(support_blmpop: bool):
+    redis = FakeRedis(support_blmpop=support_blmpop)
+    pusher = BatchPusher(redis, max_batch_size=10)  # type: ignore
+    popper = BatchPopper(redis, "q", count=4)  # type: ignore
+    for i in range(6):
+        await pusher.push("q", str(i))
+    await pusher.close()
+
+    assert await popper.pop() == ["0", "1", "2", "3"]
+    assert await popper.pop() == ["4", "5"]
+    assert await popper.pop() == []
+    assert popper.blmpop_supported is support_blmpop
+
+
+@pytest.mark.asyncio
+async def test_pusher_drops_oldest_over_limit():
+    redis = FakeRedis()
+    limits = QueueLimits()
+    limits.configure({"q": 3, "unbounded": 0})
+    pusher = BatchPusher(redis, max_batch_size=100, limits=limits)  # type: ignore
+    for i in range(5):
+        await pusher.push("q", str(i))
+        await pusher.push("unbounded", str(i))
+    await pusher.close()
+
+    # 保留最新的 3 条, 出队顺序不变
+    assert redis.lists["q"] == ["4", "3", "2"]
+    assert len(redis.lists["unbounded"]) == 5
+    assert limits.stats("q") == {"depth": 3, "capacity": 3, "dropped": {"overflow": 2}}
+    assert limits.stats("unbounded")["dropped"] == {}
+
+
+@pytest.mark.asyncio
+async def test_compactor_expires_failed_entries(monkeypatch):
+    redis = FakeRedis()
+    limits = QueueLimits()
+    limits.configure({"failed": 2})
+    compactor = QueueCompactor(redis, ["failed"], ttl=60, limits=limits)  # type: ignore
+
+    now = 1_700_000_000.0
+    monkeypatch.setattr("wallet_tracker.ingress.time.time", lambda: now - 120)
+    old = wrap_failed("old")
+    monkeypatch.setattr("wallet_tracker.ingress.time.time", lambda: now)
+    fresh = [wrap_failed(f"fresh-{i}") for i in range(3)]
+    # 旧格式的消息 (没有失败时间) 在最早的一端
+    redis.lists["failed"] = [*reversed(fresh), old, "legacy-signature"]
+
+    await compactor.compact()
+    assert [unwrap_failed(entry)[1] for entry in redis.lists["failed"]] == [
+        "fresh-2",
+        "fresh-1",
+    ]
+    assert limits.stats("failed")["dropped"] == {"expired": 2, "overflow": 1}
+    assert unwrap_failed("legacy-signature") == (None, "legacy-signature")
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from solbot_common.types import TxType
+from solders.pubkey import Pubkey
+from wallet_tracker.parser.logs import parse_logs
+from wallet_tracker.parser.raw_tx import RawTXParser
+from wallet_tracker.wss.account_log_monitor import AccountLogMonitor
+
+from .helpers import read_raw_tx
+
+
+@pytest.mark.parametrize("name", ["raw/open", "raw/open1", "raw/open2", "raw/open4"])
+def test_pump_buy_matches_full_parser(name):
+    tx_detail = read_raw_tx(name)
+    expected = RawTXParser(tx_detail).parse()
+    assert expected is not None
+
+    tx_event = parse_logs(expected.signature, tx_detail["meta"]["logMessages"], {expected.who: 0})
+    assert tx_event is not None
+    assert tx_event.provisional
+    assert tx_event.who == expected.who
+    assert tx_event.mint == expected.mint
+    assert tx_event.from_amount == expected.from_amount
+    assert tx_event.to_amount == expected.to_amount
+    assert tx_event.tx_direction == "buy"
+    assert tx_event.tx_type == TxType.OPEN_POSITION
+    assert tx_event.program_id == expected.program_id
+
+
+def test_untracked_wallet_and_sell_fall_back():
+    tx_detail = read_raw_tx("raw/open")
+    logs = tx_detail["meta"]["logMessages"]
+    assert parse_logs("sig", logs, {str(Pubkey.new_unique()): 0}) is None
+
+    # 卖出需要交易前的余额
+    tx_detail = read_raw_tx("raw/fail")
+    who = tx_detail["transaction"]["message"]["accountKeys"][0]
+    assert parse_logs("sig", tx_detail["meta"]["logMessages"], {who: 0}) is None
+
+    # 非 Pump 程序输出的数据
+    logs = [
+        log.replace(
+            "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P", "Fake1111111111111111111111111111"
+        )
+        for log in read_raw_tx("raw/open")["meta"]["logMessages"]
+    ]
+    assert parse_logs("sig", logs, {"7DMcENeWGQ9MVqy7jLo54n9ibzH1DQBNtTa7otBsgjnJ": 0}) is None
+
+
+@pytest.mark.asyncio
+async def test_monitor_publishes_without_fetching():
+    tx_detail = read_raw_tx("raw/open")
+    who = Pubkey.from_string("7DMcENeWGQ9MVqy7jLo54n9ibzH1DQBNtTa7otBsgjnJ")
+    monitor = AccountLogMonitor([], ["https://rpc.example"], AsyncMock(), log_fast_path=True)
+    monitor.pusher = AsyncMock()
+    monitor.tx_event_producer = AsyncMock()
+    await monitor.subscribe_wallets([who])
+
+    message = SimpleNamespace(
+        result=SimpleNamespace(
+            context=SimpleNamespace(slot=tx_detail["slot"]),
+            value=SimpleNamespace(
+                signature=tx_detail["transaction"]["signatures"][0],
+                err=None,
+                logs=tx_detail["meta"]["logMessages"],
+            ),
+        )
+    )
+    await monitor.process_log(message)  # type: ignore
+    monitor.tx_event_producer.produce.assert_awaited_once()
+    assert monitor.tx_event_producer.produce.await_args.args[0].slot == tx_detail["slot"]
+    monitor.pusher.push.assert_not_awaited()
@@ -1,24 +1,19 @@
-import json
-from pathlib import Path
-
 import pytest
 from solbot_common.types import TxType
+from wallet_tracker.parser.base import IndexedTXParser
 from wallet_tracker.parser.raw_tx import RawTXParser
 
-
-def read_raw_tx(name: str) -> dict:
-    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
-    with open(path) as f:
-        return json.load(f)["result"]
+from .helpers import read_raw_tx
 
 
+# Pump.fun 交易的 SOL 数量取自 TradeEvent, 不包含手续费、小费与 ATA 租金
 @pytest.mark.parametrize(
     "name,expected_signature,expected_from_amount,expected_from_decimals,expected_to_amount,expected_to_decimals,expected_mint,expected_who,expected_tx_type,expected_program_id",
     [
         (
             "raw/open",
             "PzTWo61tqt483ca24YmkF2MHJRTgWWAQRPHdSWNsNxNQH6JqRb7HNMKErDceQWSZ874aymJ9GZ38qd2UcH3gHB7",
-            2087044280,
+            2000000000,
             9,
             59023574727001,
             6,
@@ -30,7 +25,7 @@ def read_raw_tx(name: str) -> dict:
         (
             "raw/open1",
             "35hGxFdEmx3zezFxQujHPkyKYPQBiJaS6meWxNz7GjRqK2uqzu3TSue4YGNTHKoR3Rqc9QyxZ5gyEX9dykv1iLA9",
-            1015764062,
+            1000000000,
             9,
             27242531851477,
             6,
@@ -42,7 +37,7 @@ def read_raw_tx(name: str) -> dict:
         (
             "raw/open2",
             "461m5W5dtJ9wAamkFeApe3y7Sw6mdmHhA4Pnw8XoJCFKbY7i7MfbVeDDCvk3fZZBcbNWxRaY5yn3ckpLZGwc9NvU",
-            148930424,
+            144879737,
             9,
             4563174234155,
             6,
@@ -66,7 +61,7 @@ def read_raw_tx(name: str) -> dict:
         (
             "raw/open4",
             "sxMEDoWXRYTzWkoMsj3vm6jvJFNBnsFjNywRTEaSQACDKSvaPHCXXzDR64GV4Ugx7V11DnQRDYbc2L1un7JLSeM",
-            204044280,
+            200000000,
             9,
             5780097770783,
             6,
@@ -128,7 +123,7 @@ def read_raw_tx(name: str) -> dict:
             "2PniMp1v8ZgYWksrVPDg87sSz1SBueGzXKCECSUAK6z9BCRXgyD21MAs1FdSeXnw3sMwFHhS5TVeiGgiX5zSgNu9",
             6251953735542,
             6,
-            178295225,
+            180101237,
             9,
             "3kKVvwSgLKcydFTeEuejpKEDqqGxrrKND7B7W9cApump",
             "2dV7UHwdooBxowaNTjLALuFJaGeRfgcuP6DkUNysMdpX",
@@ -138,7 +133,7 @@ def read_raw_tx(name: str) -> dict:
         (
             "raw/fail1",
             "2UpH8fRWjtpyfZhSki1y5zH13QLAHw6Fh5YwW4aJwm57VoqmZXCtuYsb9YjJCEKcaiYWqtQpt14bD21u2hfFFFk3",
-            214580413,
+            210431815,
             9,
             6259754126787,
             6,
@@ -185,3 +180,12 @@ def test_parse_raw_tx(
     assert parsed.who == expected_who
     assert parsed.tx_type == expected_tx_type
     assert parsed.program_id == expected_program_id
+
+
+def test_parser_missing_a_hook_cannot_be_instantiated():
+    class IncompleteParser(IndexedTXParser):
+        def _get_signer(self) -> str:
+            return "signer"
+
+    with pytest.raises(TypeError, match="_iter_inner_instruction_data"):
+        IncompleteParser()
@@ -0,0 +1,114 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from solbot_common.types import TxEvent, TxType
+from wallet_tracker.parser import GeyserTXParser
+from wallet_tracker.reorder import ReorderBuffer
+
+from .test_geyser_inline import load_transaction
+
+
+def make_event(
+    signature: str, slot: int | None, tx_index: int | None = None, who: str = "wallet"
+) -> TxEvent:
+    return TxEvent(
+        signature=signature,
+        from_amount=1,
+        from_decimals=9,
+        to_amount=1,
+        to_decimals=6,
+        mint="mint",
+        who=who,
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=0,
+        pre_token_amount=0,
+        post_token_amount=1,
+        slot=slot,
+        tx_index=tx_index,
+    )
+
+
+class Collector:
+    def __init__(self):
+        self.events: list[str] = []
+
+    async def emit(self, tx_event: TxEvent) -> None:
+        self.events.append(tx_event.signature)
+
+
+@pytest.mark.asyncio
+async def test_events_of_a_wallet_are_published_in_slot_order():
+    collector = Collector()
+    buffer = ReorderBuffer(collector.emit, window=0.05)
+    await buffer.push(make_event("sell", 10, 5))
+    await buffer.push(make_event("other-wallet", 11, who="other"))
+    await buffer.push(make_event("buy", 10, 2))
+    await buffer.push(make_event("no-slot", None))
+    # 没有 slot 的事件不等待
+    assert collector.events == ["no-slot"]
+
+    await asyncio.sleep(0.15)
+    assert collector.events == ["no-slot", "buy", "sell", "other-wallet"]
+    assert buffer.stats()["reordered"] == 1
+    assert buffer.stats()["depth"] == 0
+
+    # 比已发布的事件更早的事件无法再纠正, 直接发布
+    await buffer.push(make_event("late", 9))
+    assert collector.events[-1] == "late"
+    assert buffer.stats()["late"] == 1
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_overflow_and_close_release_in_order():
+    collector = Collector()
+    buffer = ReorderBuffer(collector.emit, window=60, max_pending=2)
+    await buffer.push(make_event("a-2", 2, who="a"))
+    await buffer.push(make_event("b-1", 1, who="b"))
+    await buffer.push(make_event("a-1", 1, who="a"))
+    # 超过上限时立即发布最早到达的钱包 a
+    assert collector.events == ["a-1", "a-2"]
+    assert buffer.stats()["forced"] == 1
+
+    await buffer.close()
+    assert collector.events == ["a-1", "a-2", "b-1"]
+
+
+@pytest.mark.asyncio
+async def test_failed_emit_is_retried():
+    emit = AsyncMock(side_effect=[ConnectionError("redis is down"), None])
+    on_failure = AsyncMock()
+    buffer = ReorderBuffer(emit, window=60, retry_delay=0)
+    await buffer.push(make_event("a", None), on_failure)
+    assert emit.await_count == 2
+    on_failure.assert_not_awaited()
+    assert buffer.stats()["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_emit_failure_is_handed_to_on_failure():
+    error = ConnectionError("redis is down")
+    emit = AsyncMock(side_effect=error)
+    on_failure = AsyncMock()
+    buffer = ReorderBuffer(emit, window=60, max_retries=2, retry_delay=0)
+    await buffer.push(make_event("a", 1), on_failure)
+    await buffer.push(make_event("b", 2), None)
+    await buffer.close()
+
+    # 每个事件重试 max_retries 次, 只有传入回调的事件会交给回调处理
+    assert emit.await_count == 6
+    on_failure.assert_awaited_once()
+    tx_event, raised = on_failure.await_args.args
+    assert tx_event.signature == "a"
+    assert raised is error
+    assert buffer.stats()["failed"] == 2
+
+
+def test_parser_stamps_slot_and_index():
+    transaction = load_transaction("数据2.json")
+    tx_event = GeyserTXParser(transaction).parse()
+    assert tx_event is not None
+    assert tx_event.slot == transaction.slot
+    assert tx_event.tx_index == transaction.transaction.index
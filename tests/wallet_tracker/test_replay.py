@@ -0,0 +1,111 @@
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from solders.rpc.responses import (
+    LogsNotification,
+    LogsNotificationResult,
+    RpcLogsResponse,
+    RpcResponseContext,
+)
+from solders.signature import Signature
+from wallet_tracker.geyser.codec import load_update_dumps, update_from_dict
+from wallet_tracker.replay import (
+    RecordKind,
+    StreamRecorder,
+    StreamReplayer,
+    iter_records,
+    seed_recording,
+)
+from wallet_tracker.wss.account_log_monitor import AccountLogMonitor
+
+FIXTURES_DIR = Path(__file__).parent.parent
+FIXTURES = [FIXTURES_DIR / "数据.json", FIXTURES_DIR / "meteroadbc.json"]
+
+
+def logs_notification() -> LogsNotification:
+    value = RpcLogsResponse(
+        Signature.new_unique(),
+        None,
+        ["Program 6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P invoke [1]"],
+    )
+    return LogsNotification(LogsNotificationResult(value, RpcResponseContext(5208469)), 24040)
+
+
+def test_recording_round_trip(tmp_path):
+    path = tmp_path / "stream.bin"
+    update = update_from_dict(next(load_update_dumps(FIXTURES[1])))
+    message = logs_notification()
+
+    recorder = StreamRecorder(path)
+    recorder.record_update(update)
+    recorder.record_logs(message)
+    recorder.close()
+    # 关闭后不再写入
+    recorder.record_update(update)
+
+    records = list(iter_records(path))
+    assert [record.kind for record in records] == [RecordKind.GEYSER_UPDATE, RecordKind.WSS_LOGS]
+    assert records[0].decode() == update
+    assert records[1].decode().to_json() == message.to_json()  # type: ignore
+    assert records[0].timestamp <= records[1].timestamp <= time.time()
+
+
+def test_truncated_and_invalid_files(tmp_path):
+    path = tmp_path / "stream.bin"
+    assert seed_recording(FIXTURES, path) == 2
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+    assert len(list(iter_records(path))) == 1
+
+    path.write_bytes(b"not a recording")
+    with pytest.raises(ValueError):
+        list(iter_records(path))
+
+
+@pytest.mark.asyncio
+async def test_replay_speed(tmp_path):
+    path = tmp_path / "stream.bin"
+    assert seed_recording(FIXTURES, path, interval=0.2, repeat=2) == 4
+
+    on_update = AsyncMock()
+    start = time.monotonic()
+    stats = await StreamReplayer(path, speed=4).replay(on_update=on_update)
+    # 3 个间隔 * 0.2s / 4
+    assert 0.14 <= time.monotonic() - start < 0.5
+    assert stats.records == 4
+    assert on_update.await_count == 4
+    assert on_update.await_args_list[0].args[0].transaction.slot > 0
+
+    # 最大速度不等待, 没有回调的消息类型被跳过
+    start = time.monotonic()
+    stats = await StreamReplayer(path, speed=0).replay(on_logs=AsyncMock())
+    assert time.monotonic() - start < 0.1
+    assert stats.records == 0
+
+
+@pytest.mark.asyncio
+async def test_replay_counts_callback_errors(tmp_path):
+    path = tmp_path / "stream.bin"
+    seed_recording(FIXTURES, path)
+    stats = await StreamReplayer(path, speed=0).replay(
+        on_update=AsyncMock(side_effect=[None, RuntimeError("boom")])
+    )
+    assert stats.records == 1
+    assert stats.errors == 1
+
+
+@pytest.mark.asyncio
+async def test_account_log_monitor_records_messages(tmp_path):
+    path = tmp_path / "stream.bin"
+    recorder = StreamRecorder(path)
+    monitor = AccountLogMonitor([], ["https://rpc.example"], AsyncMock(), recorder=recorder)
+    monitor.pusher = AsyncMock()
+    message = logs_notification()
+    await monitor.process_log(message)
+    recorder.close()
+
+    (record,) = iter_records(path)
+    assert record.kind == RecordKind.WSS_LOGS
+    assert record.decode().to_json() == message.to_json()  # type: ignore
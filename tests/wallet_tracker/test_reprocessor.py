@@ -0,0 +1,127 @@
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import orjson as json
+import pytest
+from wallet_tracker.constants import (
+    FAILED_TX_DETAIL_CHANNEL,
+    FAILED_TX_SIGNATURE_CHANNEL,
+    NEW_TX_DETAIL_CHANNEL,
+    TX_RETRY_SCHEDULE,
+)
+from wallet_tracker.ingress import wrap_failed
+from wallet_tracker.reprocessor import FailedTxReprocessor
+
+SIGNATURE = "5" * 88
+
+
+def read_raw_tx(name: str, block_time: float) -> str:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    tx_detail = json.loads(path.read_bytes())["result"]
+    tx_detail["blockTime"] = int(block_time)
+    return json.dumps(tx_detail).decode("utf-8")
+
+
+class FakeRedis:
+    """只实现重试用到的列表与 sorted set 命令"""
+
+    def __init__(self):
+        self.lists: dict[str, list[str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    async def eval(self, script, numkeys, key, *args):
+        if "ZRANGEBYSCORE" in script:
+            max_score, count = args
+            zset = self.zsets.get(key, {})
+            due = sorted((s, m) for m, s in zset.items() if s <= max_score)[:count]
+            for _, member in due:
+                del zset[member]
+            return [member for _, member in due]
+        (count,) = args
+        items = self.lists.get(key, [])
+        popped = []
+        while items and len(popped) < count:
+            popped.append(items.pop())
+        return popped
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+
+def make_reprocessor(redis: FakeRedis, fetch, **kwargs) -> FailedTxReprocessor:
+    reprocessor = FailedTxReprocessor(redis, fetch, base_delay=0, **kwargs)  # type: ignore
+    reprocessor.pusher = AsyncMock()
+    reprocessor.tx_event_producer = AsyncMock()
+    reprocessor.event_dedup = AsyncMock()
+    reprocessor.event_dedup.is_new.return_value = True
+    return reprocessor
+
+
+@pytest.mark.asyncio
+async def test_fetch_is_retried_with_backoff_until_found():
+    redis = FakeRedis()
+    redis.lists[FAILED_TX_SIGNATURE_CHANNEL] = [wrap_failed(SIGNATURE)]
+    tx_detail = {"blockTime": int(time.time()), "slot": 1}
+    fetch = AsyncMock(side_effect=[None, tx_detail])
+    reprocessor = make_reprocessor(redis, fetch)
+
+    assert await reprocessor.intake() == 1
+    assert await reprocessor.process_due() == 1
+    # 第一次没有查到, 重新写入计划, 重试次数 + 1
+    (entry,) = redis.zsets[TX_RETRY_SCHEDULE]
+    assert json.loads(entry)["attempts"] == 1
+    reprocessor.pusher.push.assert_not_awaited()
+
+    assert await reprocessor.process_due() == 1
+    reprocessor.pusher.push.assert_awaited_once()
+    channel, payload = reprocessor.pusher.push.await_args.args
+    assert channel == NEW_TX_DETAIL_CHANNEL
+    assert json.loads(payload) == tx_detail
+    assert redis.zsets[TX_RETRY_SCHEDULE] == {}
+    assert reprocessor.stats()["recovered"] == {"fetch": 1, "parse": 0}
+    assert reprocessor.stats()["retried"]["fetch"] == 2
+
+
+@pytest.mark.asyncio
+async def test_parse_failures_are_recovered_or_dropped():
+    redis = FakeRedis()
+    redis.lists[FAILED_TX_DETAIL_CHANNEL] = [
+        wrap_failed(read_raw_tx("raw/open", time.time())),
+        wrap_failed(read_raw_tx("raw/add", time.time() - 600)),
+        "{}",
+    ]
+    reprocessor = make_reprocessor(redis, AsyncMock(), max_attempts=1)
+
+    await reprocessor.run_once()
+    reprocessor.tx_event_producer.produce.assert_awaited_once()
+    stats = reprocessor.stats()
+    assert stats["recovered"] == {"fetch": 0, "parse": 1}
+    # 出块时间超过时效的交易不再发布, 无法解析的交易用完重试次数后丢弃
+    assert stats["dropped"] == {"stale": 1, "exhausted": 1}
+    assert stats["depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_items_past_the_freshness_window_are_dropped():
+    redis = FakeRedis()
+    redis.lists[FAILED_TX_SIGNATURE_CHANNEL] = [SIGNATURE]
+    fetch = AsyncMock(return_value=None)
+    reprocessor = make_reprocessor(redis, fetch, max_age=10, max_attempts=100)
+    reprocessor.base_delay = 4
+
+    await reprocessor.intake()
+    (entry,) = redis.zsets[TX_RETRY_SCHEDULE]
+    # 立即到期, 查询失败后下一次退避 8 秒, 仍在时效内; 再下一次 16 秒则超过时效
+    redis.zsets[TX_RETRY_SCHEDULE][entry] = 0
+    await reprocessor.process_due()
+    (entry,) = redis.zsets[TX_RETRY_SCHEDULE]
+    redis.zsets[TX_RETRY_SCHEDULE][entry] = 0
+    await reprocessor.process_due()
+
+    assert redis.zsets[TX_RETRY_SCHEDULE] == {}
+    assert reprocessor.stats()["dropped"] == {"stale": 1}
+    assert fetch.await_count == 2
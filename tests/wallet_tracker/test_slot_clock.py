@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from wallet_tracker.geyser.slot_clock import SlotClock
+from wallet_tracker.geyser.subscription import BLOCKS_META_FILTER_NAME, SubscriptionManager
+from yellowstone_grpc.grpc import geyser_pb2
+
+from .helpers import FakeGeyserClient
+
+
+def block_meta(slot: int, block_time: int) -> geyser_pb2.SubscribeUpdate:
+    update = geyser_pb2.SubscribeUpdate(filters=[BLOCKS_META_FILTER_NAME])
+    update.block_meta.slot = slot
+    update.block_meta.block_time.timestamp = block_time
+    return update
+
+
+def transaction(slot: int) -> geyser_pb2.SubscribeUpdate:
+    update = geyser_pb2.SubscribeUpdate(filters=["key"])
+    update.transaction.slot = slot
+    return update
+
+
+def test_block_time_is_exact_or_extrapolated():
+    clock = SlotClock(capacity=4)
+    assert clock.block_time(100) is None
+
+    clock.observe(block_meta(100, 1_700_000_000))
+    assert not clock.observe(transaction(101))
+    assert clock.block_time(100) == 1_700_000_000
+    # 所在区块的 block_meta 尚未到达, 按 slot 间隔推算
+    assert clock.block_time(110) == 1_700_000_004
+
+    # 超出容量的旧 slot 被覆盖
+    for slot in range(101, 105):
+        clock.update(slot, 1_700_000_001)
+    assert clock.block_time(100) == 1_699_999_999
+    assert clock.stats() == {
+        "depth": 4,
+        "capacity": 4,
+        "exact": 1,
+        "estimated": 2,
+        "missing": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_block_meta_is_consumed_before_the_response_queue():
+    clock = SlotClock()
+    queue: asyncio.Queue = asyncio.Queue()
+    client = FakeGeyserClient([block_meta(7, 1_700_000_000), transaction(8)])
+    manager = SubscriptionManager(queue, streams=2, slot_clock=clock)
+    manager.add("wallet")
+    await manager.start(client)  # type: ignore
+    await asyncio.sleep(0.01)
+
+    # 只有第一个 stream 订阅 blocks_meta
+    assert [len(r.blocks_meta) for r in client.initial_requests] == [1, 0]
+    assert clock.block_time(7) == 1_700_000_000
+    # 第二个 stream 同样收到一笔交易
+    assert queue.qsize() == 2
+    assert (await queue.get()).transaction.slot == 8
+    await manager.stop()
@@ -0,0 +1,71 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import orjson as json
+import pytest
+from solbot_common.types import TxType
+from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL
+from wallet_tracker.ingress import unwrap_failed
+from wallet_tracker.reorder import ReorderingProducer
+from wallet_tracker.tx_worker import TransactionWorker, parse_tx_detail
+
+
+def read_raw_tx_text(name: str) -> str:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    return json.dumps(json.loads(path.read_bytes())["result"]).decode("utf-8")
+
+
+def test_parse_tx_detail():
+    result = parse_tx_detail(read_raw_tx_text("raw/open"))
+    assert result.status == "ok"
+    assert result.tx_event is not None
+    assert result.tx_event.tx_type == TxType.OPEN_POSITION
+    assert result.tx_hash == result.tx_event.signature
+    assert result.parse_start <= result.parse_end
+
+
+def test_parse_tx_detail_invalid():
+    result = parse_tx_detail("{}")
+    assert result.status == "failed"
+    assert result.error is not None
+
+
+@pytest.mark.parametrize("names", [["raw/open", "raw/add", "raw/reduce", "raw/close"]])
+def test_parse_tx_detail_in_process_pool(names: list[str]):
+    texts = [read_raw_tx_text(name) for name in names]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(parse_tx_detail, texts))
+
+    assert [r.status for r in results] == ["ok"] * len(names)
+    assert [r.tx_event.tx_type for r in results] == [
+        TxType.OPEN_POSITION,
+        TxType.ADD_POSITION,
+        TxType.REDUCE_POSITION,
+        TxType.CLOSE_POSITION,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reordered_produce_failure_goes_to_failed_queue():
+    worker = TransactionWorker(AsyncMock())
+    worker.pusher = AsyncMock()
+    worker.dedup.redis = None
+    producer = AsyncMock()
+    producer.produce.side_effect = ConnectionError("redis is down")
+    worker.tx_event_producer = ReorderingProducer(producer, window=60)
+    worker.tx_event_producer.buffer.retry_delay = 0
+
+    text = read_raw_tx_text("raw/open")
+    await worker.process_transaction(json.loads(text))
+    # 事件仍在重排缓冲区中, 发布失败发生在 produce 返回之后
+    worker.pusher.push.assert_not_awaited()
+    await worker.tx_event_producer.close()
+
+    channel, payload = worker.pusher.push.await_args.args
+    assert channel == FAILED_TX_DETAIL_CHANNEL
+    assert unwrap_failed(payload)[1] == json.dumps(json.loads(text)).decode("utf-8")
+    # 去重记录已撤销, 重试时可以再次发布
+    tx_event = parse_tx_detail(text).tx_event
+    assert tx_event is not None
+    assert await worker.dedup.is_new(tx_event.signature)
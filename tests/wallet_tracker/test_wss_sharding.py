@@ -0,0 +1,63 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from solders.pubkey import Pubkey
+from wallet_tracker.wss.account_log_monitor import AccountLogMonitor
+
+from .helpers import FakeWebsocket
+
+WALLETS = [Pubkey.new_unique() for _ in range(30)]
+
+
+def make_monitor(**kwargs) -> AccountLogMonitor:
+    return AccountLogMonitor(
+        [],
+        ["https://rpc-a.example", "https://rpc-b.example"],
+        AsyncMock(),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_wallets_are_spread_and_capped():
+    monitor = make_monitor(connections_per_endpoint=2, max_wallets_per_connection=7)
+    assert [c.websocket_url for c in monitor.connections] == [
+        "wss://rpc-a.example",
+        "wss://rpc-a.example",
+        "wss://rpc-b.example",
+        "wss://rpc-b.example",
+    ]
+
+    await monitor.subscribe_wallets(WALLETS)
+    assert monitor.loads == [7, 7, 7, 7]
+    assert len(monitor.unassigned) == 2
+    for wallet, index in monitor.assignments.items():
+        assert wallet in monitor.connections[index].wallets
+
+    # 取消订阅释放的容量用于暂未分配的钱包
+    await monitor.unsubscribe_wallets(WALLETS[:2])
+    assert monitor.unassigned == set()
+    assert sum(monitor.loads) == 28
+
+
+@pytest.mark.asyncio
+async def test_failed_connection_wallets_move_to_healthy_ones():
+    monitor = make_monitor(connections_per_endpoint=1, max_wallets_per_connection=100)
+    monitor.is_running = True
+    websockets = [FakeWebsocket() for _ in monitor.connections]
+    for connection, websocket in zip(monitor.connections, websockets, strict=True):
+        connection._set_websocket(websocket)  # type: ignore
+    await asyncio.sleep(0)
+
+    await monitor.subscribe_wallets(WALLETS)
+    assert all(monitor.loads)
+
+    failed, healthy = monitor.connections
+    failed._set_websocket(None)
+    await asyncio.gather(*monitor._rebalance_tasks)
+
+    assert monitor.loads == [0, len(WALLETS)]
+    assert failed.wallets == set()
+    assert healthy.wallets == {str(wallet) for wallet in WALLETS}
+    assert len(websockets[1].sent) == len(WALLETS)
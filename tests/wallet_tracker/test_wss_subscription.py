@@ -0,0 +1,57 @@
+import pytest
+from solders.pubkey import Pubkey
+from solders.rpc.responses import SubscriptionResult
+from wallet_tracker.wss.subscription import LogsSubscriptionManager
+
+from .helpers import FakeWebsocket
+
+WALLETS = [str(Pubkey.new_unique()) for _ in range(5)]
+
+
+def wallet_of(request) -> str:
+    return str(request.filter_.pubkey)
+
+
+@pytest.mark.asyncio
+async def test_pipelined_subscribe_matches_by_request_id():
+    manager = LogsSubscriptionManager("confirmed", max_pending=10)
+    websocket = FakeWebsocket()
+    manager.attach(websocket)  # type: ignore
+
+    await manager.subscribe(WALLETS)
+    # 所有请求在收到任何响应前发出
+    assert [wallet_of(r) for r in websocket.sent] == WALLETS
+
+    # 响应乱序到达
+    for request in reversed(websocket.sent):
+        await manager.on_subscription_result(SubscriptionResult(request.id, request.id * 100))
+    assert manager.subscription_ids == {wallet_of(r): r.id * 100 for r in websocket.sent}
+    assert manager.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_before_result():
+    manager = LogsSubscriptionManager("confirmed")
+    websocket = FakeWebsocket()
+    manager.attach(websocket)  # type: ignore
+
+    await manager.subscribe(WALLETS[:1])
+    await manager.unsubscribe(WALLETS[:1])
+    request = websocket.sent[0]
+    await manager.on_subscription_result(SubscriptionResult(request.id, 42))
+    assert websocket.unsubscribed == [42]
+    assert manager.subscription_ids == {}
+
+
+@pytest.mark.asyncio
+async def test_resubscribe_all_after_reconnect():
+    manager = LogsSubscriptionManager("confirmed")
+    # 未连接时订阅的钱包在连接建立后发送
+    await manager.subscribe(WALLETS)
+
+    for _ in range(2):
+        websocket = FakeWebsocket()
+        manager.attach(websocket)  # type: ignore
+        await manager.resubscribe_all()
+        assert sorted(wallet_of(r) for r in websocket.sent) == sorted(WALLETS)
+        manager.detach()